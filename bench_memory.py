@@ -0,0 +1,49 @@
+import sys
+import tracemalloc
+from royals import *
+
+
+def build(n):
+    '''(int) -> FamilyTree
+    Build a FamilyTree of about n nodes in which each couple has three
+    children, two of whom marry.
+    '''
+
+    tree = FamilyTree(True)
+    root = CoupleNode(Person('Sarah', 'Gibeau', 'F'),
+                      Person('Mr', 'Gibeau', 'M'), tree)
+    tree.start(root)
+    couples = [root]
+    count = 1
+    i = 0
+    while count < n:
+        couple = couples[i]
+        i += 1
+        for j in range(3):
+            if j % 2:
+                child = couple.have_daughter('Aphrodite')
+            else:
+                child = couple.have_son('Zeus')
+            count += 1
+            if j < 2:
+                couples.append(child.marry(Person('Hera', 'Juno', 'F')))
+    return tree
+
+
+def bytes_per_node(n):
+    '''(int) -> float
+    Return the bytes allocated per node while building and querying a
+    FamilyTree of about n nodes.
+    '''
+
+    tracemalloc.start()
+    tree = build(n)
+    tree.line_of_succession()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(tree.nodes)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print('%d nodes: %.1f bytes per node' % (n, bytes_per_node(n)))
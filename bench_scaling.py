@@ -0,0 +1,78 @@
+import io
+import json
+import platform
+import random
+import sys
+import time
+from contextlib import redirect_stdout
+from dynasty import generate
+from royals import Person
+
+
+def timed(f, calls):
+    '''(function, int) -> float
+    Return the mean seconds taken by calls calls to f, which is passed
+    the number of the call.
+    '''
+
+    start = time.perf_counter()
+    for i in range(calls):
+        f(i)
+    return (time.perf_counter() - start) / calls
+
+
+def benchmark(n, seed=0, calls=100):
+    '''(int, int, int) -> list of dict
+    Time the FamilyTree operations on a generated tree of about n
+    royals and return one result per operation.
+    '''
+
+    tree = generate(n, seed)
+    rnd = random.Random(seed)
+    people = list(tree.nodes)
+    living = [p for p in people if p.alive]
+    picks = [rnd.choice(living) for i in range(calls)]
+    results = {}
+    results['search'] = timed(lambda i: tree.search(people[i % len(people)]),
+                              calls * 10)
+    results['crown'] = timed(lambda i: tree.crown(picks[i]), calls)
+
+    #Each line follows a coronation, so nothing of it is cached but
+    #the orderings away from the old and new rulers' paths
+    total = 0
+    for i in range(min(calls, 10)):
+        tree.crown(picks[i])
+        start = time.perf_counter()
+        tree.line_of_succession()
+        total += time.perf_counter() - start
+    results['line_of_succession'] = total / min(calls, 10)
+    single = [p for p in living if not hasattr(tree.search(p), 'consort')]
+    rnd.shuffle(single)
+    consort = Person('Hera', 'Juno', 'F')
+    if single:
+        results['marry'] = timed(
+            lambda i: tree.search(single[i]).marry(consort),
+            min(calls, len(single)))
+    results['kill'] = timed(lambda i: tree.kill(picks[i]), calls)
+    with redirect_stdout(io.StringIO()):
+        results['print_tree'] = timed(lambda i: tree.print_tree(), 1)
+    return [{'operation': operation, 'nodes': len(tree.nodes), 'seed': seed,
+             'seconds': seconds, 'python': platform.python_version()}
+            for operation, seconds in sorted(results.items())]
+
+
+if __name__ == '__main__':
+    #Time every size from 10 up to the given size, by powers of ten, and
+    #write the results as JSON lines to the given file or stdout
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    out = open(sys.argv[2], 'w') if len(sys.argv) > 2 else sys.stdout
+    try:
+        n = 10
+        while n <= largest:
+            for result in benchmark(n):
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+            n *= 10
+    finally:
+        if out is not sys.stdout:
+            out.close()
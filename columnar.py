@@ -0,0 +1,291 @@
+import numpy
+from royals import *
+
+
+class ColumnarTree:
+    '''A dynasty stored as flat arrays indexed by royal rather than as a
+    graph of RoyalNodes, whose line of succession is computed with
+    vectorized NumPy operations. It is a companion to FamilyTree, built
+    from one by from_tree, rather than a backend behind its interface:
+    events take and return Persons instead of nodes, laws are limited to
+    absolute and gender preference primogeniture, and there are no
+    ranks, subscribers or batches.
+    '''
+
+    def __init__(self, absolute, capacity=16):
+        '''(ColumnarTree, bool, int) -> NoneType
+        Create a new, empty ColumnarTree with room for capacity royals
+        before its arrays grow.
+        '''
+
+        self.absolute = absolute
+        self.size = 0
+        self.ruler = -1
+        #Parent index (-1 for the root), depth, birth order among
+        #siblings, gender code, alive and ancestor_of_ruler bitmaps
+        self.parent = numpy.empty(capacity, numpy.int64)
+        self.depth = numpy.empty(capacity, numpy.int64)
+        self.birth = numpy.empty(capacity, numpy.int64)
+        self.gender = numpy.empty(capacity, numpy.int8)
+        self.alive = numpy.empty(capacity, bool)
+        self.ancestor_of_ruler = numpy.empty(capacity, bool)
+        self.royals = numpy.empty(capacity, object)
+        self.consorts = numpy.empty(capacity, object)
+        #Number of children of each royal, for birth orders
+        self.children = numpy.empty(capacity, numpy.int64)
+        #Identity index from Person to row, and gender codes
+        self.index = {}
+        self.codes = {}
+
+    @classmethod
+    def from_tree(cls, tree):
+        '''(type, FamilyTree) -> ColumnarTree
+        Return a ColumnarTree holding a copy of tree's royals, with the
+        same ruler. Later events on either tree do not affect the
+        other, except through the shared Person objects. Only absolute
+        and cognatic primogeniture are supported.
+        '''
+
+        if tree.law not in (ABSOLUTE, COGNATIC):
+            raise ValueError('unsupported law of succession %r' % tree.law)
+        columns = cls(tree.absolute, max(len(tree.nodes), 16))
+        if tree.root:
+            rows = {}
+            for node in tree.root.preorder():
+                if node.parent:
+                    parent = rows[node.parent]
+                else:
+                    parent = -1
+                i = columns.add(node.royal, parent,
+                                getattr(node, 'consort', None))
+                columns.ancestor_of_ruler[i] = node.ancestor_of_ruler
+                rows[node] = i
+            if tree.ruler in rows:
+                columns.ruler = rows[tree.ruler]
+        return columns
+
+    def add(self, royal, parent=-1, consort=None):
+        '''(ColumnarTree, Person, int, Person or NoneType) -> int
+        Add royal as the youngest child of row parent (or as the root
+        if parent is -1) and return royal's row.
+        '''
+
+        i = self.size
+        if i == len(self.parent):
+            self.grow(2 * i)
+        self.parent[i] = parent
+        if parent >= 0:
+            self.depth[i] = self.depth[parent] + 1
+            self.birth[i] = self.children[parent]
+            self.children[parent] += 1
+        else:
+            self.depth[i] = 0
+            self.birth[i] = 0
+        if royal.gender not in self.codes:
+            self.codes[royal.gender] = len(self.codes)
+        self.gender[i] = self.codes[royal.gender]
+        self.alive[i] = royal.alive
+        self.ancestor_of_ruler[i] = False
+        self.royals[i] = royal
+        self.consorts[i] = consort
+        self.children[i] = 0
+        self.index[royal] = i
+        self.size = i + 1
+        return i
+
+    def grow(self, capacity):
+        '''(ColumnarTree, int) -> NoneType
+        Enlarge every column to hold capacity royals.
+        '''
+
+        for name in ('parent', 'depth', 'birth', 'gender', 'alive',
+                     'ancestor_of_ruler', 'royals', 'consorts',
+                     'children'):
+            old = getattr(self, name)
+            new = numpy.empty(capacity, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def start(self, royal, consort):
+        '''(ColumnarTree, Person, Person) -> NoneType
+        Add the original couple of royal and consort as the root and
+        ruler of the tree.
+        '''
+
+        self.ruler = self.add(royal, -1, consort)
+
+    def search(self, person):
+        '''(ColumnarTree, Person) -> int or NoneType
+        Return the row of Person object person, or None if person is
+        not in the tree.
+        '''
+
+        return self.index.get(person)
+
+    def find_alive(self, person):
+        '''(ColumnarTree, Person) -> int
+        Return the row of person. Raise NoSuchRoyalError if person is
+        not in the tree and DeadRoyalError if person is dead.
+        '''
+
+        i = self.search(person)
+        if i is None:
+            raise NoSuchRoyalError
+        if not self.alive[i]:
+            raise DeadRoyalError
+        return i
+
+    def marry(self, royal, consort):
+        '''(ColumnarTree, Person, Person) -> NoneType
+        Record consort as royal's spouse.
+        '''
+
+        self.consorts[self.find_alive(royal)] = consort
+
+    def have_son(self, royal, name):
+        '''(ColumnarTree, Person, str) -> Person
+        Add and return a son of royal.
+        '''
+
+        i = self.find_alive(royal)
+        son = Person(name, royal.last, 'M')
+        self.add(son, i)
+        return son
+
+    def have_daughter(self, royal, name):
+        '''(ColumnarTree, Person, str) -> Person
+        Add and return a daughter of royal.
+        '''
+
+        i = self.find_alive(royal)
+        daughter = Person(name, royal.last, 'F')
+        self.add(daughter, i)
+        return daughter
+
+    def crown(self, person):
+        '''(ColumnarTree, Person) -> NoneType
+        Make person the ruler and set the ancestor_of_ruler bitmap
+        accordingly.
+        '''
+
+        ruler = self.find_alive(person)
+        #Only the old ruler's path is set, so clear just that
+        i = self.ruler
+        while i >= 0:
+            self.ancestor_of_ruler[i] = False
+            i = self.parent[i]
+        self.ruler = ruler
+        i = ruler
+        while i >= 0:
+            self.ancestor_of_ruler[i] = True
+            i = self.parent[i]
+
+    def kill(self, royal):
+        '''(ColumnarTree, Person) -> NoneType
+        Change royal's alive bit to False. The Person itself is left
+        alone, as it may be shared with the FamilyTree the tree was
+        copied from.
+        '''
+
+        i = self.search(royal)
+        if i is None:
+            raise NoSuchRoyalError
+        self.alive[i] = False
+
+    def preorder(self):
+        '''(ColumnarTree) -> tuple of (array, array)
+        Return the pre-order position of every row, with each royal's
+        children in order of succession and any ancestor of ruler
+        last, together with the size of every row's subtree.
+        '''
+
+        n = self.size
+        parent = self.parent[:n]
+        #Rows grouped by generation, and where each generation ends.
+        #Narrow depths let NumPy sort them with a radix sort
+        depth = self.depth[:n]
+        if depth.max() < 2 ** 16:
+            depth = depth.astype(numpy.uint16)
+        by_depth = numpy.argsort(depth, kind='stable')
+        ends = numpy.searchsorted(depth[by_depth],
+                                  numpy.arange(int(depth[by_depth[-1]]) + 1),
+                                  'right')
+        levels = [by_depth[ends[d - 1]:ends[d]] for d in range(1, len(ends))]
+        #Subtree sizes, added up one generation at a time from the
+        #deepest
+        size = numpy.ones(n, numpy.int64)
+        for rows in reversed(levels):
+            numpy.add.at(size, parent[rows], size[rows])
+        #Order siblings by ancestor_of_ruler, then gender preference.
+        #Siblings' rows are in birth order, which the stable sort keeps
+        key = parent * 4 + self.ancestor_of_ruler[:n] * 2
+        if not self.absolute:
+            key += self.gender[:n] != self.gender[by_depth[0]]
+        kids = numpy.argsort(key, kind='stable')[1:]
+        #Each child starts after its parent and its elder siblings'
+        #subtrees, so positions are filled in one generation at a time
+        sizes = size[kids]
+        before = numpy.cumsum(sizes) - sizes
+        parents = parent[kids]
+        first = numpy.ones(len(kids), bool)
+        first[1:] = parents[1:] != parents[:-1]
+        starts = numpy.maximum.accumulate(numpy.where(first, before, 0))
+        pre = numpy.zeros(n, numpy.int64)
+        pre[kids] = before - starts + 1
+        for rows in levels:
+            pre[rows] += pre[parent[rows]]
+        return pre, size
+
+    def line_of_succession(self):
+        '''(ColumnarTree) -> list
+        Generate line of succession for tree based on current ruler,
+        in the same order as FamilyTree.line_of_succession.
+        '''
+
+        if self.ruler < 0:
+            return []
+        pre, size = self.preorder()
+        #The ruler's whole subtree comes first, then for each ancestor
+        #its pre-order block up to the child leading to the ruler,
+        #which is ordered last among its siblings
+        starts = [pre[self.ruler]]
+        ends = [pre[self.ruler] + size[self.ruler]]
+        if self.ancestor_of_ruler[self.ruler]:
+            i = self.ruler
+            while self.parent[i] >= 0:
+                starts.append(pre[self.parent[i]])
+                ends.append(pre[i])
+                i = self.parent[i]
+        starts = numpy.array(starts)
+        lengths = numpy.array(ends) - starts
+        shift = numpy.repeat(starts - (numpy.cumsum(lengths) - lengths),
+                             lengths)
+        positions = shift + numpy.arange(lengths.sum())
+        rows = numpy.empty(self.size, numpy.int64)
+        rows[pre] = numpy.arange(self.size)
+        line = rows[positions]
+        line = line[self.alive[line]]
+        return self.royals[line].tolist()
+
+
+if __name__ == '__main__':
+    #Compare with a cold FamilyTree.line_of_succession on a large tree
+    import sys
+    import time
+    from bench_memory import build
+    tree = build(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
+    tree.crown(list(tree.nodes)[-1])
+    columns = ColumnarTree.from_tree(tree)
+    for absolute in (True, False):
+        tree.absolute = columns.absolute = absolute
+        for node in tree.nodes.values():
+            node.order = node.living = None
+        start = time.perf_counter()
+        line = tree.ruler.line_of_succession()
+        nodes = time.perf_counter() - start
+        start = time.perf_counter()
+        same = columns.line_of_succession()
+        arrays = time.perf_counter() - start
+        print('absolute=%s: RoyalNode %.3fs, ColumnarTree %.3fs (%.1fx), '
+              'same line: %s' % (absolute, nodes, arrays, nodes / arrays,
+                                 same == line))
@@ -0,0 +1,54 @@
+import random
+from royals import *
+
+FIRST_NAMES = {'M': ('Zeus', 'Dionysus', 'Hercules', 'Apollo', 'Ares'),
+               'F': ('Aphrodite', 'Artemis', 'Athena', 'Hera', 'Demeter')}
+
+
+def generate(n, seed=0, depth=None, branching=3, sons=0.5, deaths=0.1,
+             marriages=0.7, absolute=True, law=None):
+    '''(int, int, int or NoneType, float, float, float, float, bool,
+    SuccessionLaw or NoneType) -> FamilyTree
+    Build and return a random FamilyTree of n royals, or fewer if the
+    dynasty dies out or reaches depth generations first. Each married
+    royal has on average branching children, each of whom is a son with
+    probability sons and marries with probability marriages. Once the
+    tree is built each royal but the ruler dies with probability
+    deaths. The tree is under law, or as FamilyTree(absolute) if law is
+    None. The same arguments always give the same tree.
+    '''
+
+    rnd = random.Random(seed)
+    tree = FamilyTree(absolute, law)
+    root = CoupleNode(Person('Sarah', 'Gibeau', 'F'),
+                      Person('Mr', 'Gibeau', 'M'), tree)
+    tree.start(root)
+    count = 1
+    #Couples waiting to have children, with their generation
+    couples = [(root, 1)]
+    i = 0
+    while count < n and i < len(couples):
+        couple, generation = couples[i]
+        i += 1
+        if depth is not None and generation >= depth:
+            continue
+        #Between none and twice branching children, so that the
+        #dynasty keeps going with one child left to the last couple
+        children = rnd.randint(0, int(2 * branching))
+        if i == len(couples):
+            children = max(children, 1)
+        for j in range(min(children, n - count)):
+            if rnd.random() < sons:
+                child = couple.have_son(rnd.choice(FIRST_NAMES['M']))
+            else:
+                child = couple.have_daughter(rnd.choice(FIRST_NAMES['F']))
+            count += 1
+            if rnd.random() < marriages or i == len(couples):
+                gender = 'F' if child.royal.gender == 'M' else 'M'
+                consort = Person(rnd.choice(FIRST_NAMES[gender]), 'Consort',
+                                 gender)
+                couples.append((child.marry(consort), generation + 1))
+    for person in list(tree.nodes):
+        if rnd.random() < deaths and person is not tree.ruler.royal:
+            tree.kill(person)
+    return tree
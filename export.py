@@ -0,0 +1,80 @@
+import json
+from royals import *
+
+
+def records(tree, max_depth=None):
+    '''(FamilyTree, int or NoneType) -> generator
+    Yield a record for each royal in tree in pre-order, as read back by
+    FamilyTree.from_records, leaving out royals deeper than max_depth.
+    Ids are numbers in pre-order, so only the ids of the current node's
+    ancestors are kept while walking the tree.
+    '''
+
+    if not tree.root:
+        return
+    #Id of the node at each depth on the path to the current node
+    path = []
+    for number, (node, depth) in enumerate(tree.root.walk(max_depth)):
+        del path[depth - 1:]
+        path.append(number)
+        royal = node.royal
+        record = {'id': number, 'parent': path[-2] if depth > 1 else None,
+                  'first': royal.first, 'last': royal.last,
+                  'gender': royal.gender, 'alive': royal.alive}
+        consort = getattr(node, 'consort', None)
+        if consort:
+            record['consort_first'] = consort.first
+            record['consort_last'] = consort.last
+            record['consort_gender'] = consort.gender
+        yield record
+
+
+def write_jsonl(tree, out, limit=None, max_depth=None):
+    '''(FamilyTree, file, int or NoneType, int or NoneType) -> int
+    Write tree to out as JSON Lines, one record per royal as read back
+    by FamilyTree.from_records, stopping after limit records and leaving
+    out royals deeper than max_depth. Return the number of records.
+    '''
+
+    return write_lines(out, (json.dumps(record) + '\n'
+                             for record in records(tree, max_depth)), limit)
+
+
+def dot_label(node):
+    '''(RoyalNode) -> str
+    Return node's label in the DOT language, quoted.
+    '''
+
+    return '"' + str(node).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def dot_lines(tree, max_depth=None):
+    '''(FamilyTree, int or NoneType) -> generator
+    Yield the lines of a Graphviz DOT graph of tree.
+    '''
+
+    yield 'digraph family {\n'
+    if tree.root:
+        path = []
+        for number, (node, depth) in enumerate(tree.root.walk(max_depth)):
+            del path[depth - 1:]
+            path.append(number)
+            #The dead are dashed and the ruler bold
+            style = ''
+            if not node.royal.alive:
+                style = ', style=dashed'
+            elif node is tree.ruler:
+                style = ', style=bold'
+            yield '  n%d [label=%s%s];\n' % (number, dot_label(node), style)
+            if depth > 1:
+                yield '  n%d -> n%d;\n' % (path[-2], number)
+    yield '}\n'
+
+
+def write_dot(tree, out, max_depth=None):
+    '''(FamilyTree, file, int or NoneType) -> int
+    Write tree to out as a Graphviz DOT graph, leaving out royals deeper
+    than max_depth. Return the number of lines written.
+    '''
+
+    return write_lines(out, dot_lines(tree, max_depth))
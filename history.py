@@ -0,0 +1,312 @@
+from royals import *
+
+
+class PersistentNode:
+    '''A node of one version of a History. Nodes are never changed once
+    made, so versions share every node that an event did not touch.
+    '''
+
+    __slots__ = ('royal', 'consort', 'alive', 'children', 'living')
+
+    def __init__(self, royal, consort, alive, children, living):
+        '''(PersistentNode, Person, Person or NoneType, bool, tuple, int)
+        -> NoneType
+        Create a new PersistentNode for royal, married to consort, with
+        children children and living royals in its subtree.
+        '''
+
+        self.royal = royal
+        self.consort = consort
+        self.alive = alive
+        self.children = children
+        self.living = living
+
+    def __str__(self):
+        '''(PersistentNode) -> str
+        Return a str representation of node.
+        '''
+
+        s = str(self.royal) + ' (' + self.royal.gender + ')'
+        if self.consort:
+            s += ' and ' + str(self.consort)
+        return s
+
+    def __repr__(self):
+        '''(PersistentNode) -> str
+        Return a str representation of node.
+        '''
+
+        return str(self)
+
+
+class Version:
+    '''The state of a History's tree after a given number of events.'''
+
+    __slots__ = ('history', 'number', 'root', 'ruler')
+
+    def __init__(self, history, number, root, ruler):
+        '''(Version, History, int, PersistentNode or NoneType, Person or
+        NoneType) -> NoneType
+        Create a new Version of history after number events, with root
+        root and ruler ruler.
+        '''
+
+        self.history = history
+        self.number = number
+        self.root = root
+        self.ruler = ruler
+
+    def path(self, person):
+        '''(Version, Person) -> tuple of (list, list)
+        Return the nodes from the root down to person's node, and the
+        position of each below the root among its siblings. Raise
+        NoSuchRoyalError if person is not in this version.
+        '''
+
+        places = self.history.places
+        if person not in places or places[person][2] > self.number:
+            raise NoSuchRoyalError
+        #Positions never change once born, so climb the Persons
+        positions = []
+        parent, position, born = places[person]
+        while parent:
+            positions.append(position)
+            parent, position, born = places[parent]
+        nodes = [self.root]
+        for position in reversed(positions):
+            nodes.append(nodes[-1].children[position])
+        positions.reverse()
+        return nodes, positions
+
+    def search(self, person):
+        '''(Version, Person) -> PersistentNode or NoneType
+        Return person's node in this version, or None if person was not
+        born yet.
+        '''
+
+        try:
+            return self.path(person)[0][-1]
+        except NoSuchRoyalError:
+            return None
+
+    def heirs(self, node, skip=None):
+        '''(Version, PersistentNode, PersistentNode or NoneType) -> list
+        Return node's children other than skip in order of succession,
+        leaving out children with nobody alive in their subtrees.
+        '''
+
+        if self.history.absolute:
+            return [i for i in node.children if i is not skip and i.living]
+        #Preferred gender is that of the royal in the original couple
+        gender = self.root.royal.gender
+        order = []
+        n = []
+        for i in node.children:
+            if i is not skip and i.living:
+                if i.royal.gender == gender:
+                    order.append(i)
+                else:
+                    n.append(i)
+        order.extend(n)
+        return order
+
+    def iter_succession(self):
+        '''(Version) -> generator
+        Yield the line of succession of this version one royal at a
+        time, in the same order as FamilyTree.line_of_succession.
+        '''
+
+        if not self.ruler:
+            return
+        nodes = self.path(self.ruler)[0]
+        #The ruler's subtree, then each ancestor's, without the child
+        #leading to the ruler
+        skip = None
+        for node in reversed(nodes):
+            if node.alive:
+                yield node.royal
+            stack = self.heirs(node, skip)
+            stack.reverse()
+            while stack:
+                i = stack.pop()
+                if i.alive:
+                    yield i.royal
+                heirs = self.heirs(i)
+                heirs.reverse()
+                stack.extend(heirs)
+            skip = node
+
+    def line_of_succession(self):
+        '''(Version) -> list
+        Return the line of succession of this version.
+        '''
+
+        return list(self.iter_succession())
+
+
+class History:
+    '''A royal family tree that keeps every past version. Each event
+    copies only the nodes on the path from the royal it concerns up to
+    the root and shares the rest with the version before, so a version
+    costs memory in proportion to the depth of the tree, and searching
+    or finding the line of succession of an old version takes as long as
+    of the current one.
+    '''
+
+    def __init__(self, absolute):
+        '''(History, bool) -> NoneType
+        Create a new History with only the empty version 0.
+        '''
+
+        self.absolute = absolute
+        self.versions = [Version(self, 0, None, None)]
+        #Parent, position among siblings and version of birth of every
+        #royal ever born
+        self.places = {}
+
+    @classmethod
+    def from_tree(cls, tree):
+        '''(type, FamilyTree) -> History
+        Return a History whose version 1 is a copy of tree's current
+        state. Only absolute and cognatic primogeniture are supported.
+        '''
+
+        if tree.law not in (ABSOLUTE, COGNATIC):
+            raise ValueError('unsupported law of succession %r' % tree.law)
+        history = cls(tree.absolute)
+        if tree.root:
+            made = {}
+            for node in tree.root.postorder():
+                children = tuple(made.pop(i) for i in node.children)
+                for position, i in enumerate(node.children):
+                    history.places[i.royal] = (node.royal, position, 1)
+                made[node] = PersistentNode(
+                    node.royal, getattr(node, 'consort', None),
+                    node.royal.alive, children or NO_CHILDREN,
+                    node.royal.alive + sum(i.living for i in children))
+            history.places[tree.root.royal] = (None, 0, 1)
+            history.versions.append(Version(history, 1, made[tree.root],
+                                             tree.ruler.royal))
+        return history
+
+    def current(self):
+        '''(History) -> Version
+        Return the latest version.
+        '''
+
+        return self.versions[-1]
+
+    def at(self, number):
+        '''(History, int) -> Version
+        Return the version after number events.
+        '''
+
+        return self.versions[number]
+
+    def commit(self, root, ruler):
+        '''(History, PersistentNode, Person) -> Version
+        Add and return a new version with root root and ruler ruler.
+        '''
+
+        version = Version(self, len(self.versions), root, ruler)
+        self.versions.append(version)
+        return version
+
+    def update(self, person, change, alive=True):
+        '''(History, Person, function, bool) -> Version
+        Add and return a new version in which person's node is replaced
+        by change(node), which returns the new node and the change in
+        the number of living royals. If alive, person must be alive.
+        '''
+
+        version = self.current()
+        nodes, positions = version.path(person)
+        node = nodes.pop()
+        if alive and not node.alive:
+            raise DeadRoyalError
+        node, delta = change(node)
+        #Copy the path above the changed node
+        while nodes:
+            parent = nodes.pop()
+            position = positions.pop()
+            children = parent.children[:position] + (node,) + \
+                       parent.children[position + 1:]
+            node = PersistentNode(parent.royal, parent.consort, parent.alive,
+                                  children, parent.living + delta)
+        return self.commit(node, version.ruler)
+
+    def start(self, royal, consort=None):
+        '''(History, Person, Person or NoneType) -> Version
+        Add the original couple of royal and consort as the root and
+        ruler of the tree.
+        '''
+
+        self.places[royal] = (None, 0, len(self.versions))
+        return self.commit(PersistentNode(royal, consort, royal.alive,
+                                          NO_CHILDREN, int(royal.alive)),
+                           royal)
+
+    def have_child(self, royal, child):
+        '''(History, Person, Person) -> Version
+        Add child as royal's youngest child.
+        '''
+
+        def change(node):
+            self.places[child] = (royal, len(node.children),
+                                  len(self.versions))
+            leaf = PersistentNode(child, None, True, NO_CHILDREN, 1)
+            return PersistentNode(node.royal, node.consort, node.alive,
+                                  node.children + (leaf,),
+                                  node.living + 1), 1
+
+        return self.update(royal, change)
+
+    def have_son(self, royal, name):
+        '''(History, Person, str) -> Person
+        Add and return a son of royal.
+        '''
+
+        son = Person(name, royal.last, 'M')
+        self.have_child(royal, son)
+        return son
+
+    def have_daughter(self, royal, name):
+        '''(History, Person, str) -> Person
+        Add and return a daughter of royal.
+        '''
+
+        daughter = Person(name, royal.last, 'F')
+        self.have_child(royal, daughter)
+        return daughter
+
+    def marry(self, royal, consort):
+        '''(History, Person, Person) -> Version
+        Record consort as royal's spouse.
+        '''
+
+        return self.update(royal, lambda node: (PersistentNode(
+            node.royal, consort, node.alive, node.children, node.living), 0))
+
+    def kill(self, royal):
+        '''(History, Person) -> Version
+        Record royal's death.
+        '''
+
+        def change(node):
+            delta = -1 if node.alive else 0
+            return PersistentNode(node.royal, node.consort, False,
+                                  node.children, node.living + delta), delta
+
+        #Only the new version's node records the death, as earlier
+        #versions and any tree the history came from share royal
+        return self.update(royal, change, False)
+
+    def crown(self, person):
+        '''(History, Person) -> Version
+        Make person the ruler.
+        '''
+
+        version = self.current()
+        if not version.path(person)[0][-1].alive:
+            raise DeadRoyalError
+        return self.commit(version.root, person)
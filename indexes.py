@@ -0,0 +1,117 @@
+from bisect import bisect_left, insort
+
+
+class PersonIndex:
+    '''Secondary indexes of the royals and consorts of a FamilyTree by
+    first name, last name, gender and whether they are alive, kept up to
+    date by the tree's events. Each index maps a value to a dict used as
+    an ordered set of the Persons with that value.
+    '''
+
+    def __init__(self, tree):
+        '''(PersonIndex, FamilyTree) -> NoneType
+        Index every royal and consort in tree.
+        '''
+
+        self.first = {}
+        self.last = {}
+        self.gender = {}
+        self.alive = {True: {}, False: {}}
+        #Sorted distinct names, for prefix lookups
+        self.firsts = []
+        self.lasts = []
+        #Times each Person is indexed, as a royal can also be a consort
+        self.counts = {}
+        if tree.root:
+            for node in tree.root.preorder():
+                self.add(node.royal)
+                consort = getattr(node, 'consort', None)
+                if consort:
+                    self.add(consort)
+
+    def add(self, person):
+        '''(PersonIndex, Person) -> NoneType
+        Index person.
+        '''
+
+        self.counts[person] = self.counts.get(person, 0) + 1
+        if self.counts[person] > 1:
+            return
+        for index, names, value in ((self.first, self.firsts, person.first),
+                                    (self.last, self.lasts, person.last),
+                                    (self.gender, None, person.gender)):
+            if value not in index:
+                index[value] = {}
+                if names is not None:
+                    insort(names, value)
+            index[value][person] = None
+        self.alive[bool(person.alive)][person] = None
+
+    def remove(self, person):
+        '''(PersonIndex, Person) -> NoneType
+        Stop indexing person.
+        '''
+
+        self.counts[person] -= 1
+        if self.counts[person]:
+            return
+        del self.counts[person]
+        for index, names, value in ((self.first, self.firsts, person.first),
+                                    (self.last, self.lasts, person.last),
+                                    (self.gender, None, person.gender)):
+            people = index[value]
+            del people[person]
+            if not people:
+                del index[value]
+                if names is not None:
+                    del names[bisect_left(names, value)]
+        del self.alive[bool(person.alive)][person]
+
+    def set_alive(self, person, alive):
+        '''(PersonIndex, Person, bool) -> NoneType
+        Move person to the living or the dead, before person's alive
+        attribute is changed.
+        '''
+
+        del self.alive[bool(person.alive)][person]
+        self.alive[alive][person] = None
+
+    def matching(self, index, names, value, prefix):
+        '''(PersonIndex, dict, list, str or NoneType, str or NoneType)
+        -> dict or NoneType
+        Return the Persons in index with name value or a name starting
+        with prefix, or None if neither is given.
+        '''
+
+        if value is not None:
+            return index.get(value, {})
+        if prefix is None:
+            return None
+        people = {}
+        i = bisect_left(names, prefix)
+        while i < len(names) and names[i].startswith(prefix):
+            people.update(index[names[i]])
+            i += 1
+        return people
+
+    def find(self, first=None, last=None, gender=None, alive=None,
+             first_prefix=None, last_prefix=None):
+        '''(PersonIndex, str, str, str, bool, str, str) -> list
+        Return the Persons with every attribute given.
+        '''
+
+        sets = [self.matching(self.first, self.firsts, first, first_prefix),
+                self.matching(self.last, self.lasts, last, last_prefix)]
+        if gender is not None:
+            sets.append(self.gender.get(gender, {}))
+        if alive is not None:
+            sets.append(self.alive[bool(alive)])
+        sets = [people for people in sets if people is not None]
+        if not sets:
+            #Everyone, in the order they were indexed
+            sets = [self.alive[True], self.alive[False]]
+            return list(sets[0]) + list(sets[1])
+        #Check the fewest Persons against the other sets
+        sets.sort(key=len)
+        return [person for person in sets[0]
+                if all(person in people for people in sets[1:])]
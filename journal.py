@@ -0,0 +1,254 @@
+import json
+import os
+from royals import *
+
+
+class Journal:
+    '''An append-only journal of the events on a FamilyTree, with
+    periodic checkpoints of the whole tree, from which the tree can be
+    recovered after a crash.
+
+    The journal file holds one JSON list per event: its sequence
+    number, its kind and the journal ids of the royals involved
+    followed by its other arguments. Events are buffered and written in
+    groups. Every so many events the tree is written to a checkpoint
+    file in the records format of FamilyTree.from_records, and the
+    journal starts again empty.
+    '''
+
+    def __init__(self, tree, path, group=100, every=10000, sync=False,
+                 people=(), sequence=0):
+        '''(Journal, FamilyTree, str, int, int, bool, list, int)
+        -> NoneType
+        Start journaling tree's events to the file at path, with
+        checkpoints in path + '.checkpoint'. Events are written every
+        group events and checkpointed every every events; if sync is
+        true, each write is also synced to disk. A recovered journal
+        goes on from people, the royal of each journal id given out, and
+        sequence, the last sequence number.
+        '''
+
+        self.tree = tree
+        self.path = path
+        self.group = group
+        self.every = every
+        self.sync = sync
+        #Journal id of each royal, and royal of each id
+        self.people = list(people)
+        self.ids = dict((person, i) for i, person in enumerate(people))
+        #Events not yet written, the last sequence number given out and
+        #the sequence number of the last checkpoint
+        self.pending = []
+        self.sequence = sequence
+        self.checkpointed = sequence
+        self.file = None
+        tree.journal = self
+        self.checkpoint()
+
+    def identify(self, person):
+        '''(Journal, Person) -> int
+        Return person's journal id, giving person the next one if they
+        have none.
+        '''
+
+        if person not in self.ids:
+            self.ids[person] = len(self.people)
+            self.people.append(person)
+        return self.ids[person]
+
+    def record(self, kind, args):
+        '''(Journal, str, tuple) -> NoneType
+        Buffer an event of kind kind with arguments args, as logged by
+        FamilyTree.log.
+        '''
+
+        self.sequence += 1
+        if kind == 'start':
+            royal, consort = args
+            event = [self.sequence, kind, self.identify(royal)] + \
+                    fields(royal) + fields(consort)
+        elif kind in ('have_son', 'have_daughter'):
+            parent, child = args
+            event = [self.sequence, kind, self.ids[parent],
+                     self.identify(child), child.first]
+        elif kind == 'marry':
+            royal, consort = args
+            event = [self.sequence, kind, self.ids[royal]] + fields(consort)
+        elif kind == 'law':
+            event = [self.sequence, kind, LAWS.index(args[0])]
+        else:
+            event = [self.sequence, kind, self.ids[args[0]]]
+        self.pending.append(event)
+        #Events in a batch wait for it to succeed
+        if len(self.pending) >= self.group and self.tree.undo is None:
+            self.flush()
+
+    def mark(self):
+        '''(Journal) -> tuple
+        Return the journal's position, for discard.
+        '''
+
+        return (len(self.pending), len(self.people), self.sequence)
+
+    def discard(self, mark):
+        '''(Journal, tuple) -> NoneType
+        Drop the events buffered since mark was taken, as when a batch
+        rolls back.
+        '''
+
+        pending, people, self.sequence = mark
+        del self.pending[pending:]
+        for person in self.people[people:]:
+            del self.ids[person]
+        del self.people[people:]
+
+    def flush(self):
+        '''(Journal) -> NoneType
+        Write the buffered events to the journal file, and checkpoint
+        if enough events have been journaled since the last one.
+        '''
+
+        if self.pending:
+            if not self.file:
+                self.file = open(self.path, 'a')
+            self.file.write(''.join(json.dumps(event) + '\n'
+                                    for event in self.pending))
+            self.file.flush()
+            if self.sync:
+                os.fsync(self.file.fileno())
+            self.pending = []
+        if self.sequence - self.checkpointed >= self.every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        '''(Journal) -> NoneType
+        Write the whole tree to the checkpoint file and empty the
+        journal.
+        '''
+
+        tree = self.tree
+        self.pending = []
+        path = self.path + '.checkpoint'
+        with open(path + '.new', 'w') as f:
+            f.write(json.dumps({'law': LAWS.index(tree.law),
+                                'sequence': self.sequence,
+                                'ruler': self.ruler_id(),
+                                'crowned': bool(tree.ruler and
+                                                tree.ruler.ancestor_of_ruler)})
+                    + '\n')
+            if tree.root:
+                for node in tree.root.preorder():
+                    record = {'id': self.identify(node.royal),
+                              'first': node.royal.first,
+                              'last': node.royal.last,
+                              'gender': node.royal.gender,
+                              'alive': node.royal.alive}
+                    if node.parent:
+                        record['parent'] = self.ids[node.parent.royal]
+                    consort = getattr(node, 'consort', None)
+                    if consort:
+                        record['consort_first'] = consort.first
+                        record['consort_last'] = consort.last
+                        record['consort_gender'] = consort.gender
+                    f.write(json.dumps(record) + '\n')
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        #Replace the checkpoint in one step, then start a new journal;
+        #a crash in between leaves only events the checkpoint covers
+        os.replace(path + '.new', path)
+        if self.file:
+            self.file.close()
+        self.file = open(self.path, 'w')
+        self.checkpointed = self.sequence
+
+    def ruler_id(self):
+        '''(Journal) -> int or NoneType
+        Return the journal id of the tree's ruler.
+        '''
+
+        if self.tree.ruler:
+            return self.identify(self.tree.ruler.royal)
+
+    def close(self):
+        '''(Journal) -> NoneType
+        Write any buffered events and stop journaling.
+        '''
+
+        self.flush()
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.tree.journal = None
+
+    @classmethod
+    def recover(cls, path, group=100, every=10000, sync=False):
+        '''(type, str, int, int, bool) -> FamilyTree
+        Rebuild the tree journaled to path from its last checkpoint and
+        the events journaled since, and return it with a new Journal
+        attached. A partly written last event is ignored.
+        '''
+
+        with open(path + '.checkpoint') as f:
+            header = json.loads(f.readline())
+            records = [json.loads(line) for line in f]
+        tree = FamilyTree.from_records(records, False,
+                                       LAWS[header['law']])
+        #Records were written in pre-order, so they match the nodes
+        people = [None] * len(records)
+        if tree.root:
+            for node, record in zip(tree.root.preorder(), records):
+                people[record['id']] = node.royal
+        if header['ruler'] is not None:
+            #The ruler may since have died, so is not crowned again
+            tree.ruler = tree.search(people[header['ruler']])
+            if header['crowned']:
+                tree.move_crown(None, tree.ruler)
+        events = []
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        break
+        for event in events:
+            if event[0] > header['sequence']:
+                replay(tree, people, event[1], event[2:])
+        cls(tree, path, group, every, sync, people,
+            max([header['sequence']] + [event[0] for event in events]))
+        return tree
+
+
+def fields(person):
+    '''(Person or NoneType) -> list
+    Return the first name, last name and gender of person, or Nones.
+    '''
+
+    if person is None:
+        return [None, None, None]
+    return [person.first, person.last, person.gender]
+
+
+def replay(tree, people, kind, args):
+    '''(FamilyTree, list, str, list) -> NoneType
+    Apply a journaled event of kind kind with arguments args to tree,
+    where people holds the royal of each journal id.
+    '''
+
+    if kind == 'start':
+        royal = Person(*args[1:4])
+        people.append(royal)
+        if args[4] is None:
+            tree.start(RoyalNode(royal, tree))
+        else:
+            tree.start(CoupleNode(royal, Person(*args[4:7]), tree))
+    elif kind in ('have_son', 'have_daughter'):
+        node = getattr(tree.search(people[args[0]]), kind)(args[2])
+        people.append(node.royal)
+    elif kind == 'marry':
+        tree.search(people[args[0]]).marry(Person(*args[1:4]))
+    elif kind == 'law':
+        tree.set_law(LAWS[args[0]])
+    else:
+        getattr(tree, kind)(people[args[0]])
@@ -0,0 +1,97 @@
+class AncestorIndex:
+    '''The depth of each royal of a FamilyTree and its ancestors 1, 2, 4,
+    8, ... generations up, for answering relationship queries by binary
+    lifting in O(log n). Royals are indexed rather than nodes, so the
+    index stays valid when marriages replace nodes, and births are added
+    by the tree's events.
+    '''
+
+    def __init__(self, tree):
+        '''(AncestorIndex, FamilyTree) -> NoneType
+        Index every royal in tree.
+        '''
+
+        #Depth of each royal, where the original royal has a depth of 1,
+        #and its ancestors 2 ** i generations up for each i
+        self.depth = {}
+        self.jumps = {}
+        if tree.root:
+            for node in tree.root.preorder():
+                self.add(node.royal,
+                         node.parent.royal if node.parent else None)
+
+    def add(self, royal, parent):
+        '''(AncestorIndex, Person, Person or NoneType) -> NoneType
+        Index royal, the child of parent, whose ancestors are indexed.
+        '''
+
+        if parent is None:
+            self.depth[royal] = 1
+            self.jumps[royal] = []
+            return
+        self.depth[royal] = self.depth[parent] + 1
+        jumps = [parent]
+        #The ancestor 2 ** i generations up is the one 2 ** (i - 1) up
+        #from the one 2 ** (i - 1) up
+        while len(self.jumps[jumps[-1]]) >= len(jumps):
+            jumps.append(self.jumps[jumps[-1]][len(jumps) - 1])
+        self.jumps[royal] = jumps
+
+    def remove(self, royal):
+        '''(AncestorIndex, Person) -> NoneType
+        Stop indexing royal, who has no descendants.
+        '''
+
+        del self.depth[royal]
+        del self.jumps[royal]
+
+    def ancestor(self, royal, generations):
+        '''(AncestorIndex, Person, int) -> Person
+        Return royal's ancestor generations generations up, where
+        generations is at most royal's depth less one.
+        '''
+
+        i = 0
+        while generations:
+            if generations & 1:
+                royal = self.jumps[royal][i]
+            generations >>= 1
+            i += 1
+        return royal
+
+    def lca(self, a, b):
+        '''(AncestorIndex, Person, Person) -> Person
+        Return the closest common ancestor of a and b, which is a or b
+        if one is an ancestor of the other.
+        '''
+
+        if self.depth[a] < self.depth[b]:
+            a, b = b, a
+        a = self.ancestor(a, self.depth[a] - self.depth[b])
+        if a is b:
+            return a
+        #Royals of the same depth have as many jumps, so take the
+        #longest jumps that keep a and b apart
+        for i in range(len(self.jumps[a]) - 1, -1, -1):
+            if i < len(self.jumps[a]) and \
+               self.jumps[a][i] is not self.jumps[b][i]:
+                a = self.jumps[a][i]
+                b = self.jumps[b][i]
+        return self.jumps[a][0]
+
+    def kinship(self, a, b):
+        '''(AncestorIndex, Person, Person) -> tuple of (int, int)
+        Return the generations up from a to the closest common ancestor
+        of a and b, and the generations down from it to b.
+        '''
+
+        depth = self.depth[self.lca(a, b)]
+        return (self.depth[a] - depth, self.depth[b] - depth)
+
+    def is_descendant(self, a, b):
+        '''(AncestorIndex, Person, Person) -> bool
+        Return whether a is a descendant of b.
+        '''
+
+        generations = self.depth[a] - self.depth[b]
+        return generations > 0 and self.ancestor(a, generations) is b
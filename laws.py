@@ -0,0 +1,53 @@
+class SuccessionLaw:
+    '''A law of succession, which orders each royal's children by a rank
+    given to each gender and then by age. Genders are ranked relative to
+    the royal of the original couple, whose gender is preferred.
+    '''
+
+    def __init__(self, name, preferred, other, fallback=None):
+        '''(SuccessionLaw, str, int, int or NoneType, SuccessionLaw or
+        NoneType) -> NoneType
+        Create a new law named name, ranking children of the preferred
+        gender preferred and others other, or leaving them out of the
+        line if other is None. If fallback is given, the royals left
+        out follow the line under this law in the order of the line
+        under fallback.
+        '''
+
+        self.name = name
+        self.preferred = preferred
+        self.other = other
+        self.fallback = fallback
+
+    def __repr__(self):
+        '''(SuccessionLaw) -> str
+        Return a str representation of law.
+        '''
+
+        return 'SuccessionLaw(%r)' % self.name
+
+    def compile(self, gender):
+        '''(SuccessionLaw, str) -> tuple of (dict, int or NoneType, bool)
+        Return the ranks of this law for an original royal of gender
+        gender: a dict of the ranks of genders, the rank of any other
+        gender, and whether ranks ever differ, so that children must be
+        sorted by them.
+        '''
+
+        return ({gender: self.preferred}, self.other,
+                self.other is not None and self.other != self.preferred)
+
+
+#Absolute primogeniture: children in order of age
+ABSOLUTE = SuccessionLaw('absolute', 0, 0)
+#Gender-preference (cognatic) primogeniture: children of the original
+#royal's gender first, then the others, each in order of age
+COGNATIC = SuccessionLaw('cognatic', 0, 1)
+#Agnatic (Salic) primogeniture: only through the original royal's gender
+AGNATIC = SuccessionLaw('agnatic', 0, None)
+#Semi-Salic primogeniture: the agnatic line, then the others as under
+#cognatic primogeniture
+SEMI_SALIC = SuccessionLaw('semi-salic', 0, None, COGNATIC)
+#Every law, numbered as in snapshot files, where 0 and 1 were once the
+#absolute flag
+LAWS = (COGNATIC, ABSOLUTE, AGNATIC, SEMI_SALIC)
@@ -0,0 +1,101 @@
+from array import array
+from royals import *
+
+#Version of the state written by tree_state
+VERSION = 1
+#Row of a missing consort or ruler
+NONE = -1
+
+
+def tree_state(tree):
+    '''(FamilyTree) -> dict
+    Return the state of tree as flat tables, for pickling without
+    recursing through its nodes: one row per node in pre-order with the
+    row of its parent and the numbers of its royal and consort, one row
+    per distinct Person with the numbers of its strings, and each
+    distinct string once. Memos and indexes are left out and rebuilt on
+    use, as are the journal, profile and subscribers.
+    '''
+
+    if tree.undo is not None:
+        raise ValueError('cannot pickle a tree in the middle of a batch')
+    parents = array('i')
+    royals = array('i')
+    consorts = array('i')
+    columns = {'first': array('i'), 'last': array('i'),
+               'gender': array('i'), 'alive': array('b')}
+    strings = {}
+    people = {}
+    rows = {}
+    ruler = NONE
+
+    def person(p):
+        if p not in people:
+            people[p] = len(people)
+            for name in ('first', 'last', 'gender'):
+                s = getattr(p, name)
+                if s not in strings:
+                    strings[s] = len(strings)
+                columns[name].append(strings[s])
+            columns['alive'].append(1 if p.alive else 0)
+        return people[p]
+
+    if tree.root:
+        for node in tree.root.preorder():
+            rows[node] = len(rows)
+            parents.append(rows[node.parent] if node.parent else NONE)
+            royals.append(person(node.royal))
+            consort = getattr(node, 'consort', None)
+            consorts.append(person(consort) if consort else NONE)
+            if node is tree.ruler:
+                ruler = rows[node]
+    #Laws of this module are pickled by number, so that they stay the
+    #same objects when loaded
+    law = LAWS.index(tree.law) if tree.law in LAWS else tree.law
+    return {'version': VERSION, 'law': law, 'strings': list(strings),
+            'parents': parents, 'royals': royals, 'consorts': consorts,
+            'people': columns, 'ruler': ruler,
+            #Whether the ruler was crowned, and so marks its path to the
+            #root, rather than just set by start
+            'crowned': bool(tree.ruler and tree.ruler.ancestor_of_ruler),
+            'rejected': tree.rejected}
+
+
+def set_tree_state(tree, state):
+    '''(FamilyTree, dict) -> NoneType
+    Rebuild tree from state, as returned by tree_state, in one pass over
+    its rows.
+    '''
+
+    if state['version'] != VERSION:
+        raise ValueError('unsupported state version %r' % state['version'])
+    law = state['law']
+    FamilyTree.__init__(tree, True, LAWS[law] if isinstance(law, int)
+                        else law)
+    strings = state['strings']
+    columns = state['people']
+    people = [Person(strings[first], strings[last], strings[gender],
+                     bool(alive))
+              for first, last, gender, alive
+              in zip(columns['first'], columns['last'], columns['gender'],
+                     columns['alive'])]
+    nodes = []
+    for parent, royal, consort in zip(state['parents'], state['royals'],
+                                      state['consorts']):
+        if consort == NONE:
+            node = RoyalNode(people[royal], tree)
+        else:
+            node = CoupleNode(people[royal], people[consort], tree)
+        if parent != NONE:
+            #Parents come before their children, in order of birth
+            node.parent = nodes[parent]
+            nodes[parent].add_child_node(node)
+        tree.register(node)
+        nodes.append(node)
+    if nodes:
+        tree.root = nodes[0]
+    if state['ruler'] != NONE:
+        tree.ruler = nodes[state['ruler']]
+        if state['crowned']:
+            tree.ruler.set_ancestors()
+    tree.rejected = state['rejected']
@@ -0,0 +1,242 @@
+import time
+import weakref
+from contextlib import contextmanager
+from royals import *
+
+#Public operations timed while profiling, by class
+OPERATIONS = ((FamilyTree, ('start', 'search', 'crown', 'kill',
+                            'line_of_succession', 'iter_succession',
+                            'heir_at', 'rank_of', 'heirs', 'apply',
+                            'succession_for_rulers', 'set_law', 'find',
+                            'lca', 'kinship', 'is_descendant', 'render',
+                            'export_jsonl', 'export_dot',
+                            'save_snapshot')),
+              (RoyalNode, ('marry', 'search', 'search_helper',
+                           'line_of_succession', 'reset_descendants')),
+              (CoupleNode, ('have_son', 'have_daughter')))
+#Context managers timed from entering to leaving their with blocks
+CONTEXTS = (FamilyTree, ('batch',))
+#Traversals whose nodes are counted as visited while profiling
+TRAVERSALS = (Node, ('preorder', 'postorder', 'levelorder', 'walk'))
+#Original methods while any tree is profiled, and how many trees are
+ORIGINALS = {}
+profiled = 0
+
+
+class Profile:
+    '''Call counts, wall time and nodes visited for each public operation
+    on a FamilyTree. Times and visits of an operation include those of
+    any operations it calls.
+    '''
+
+    def __init__(self):
+        '''(Profile) -> NoneType
+        Create a new, empty Profile.
+        '''
+
+        #Calls, seconds, nodes visited and duration histogram of each
+        #operation, and nodes visited so far
+        self.stats = {}
+        self.visited = 0
+        #Finalizer that stops profiling once the tree is dropped, if it
+        #is not disabled first
+        self.release = None
+
+    def call(self, name, f, args, kwargs):
+        '''(Profile, str, function, tuple, dict) -> object
+        Call f with args and kwargs as operation name, recording it, and
+        return its result.
+        '''
+
+        visited = self.visited
+        start = time.perf_counter()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            self.add(name, time.perf_counter() - start,
+                     self.visited - visited)
+
+    def add(self, name, seconds, visited):
+        '''(Profile, str, float, int) -> NoneType
+        Record a call of operation name that took seconds and visited
+        visited nodes.
+        '''
+
+        if name not in self.stats:
+            self.stats[name] = [0, 0.0, 0, {}]
+        stats = self.stats[name]
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] += visited
+        #Durations are counted in powers of two of microseconds
+        bucket = 1 << int(seconds * 1000000).bit_length()
+        stats[3][bucket] = stats[3].get(bucket, 0) + 1
+
+    def count(self, nodes):
+        '''(Profile, iterable) -> generator
+        Yield nodes, counting each as visited.
+        '''
+
+        for node in nodes:
+            self.visited += 1
+            yield node
+
+    def snapshot(self):
+        '''(Profile) -> dict
+        Return a dict mapping each operation called to a dict of its
+        calls, total seconds and nodes visited.
+        '''
+
+        return dict((name, {'calls': calls, 'seconds': seconds,
+                            'visited': visited})
+                    for name, (calls, seconds, visited, histogram)
+                    in self.stats.items())
+
+    def histogram(self, name):
+        '''(Profile, str) -> list of tuple
+        Return the durations of operation name as (microseconds, calls)
+        pairs in increasing order, each counting the calls that took
+        less than that many microseconds and at least half as many.
+        '''
+
+        if name not in self.stats:
+            return []
+        return sorted(self.stats[name][3].items())
+
+    def reset(self):
+        '''(Profile) -> NoneType
+        Forget everything recorded so far.
+        '''
+
+        self.stats = {}
+        self.visited = 0
+
+
+def timed(cls, name, f):
+    '''(type, str, function) -> function
+    Return a method that calls f, recorded in its tree's profile as
+    cls.name if the tree is profiled.
+    '''
+
+    key = cls.__name__ + '.' + name
+    if cls is FamilyTree:
+        def method(self, *args, **kwargs):
+            if self.profile is None:
+                return f(self, *args, **kwargs)
+            return self.profile.call(key, f, (self,) + args, kwargs)
+    else:
+        def method(self, *args, **kwargs):
+            if self.tree.profile is None:
+                return f(self, *args, **kwargs)
+            return self.tree.profile.call(key, f, (self,) + args, kwargs)
+    method.__doc__ = f.__doc__
+    return method
+
+
+def timed_context(cls, name, f):
+    '''(type, str, function) -> function
+    Return a context manager method that enters f's, recorded in its
+    tree's profile as cls.name from entering to leaving the with block
+    if the tree is profiled.
+    '''
+
+    key = cls.__name__ + '.' + name
+
+    @contextmanager
+    def method(self, *args, **kwargs):
+        profile = self.profile
+        if profile is None:
+            with f(self, *args, **kwargs) as value:
+                yield value
+            return
+        visited = profile.visited
+        start = time.perf_counter()
+        try:
+            with f(self, *args, **kwargs) as value:
+                yield value
+        finally:
+            profile.add(key, time.perf_counter() - start,
+                        profile.visited - visited)
+
+    method.__doc__ = f.__doc__
+    return method
+
+
+def counted(cls, name, f):
+    '''(type, str, function) -> function
+    Return a traversal that calls f, counting the nodes it yields in
+    the profile of the node's tree if the tree is profiled.
+    '''
+
+    def method(self, *args, **kwargs):
+        nodes = f(self, *args, **kwargs)
+        profile = getattr(self.tree, 'profile', None)
+        if profile is None:
+            return nodes
+        return profile.count(nodes)
+
+    method.__doc__ = f.__doc__
+    return method
+
+
+def wrap(cls, names, wrapper):
+    '''(type, tuple, function) -> NoneType
+    Replace each method f of cls named in names by wrapper(cls, name,
+    f), remembering the original.
+    '''
+
+    for name in names:
+        f = cls.__dict__[name]
+        ORIGINALS[cls, name] = f
+        setattr(cls, name, wrapper(cls, name, f))
+
+
+def enable(tree):
+    '''(FamilyTree) -> Profile
+    Start profiling tree and return its Profile. Methods are only
+    wrapped while some tree is profiled, so that otherwise they cost
+    nothing extra; a tree dropped without being disabled stops being
+    profiled when it is collected.
+    '''
+
+    global profiled
+    if tree.profile is not None:
+        return tree.profile
+    if not profiled:
+        for cls, names in OPERATIONS:
+            wrap(cls, names, timed)
+        wrap(CONTEXTS[0], CONTEXTS[1], timed_context)
+        wrap(TRAVERSALS[0], TRAVERSALS[1], counted)
+    profiled += 1
+    tree.profile = Profile()
+    #The finalizer must not refer to the tree, or it would keep it alive
+    tree.profile.release = weakref.finalize(tree, release)
+    return tree.profile
+
+
+def release():
+    '''() -> NoneType
+    Count one tree fewer as profiled, restoring the unprofiled methods
+    once none is.
+    '''
+
+    global profiled
+    profiled -= 1
+    if not profiled:
+        for (cls, name), f in ORIGINALS.items():
+            setattr(cls, name, f)
+        ORIGINALS.clear()
+
+
+def disable(tree):
+    '''(FamilyTree) -> Profile or NoneType
+    Stop profiling tree and return what its Profile recorded.
+    '''
+
+    profile = tree.profile
+    if profile is None:
+        return None
+    tree.profile = None
+    #Calling the finalizer releases the tree now, and only once
+    profile.release()
+    return profile
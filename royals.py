@@ -1,291 +1,1535 @@
-from tree import *
-
-
-class Person:
-
-    def __init__(self, first, last, gender, alive=True):
-        '''(Person, str, str, str, bool) -> NoneType
-        Create a new Person object.
-        '''
-
-        self.first = first
-        self.last = last
-        self.gender = gender
-        self.alive = alive
-
-    def __str__(self):
-        '''(Person) -> str
-        Return a str representation of person.
-        '''
-
-        return self.first + ' ' + self.last
-
-    def __repr__(self):
-        '''(Person) -> str
-        Return a str representation of person.
-        '''
-
-        return str(self)
-
-
-class RoyalNode(Node):
-
-    def __init__(self, royal, tree):
-        '''(RoyalNode, Person, Tree) -> NoneType
-        Create a new RoyalNode object.
-        '''
-
-        Node.__init__(self, tree)
-        self.royal = royal
-        self.ancestor_of_ruler = False
-
-    def __str__(self):
-        '''(RoyalNode) -> str
-        Return a str representation of node.
-        '''
-
-        return str(self.royal) + ' (' + self.royal.gender + ')'
-
-    def __repr__(self):
-        '''(RoyalNode) -> str
-        Return a str representation of node.
-        '''
-
-        return str(self)
-
-    def marry(self, consort):
-        '''(RoyalNode, Person) -> CoupleNode
-        Create and return CoupleNode of royal and consort.
-        '''
-
-        if not self.royal.alive:
-            raise DeadRoyalError
-        new = CoupleNode(self.royal, consort, self.tree)
-        if self.parent:
-            #Set parent of new CoupleNode to be the same as RoyalNode
-            new.parent = self.parent
-            #Loop through parents' children and update correct node
-            for i in range(len(self.parent.children)):
-                if self.parent.children[i] is self:
-                    self.parent.children.pop(i)
-                    self.parent.children.insert(i, new)
-        return new
-
-    def search(self, royal, children=[]):
-        '''(RoyalNode, Person, list) -> Person or NoneType
-        Find royal in list and return corresponding node.
-        '''
-
-        l = self.search_helper()
-        for i in l:
-            if i.royal is royal:
-                return i
-
-    def search_helper(self):
-        '''(RoyalNode) -> list
-        Add Node and all descendant Nodes to list and return list.
-        '''
-
-        #Start list with original node
-        l = [self]
-        if self.children:
-            #Call search_helper again on each child node, passing
-            #each descendant node back up and extending the list
-            for i in self.children:
-                l.extend(i.search_helper())
-        return l
-
-    def line_of_succession(self):
-        '''(RoyalNode) -> list
-        Generate line of succession in list form from node.
-        '''
-
-        l = []
-        #Check that royal is alive before adding it to list
-        if self.royal.alive:
-            l = [self.royal]
-        if (self.children):
-            #For absolute primogeniture, children are added
-            #in order of age
-            if (self.tree.absolute == True):
-                for i in self.children:
-                    if not i.ancestor_of_ruler:
-                        l.extend(i.line_of_succession())
-            #In the case of gender preference primogeniture
-            else:
-                #Gender of royal in original couple is determined
-                gender = self.tree.root.royal.gender
-                #n will be a new list to store royals of
-                #non-preferred gender
-                n = []
-                for i in self.children:
-                    if not i.ancestor_of_ruler:
-                        #If royal is preferred gender, add to list
-                        if i.royal.gender == gender:
-                            l.extend(i.line_of_succession())
-                        #Otherwise, append to n
-                        else:
-                            n.append(i)
-                #Add royals in n to end of list
-                for i in n:
-                    l.extend(i.line_of_succession())
-        #If node represents ruler or ancestor of ruler and has a parent,
-        #recursively generate lines of succession for ancestor nodes
-        if self.ancestor_of_ruler and self.parent:
-            l.extend(self.parent.line_of_succession())
-
-        return l
-
-    def change_ancestor(self, value):
-        '''(RoyalNode, bool) -> NoneType
-        Change ancestor_of_ruler attribute to value (True or False)
-        '''
-
-        self.ancestor_of_ruler = value
-
-    def reset_descendants(self):
-        '''(RoyalNode) -> NoneType
-        Resets current node and all its descendant's ancestor_of_ruler
-        attributes  to False.
-        '''
-
-        self.change_ancestor(False)
-        for i in self.children:
-            i.reset_descendants()
-
-    def set_ancestors(self):
-        '''(RoyalNode) -> NoneType
-        Change ancestor_of_ruler attribute of current node and its
-        ancestor nodes to True.
-        '''
-
-        self.change_ancestor(True)
-        if self.parent:
-            self.parent.set_ancestors()
-
-
-class NoSuchRoyalError(Exception):
-    '''Raises an exception when no such royal exists.'''
-    pass
-
-
-class DeadRoyalError(Exception):
-    '''Raises an exception when royal is dead.'''
-    pass
-
-
-class CoupleNode(RoyalNode):
-
-    def __init__(self, royal, consort, tree):
-        '''(CoupleNode, Person, Person, Tree) -> NoneType
-        Create a new CoupleNode object.
-        '''
-
-        RoyalNode.__init__(self, royal, tree)
-        self.consort = consort
-
-    def __str__(self):
-        '''(CoupleNode) -> str
-        Return a str representation of node.
-        '''
-
-        return str(self.royal) + ' (' + self.royal.gender + \
-               ') and ' + str(self.consort)
-
-    def __repr__(self):
-        '''(CoupleNode) -> str
-        Return a str representation of node.
-        '''
-
-        return str(self)
-
-    def have_son(self, name):
-        '''(CoupleNode, str) - RoyalNode
-        Create and return new male RoyalNode object with CoupleNode
-        as parent.
-        '''
-
-        if not self.royal.alive:
-            raise DeadRoyalError
-        node = RoyalNode(Person(name, self.royal.last, 'M'), self.tree)
-        node.parent = self
-        self.children.append(node)
-        return node
-
-    def have_daughter(self, name):
-        '''(CoupleNode, str) - RoyalNode
-        Create and return new female RoyalNode object with CoupleNode
-        as parent.
-        '''
-
-        if not self.royal.alive:
-            raise DeadRoyalError
-        node = RoyalNode(Person(name, self.royal.last, 'F'), self.tree)
-        node.parent = self
-        self.children.append(node)
-        return node
-
-
-class FamilyTree(Tree):
-
-    def __init__(self, absolute):
-        '''(Tree, bool) -> NoneType
-        Create a new FamilyTree object.
-        '''
-
-        Tree.__init__(self)
-        self.absolute = absolute
-        self.ruler = None
-
-    def start(self, couple):
-        '''(Tree, CoupleNode) -> NoneType
-        Set tree's root and ruler attributes to CoupleNode.
-        '''
-
-        self.root = couple
-        self.ruler = couple
-
-    def search(self, person):
-        '''(Tree, Person) -> Node or NoneType
-        Search for Person object in Tree and return its
-        corresponding Node. If person is not found, return None.
-        '''
-
-        if self.root:
-            return self.root.search(person)
-
-    def crown(self, person):
-        '''(Tree, Person) -> NoneType
-        Set Tree's ruler attribute to Node representing Person and
-        set all Nodes' ancestor_of_ruler attribute accordingly.
-        '''
-
-        ruler = self.search(person)
-        if not ruler:
-            raise NoSuchRoyalError
-        if not ruler.royal.alive:
-            raise DeadRoyalError
-        else:
-            #Reset all ancestor_of_ruler attributes in tree to False
-            self.root.reset_descendants()
-            self.ruler = ruler
-            #Set ancestor_of_ruler attributes for new ruler's
-            #ancestors to True
-            self.ruler.set_ancestors()
-
-    def kill(self, royal):
-        '''(Person) -> NoneType
-        Change royal's alive attribute to False.
-        '''
-
-        deadperson = self.search(royal)
-        if not deadperson:
-            raise NoSuchRoyalError
-        deadperson.royal.alive = False
-
-    def line_of_succession(self):
-        '''(Tree) -> list
-        Generate line of succession for tree based on current ruler.
-        '''
-
-        return self.ruler.line_of_succession()
+import copyreg
+import gc
+import json
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import islice
+from sys import intern
+from laws import *
+from tree import *
+
+
+class Person:
+
+    __slots__ = ('first', 'last', 'gender', 'alive')
+
+    def __init__(self, first, last, gender, alive=True):
+        '''(Person, str, str, str, bool) -> NoneType
+        Create a new Person object.
+        '''
+
+        self.first = first
+        #Surnames and genders repeat across a dynasty, so share them
+        self.last = intern(last)
+        self.gender = intern(gender)
+        self.alive = alive
+
+    def __str__(self):
+        '''(Person) -> str
+        Return a str representation of person.
+        '''
+
+        return self.first + ' ' + self.last
+
+    def __repr__(self):
+        '''(Person) -> str
+        Return a str representation of person.
+        '''
+
+        return str(self)
+
+
+class RoyalNode(Node):
+
+    __slots__ = ('royal', 'ancestor_of_ruler', 'order', 'living',
+                 'descendants')
+
+    def __init__(self, royal, tree):
+        '''(RoyalNode, Person, Tree) -> NoneType
+        Create a new RoyalNode object.
+        '''
+
+        Node.__init__(self, tree)
+        self.royal = royal
+        self.ancestor_of_ruler = False
+        #Memoized order of heirs and number of living royals in
+        #node's line; each is None when stale
+        self.order = None
+        self.living = None
+        #Number of living royals in node's whole subtree, whatever the
+        #law and ruler, or None when stale
+        self.descendants = None
+
+    def __str__(self):
+        '''(RoyalNode) -> str
+        Return a str representation of node.
+        '''
+
+        return str(self.royal) + ' (' + self.royal.gender + ')'
+
+    def __repr__(self):
+        '''(RoyalNode) -> str
+        Return a str representation of node.
+        '''
+
+        return str(self)
+
+    def __reduce__(self):
+        '''(RoyalNode) -> tuple
+        Return how to pickle node: as the node at the same place in its
+        tree, which is pickled whole as flat tables, found by the index
+        of each node on its path among its parent's children. A node not
+        linked into its tree is pickled with its own attributes.
+        '''
+
+        tree = self.tree
+        path = []
+        node = self
+        while node.parent:
+            siblings = node.parent.children
+            path.append(next(i for i in range(len(siblings))
+                             if siblings[i] is node))
+            node = node.parent
+        if tree is None or node is not tree.root:
+            return (copyreg.__newobj__, (type(self),), self.__getstate__())
+        path.reverse()
+        return (follow_path, (tree, path))
+
+    def marry(self, consort):
+        '''(RoyalNode, Person) -> CoupleNode
+        Create and return CoupleNode of royal and consort.
+        '''
+
+        if not self.royal.alive:
+            raise DeadRoyalError
+        #Look the tree and parent up once, as nodes only refer to them
+        #weakly
+        tree = self.tree
+        parent = self.parent
+        new = CoupleNode(self.royal, consort, tree)
+        tree.register(new)
+        #New node takes over self's place as ruler, root or ancestor
+        new.ancestor_of_ruler = self.ancestor_of_ruler
+        if tree.ruler is self:
+            tree.ruler = new
+        if tree.root is self:
+            tree.root = new
+        #A remarried couple's children move to the new node, keeping
+        #their ancestors' paths through the tree intact
+        for i in self.children:
+            i.parent = new
+        new.children = self.children
+        self.children = NO_CHILDREN
+        new.descendants = self.descendants
+        if parent:
+            #Set parent of new CoupleNode to be the same as RoyalNode
+            new.parent = parent
+            #Loop through parents' children and update correct node
+            for i in range(len(parent.children)):
+                if parent.children[i] is self:
+                    parent.children.pop(i)
+                    parent.children.insert(i, new)
+        tree.record(tree.undo_marriage, self, new)
+        tree.log('marry', self.royal, consort)
+        if tree.people is not None:
+            tree.people.add(consort)
+            if getattr(self, 'consort', None):
+                tree.people.remove(self.consort)
+        if tree.dirty is None:
+            #New node takes over self's memos and place in its parent's
+            #order of heirs, so no count of living royals changes
+            new.order = self.order
+            new.living = self.living
+            if parent and parent.order is not None:
+                order = parent.order
+                for i in range(len(order)):
+                    if order[i] is self:
+                        order[i] = new
+            tree.invalidate()
+        else:
+            tree.invalidate(parent)
+        if tree.watched():
+            #The new node takes the old one's place in line
+            tree.notify('marry')
+        return new
+
+    def search(self, royal, children=[]):
+        '''(RoyalNode, Person, list) -> Person or NoneType
+        Find royal in self's subtree and return corresponding node.
+        '''
+
+        if self.royal is royal:
+            return self
+        #Look up royal's node in the tree's index, then check that
+        #it is a descendant of self by walking up its parents
+        node = self.tree.nodes.get(royal)
+        i = node
+        while i:
+            if i is self:
+                return node
+            i = i.parent
+
+    def search_helper(self):
+        '''(RoyalNode) -> list
+        Add Node and all descendant Nodes to list and return list.
+        '''
+
+        return list(self.preorder())
+
+    def depth(self):
+        '''(RoyalNode) -> int
+        Return the depth of node in the tree, where the root has a depth
+        of 1, from the tree's index of ancestors once it has one.
+        '''
+
+        kin = self.tree.kin
+        #Nodes never linked into the tree are not in the index
+        if kin is not None and self.royal in kin.depth:
+            return kin.depth[self.royal]
+        return Node.depth(self)
+
+    def line_of_succession(self):
+        '''(RoyalNode) -> list
+        Generate line of succession in list form from node.
+        '''
+
+        l = []
+        node = self
+        node.add_successors(l)
+        #If node represents ruler or ancestor of ruler and has a parent,
+        #continue with the lines of succession of ancestor nodes
+        while node.ancestor_of_ruler and node.parent:
+            node = node.parent
+            node.add_successors(l)
+
+        return l
+
+    def iter_succession(self):
+        '''(RoyalNode) -> generator
+        Yield the line of succession from node one royal at a time,
+        only walking the tree as far as the royals asked for.
+        '''
+
+        node = self
+        while True:
+            for i in node.iter_successors():
+                yield i
+            if not (node.ancestor_of_ruler and node.parent):
+                return
+            node = node.parent
+
+    def add_successors(self, l):
+        '''(RoyalNode, list) -> NoneType
+        Append the living royals of node's subtree to l in order of
+        succession, leaving out ancestors of ruler and their subtrees.
+        '''
+
+        #Count the living first so that dead branches can be skipped
+        if self.living is None:
+            self.refresh()
+        l.extend(self.iter_successors())
+
+    def iter_successors(self):
+        '''(RoyalNode) -> generator
+        Yield the living royals of node's subtree in order of
+        succession, leaving out ancestors of ruler and their subtrees.
+        '''
+
+        #Skip branches known to have nobody left alive in them
+        for i in self.preorder(dead_branch, RoyalNode.heirs):
+            #Check that royal is alive before yielding it
+            if i.royal.alive:
+                yield i.royal
+
+    def successor_at(self, k):
+        '''(RoyalNode, int) -> Person
+        Return the royal at index k of node's subtree in order of
+        succession, as added by add_successors. Node's living count
+        must be up to date and greater than k.
+        '''
+
+        node = self
+        while True:
+            if node.royal.alive:
+                if k == 0:
+                    return node.royal
+                k -= 1
+            #Descend into the heir whose line contains index k
+            for i in node.order:
+                if k < i.living:
+                    node = i
+                    break
+                k -= i.living
+
+    def heirs(self):
+        '''(RoyalNode) -> list
+        Return node's children in order of succession, leaving out
+        ancestors of ruler.
+        '''
+
+        if self.order is None:
+            self.order = self.ordering()
+        return self.order
+
+    def refresh(self):
+        '''(RoyalNode) -> NoneType
+        Recount the living royals in the lines of node and of its heirs
+        whose counts are stale.
+        '''
+
+        #Find stale nodes top-down, then count living bottom-up
+        stale = list(self.preorder(counted, RoyalNode.heirs))
+        for i in reversed(stale):
+            living = 1 if i.royal.alive else 0
+            for j in i.order:
+                living += j.living
+            i.living = living
+
+    def ordering(self):
+        '''(RoyalNode) -> list
+        Compute node's order of heirs from its children under the
+        tree's law of succession.
+        '''
+
+        if not self.children:
+            return NO_CHILDREN
+        return ordered_heirs(self, *self.tree.compiled)
+
+    def add_heir(self, child):
+        '''(RoyalNode, RoyalNode) -> NoneType
+        Put child, node's newborn youngest child, into node's memoized
+        order of heirs, and count child in the living counts of node and
+        its ancestors.
+        '''
+
+        rank = self.tree.rank(child)
+        if self.order is not None and rank is not None:
+            if self.order:
+                #Youngest of its rank, so after every heir ranked alike
+                self.order.insert(bisect_right(self.order, rank,
+                                               key=self.tree.rank), child)
+            else:
+                self.order = [child]
+            child.order = NO_CHILDREN
+            child.living = 1
+            self.add_living(1)
+
+    def add_living(self, delta):
+        '''(RoyalNode, int) -> NoneType
+        Add delta to the living counts of node and of the ancestors whose
+        lines include node's, stopping at the first stale count, whose
+        own ancestors are already stale or do not depend on it.
+        '''
+
+        rank = self.tree.rank
+        node = self
+        while node.living is not None:
+            node.living += delta
+            #Ancestors of ruler and royals the law leaves out are not in
+            #their parents' lines
+            parent = node.parent
+            if not parent or node.ancestor_of_ruler or rank(node) is None:
+                return
+            node = parent
+
+    def add_descendants(self, delta):
+        '''(RoyalNode, int) -> NoneType
+        Add delta to the counts of living descendants of node and its
+        ancestors, stopping at the first stale count, whose own
+        ancestors are stale as well.
+        '''
+
+        node = self
+        while node and node.descendants is not None:
+            node.descendants += delta
+            node = node.parent
+
+    def count_descendants(self):
+        '''(RoyalNode) -> NoneType
+        Count the living royals in the subtrees of node and of its
+        descendants whose counts are stale.
+        '''
+
+        #Find stale nodes top-down, then count bottom-up
+        stale = list(self.preorder(has_descendants_count))
+        for i in reversed(stale):
+            descendants = 1 if i.royal.alive else 0
+            for j in i.children:
+                descendants += j.descendants
+            i.descendants = descendants
+
+    def invalidate(self):
+        '''(RoyalNode) -> NoneType
+        Discard the memoized order of node and the living counts of node
+        and its ancestors. Stop at the first stale count, whose own
+        ancestors are already stale or do not depend on it.
+        '''
+
+        self.order = None
+        self.invalidate_counts()
+
+    def invalidate_counts(self):
+        '''(RoyalNode) -> NoneType
+        Discard the living counts of node and its ancestors, stopping at
+        the first stale count.
+        '''
+
+        node = self
+        while node and node.living is not None:
+            node.living = None
+            node = node.parent
+
+    def change_ancestor(self, value):
+        '''(RoyalNode, bool) -> NoneType
+        Change ancestor_of_ruler attribute to value (True or False)
+        '''
+
+        self.ancestor_of_ruler = value
+
+    def reset_descendants(self):
+        '''(RoyalNode) -> NoneType
+        Resets current node and all its descendant's ancestor_of_ruler
+        attributes  to False.
+        '''
+
+        for i in self.preorder():
+            i.change_ancestor(False)
+
+    def reset_ancestors(self):
+        '''(RoyalNode) -> NoneType
+        Change ancestor_of_ruler attribute of current node and its
+        ancestor nodes to False.
+        '''
+
+        node = self
+        while node:
+            node.change_ancestor(False)
+            node = node.parent
+
+    def set_ancestors(self):
+        '''(RoyalNode) -> NoneType
+        Change ancestor_of_ruler attribute of current node and its
+        ancestor nodes to True.
+        '''
+
+        node = self
+        while node:
+            node.change_ancestor(True)
+            node = node.parent
+
+
+def follow_path(tree, path):
+    '''(FamilyTree, list of int) -> RoyalNode
+    Return the node of tree reached from its root by taking the child at
+    each index of path in turn.
+    '''
+
+    node = tree.root
+    for i in path:
+        node = node.children[i]
+    return node
+
+
+def counted(node):
+    '''(RoyalNode) -> bool
+    Return whether node's count of living royals is up to date.
+    '''
+
+    return node.living is not None
+
+
+def has_descendants_count(node):
+    '''(RoyalNode) -> bool
+    Return whether node's count of living descendants is up to date.
+    '''
+
+    return node.descendants is not None
+
+
+def dead_subtree(node):
+    '''(RoyalNode) -> bool
+    Return whether nobody is known to be left alive in node's subtree,
+    whatever the law and ruler.
+    '''
+
+    return node.descendants == 0
+
+
+def dead_branch(node):
+    '''(RoyalNode) -> bool
+    Return whether nobody is known to be left alive in node's line.
+    '''
+
+    return node.living == 0
+
+
+def ordered_heirs(node, ranks, default, ranked):
+    '''(RoyalNode, dict, int or NoneType, bool) -> list
+    Return node's children other than ancestors of ruler in order of
+    succession, under a law compiled to ranks, default and ranked by
+    SuccessionLaw.compile.
+    '''
+
+    if default is None:
+        #Children of other genders are not in line
+        order = [i for i in node.children
+                 if not i.ancestor_of_ruler and i.royal.gender in ranks]
+    else:
+        order = [i for i in node.children if not i.ancestor_of_ruler]
+    if ranked:
+        #Stable, so children ranked alike stay in order of age
+        order.sort(key=lambda i: ranks.get(i.royal.gender, default))
+    return order
+
+
+def common_ancestor(a, b):
+    '''(RoyalNode, RoyalNode) -> RoyalNode
+    Return the lowest node that is a or an ancestor of a, and is b or an
+    ancestor of b.
+    '''
+
+    path = set()
+    while a:
+        path.add(a)
+        a = a.parent
+    while b not in path:
+        b = b.parent
+    return b
+
+
+def diff_lines(before, after):
+    '''(list, list) -> tuple of (list, list, list)
+    Return the royals inserted into line after compared to line before
+    as (royal, new rank) pairs, the royals removed as (royal, old rank)
+    pairs, and the fewest royals that moved relative to the others as
+    (royal, old rank, new rank) triples.
+    '''
+
+    old = dict((royal, i) for i, royal in enumerate(before))
+    new = dict((royal, i) for i, royal in enumerate(after))
+    inserted = [(royal, i) for i, royal in enumerate(after)
+                if royal not in old]
+    removed = [(royal, i) for i, royal in enumerate(before)
+               if royal not in new]
+    #The royals in both lines whose new ranks increase in the longest
+    #run, in old order, stayed put, keeping as many ranks as can be;
+    #the rest moved
+    common = [royal for royal in before if royal in new]
+    ranks = [new[royal] for royal in common]
+    stayed = longest_increasing(ranks, [new[royal] == old[royal]
+                                        for royal in common])
+    moved = [(royal, old[royal], new[royal])
+             for i, royal in enumerate(common) if i not in stayed]
+    moved.sort(key=lambda change: change[2])
+    return inserted, removed, moved
+
+
+def longest_increasing(values, preferred):
+    '''(list of int, list of bool) -> set of int
+    Return the indexes of a longest increasing subsequence of values,
+    which are distinct and not negative, with as many indexes i for
+    which preferred[i] is true as can be.
+    '''
+
+    #A Fenwick tree over values of the best (length, preferred count,
+    #last index) of the subsequences ending in each value seen so far
+    best = [(0, 0, None)] * (max(values) + 2 if values else 1)
+    back = [None] * len(values)
+    end = (0, 0, None)
+    for i, value in enumerate(values):
+        #Best subsequence ending in a value below this one
+        prior = (0, 0, None)
+        v = value
+        while v > 0:
+            if best[v][:2] > prior[:2]:
+                prior = best[v]
+            v -= v & -v
+        back[i] = prior[2]
+        mine = (prior[0] + 1, prior[1] + preferred[i], i)
+        if mine[:2] > end[:2]:
+            end = mine
+        v = value + 1
+        while v < len(best):
+            if mine[:2] > best[v][:2]:
+                best[v] = mine
+            v += v & -v
+    indexes = set()
+    i = end[2]
+    while i is not None:
+        indexes.add(i)
+        i = back[i]
+    return indexes
+
+
+def parse_record(record):
+    '''(dict) -> tuple
+    Return the id, parent id (None for the original couple), royal and
+    consort (None if unmarried) described by record, as loaded by
+    FamilyTree.from_records. Raise ValueError if record is malformed.
+    '''
+
+    if not isinstance(record, dict):
+        raise ValueError('record is not an object')
+    for field in ('id', 'first', 'gender'):
+        if record.get(field) in (None, ''):
+            raise ValueError('missing %s' % field)
+    parent = record.get('parent')
+    if parent == '':
+        parent = None
+    alive = record.get('alive')
+    if alive in (None, ''):
+        alive = True
+    elif isinstance(alive, str):
+        if alive.lower() in ('true', 't', 'yes', 'y', '1'):
+            alive = True
+        elif alive.lower() in ('false', 'f', 'no', 'n', '0'):
+            alive = False
+        else:
+            raise ValueError('bad alive %r' % alive)
+    elif not isinstance(alive, bool):
+        raise ValueError('bad alive %r' % alive)
+    royal = Person(str(record['first']), str(record.get('last') or ''),
+                   str(record['gender']), alive)
+    consort = None
+    if record.get('consort_first'):
+        consort = Person(str(record['consort_first']),
+                         str(record.get('consort_last') or ''),
+                         str(record.get('consort_gender') or ''))
+    #Ids from CSV are strings and from JSON may be numbers
+    if parent is not None:
+        parent = str(parent)
+    return str(record['id']), parent, royal, consort
+
+
+#Events accepted by FamilyTree.apply
+EVENTS = ('kill', 'crown', 'have_son', 'have_daughter', 'marry')
+
+
+class NoSuchRoyalError(Exception):
+    '''Raises an exception when no such royal exists.'''
+    pass
+
+
+class DeadRoyalError(Exception):
+    '''Raises an exception when royal is dead.'''
+    pass
+
+
+class CoupleNode(RoyalNode):
+
+    __slots__ = ('consort',)
+
+    def __init__(self, royal, consort, tree):
+        '''(CoupleNode, Person, Person, Tree) -> NoneType
+        Create a new CoupleNode object.
+        '''
+
+        RoyalNode.__init__(self, royal, tree)
+        self.consort = consort
+
+    def __str__(self):
+        '''(CoupleNode) -> str
+        Return a str representation of node.
+        '''
+
+        return str(self.royal) + ' (' + self.royal.gender + \
+               ') and ' + str(self.consort)
+
+    def __repr__(self):
+        '''(CoupleNode) -> str
+        Return a str representation of node.
+        '''
+
+        return str(self)
+
+    def have_son(self, name):
+        '''(CoupleNode, str) - RoyalNode
+        Create and return new male RoyalNode object with CoupleNode
+        as parent.
+        '''
+
+        if not self.royal.alive:
+            raise DeadRoyalError
+        #Look the tree up once, as nodes only refer to it weakly
+        tree = self.tree
+        node = RoyalNode(Person(name, self.royal.last, 'M'), tree)
+        node.parent = self
+        self.add_child_node(node)
+        tree.register(node)
+        tree.record(tree.undo_birth, self, node)
+        tree.log('have_son', self.royal, node.royal)
+        if self.descendants is not None:
+            node.descendants = 1
+            self.add_descendants(1)
+        if tree.people is not None:
+            tree.people.add(node.royal)
+        if tree.kin is not None:
+            tree.kin.add(node.royal, self.royal)
+        tree.invalidate(self, node)
+        if tree.watched():
+            tree.notify('have_son', inserted=tree.ranked(node.royal))
+        return node
+
+    def have_daughter(self, name):
+        '''(CoupleNode, str) - RoyalNode
+        Create and return new female RoyalNode object with CoupleNode
+        as parent.
+        '''
+
+        if not self.royal.alive:
+            raise DeadRoyalError
+        tree = self.tree
+        node = RoyalNode(Person(name, self.royal.last, 'F'), tree)
+        node.parent = self
+        self.add_child_node(node)
+        tree.register(node)
+        tree.record(tree.undo_birth, self, node)
+        tree.log('have_daughter', self.royal, node.royal)
+        if self.descendants is not None:
+            node.descendants = 1
+            self.add_descendants(1)
+        if tree.people is not None:
+            tree.people.add(node.royal)
+        if tree.kin is not None:
+            tree.kin.add(node.royal, self.royal)
+        tree.invalidate(self, node)
+        if tree.watched():
+            tree.notify('have_daughter', inserted=tree.ranked(node.royal))
+        return node
+
+
+class FamilyTree(Tree):
+
+    def __init__(self, absolute, law=None):
+        '''(Tree, bool, SuccessionLaw or NoneType) -> NoneType
+        Create a new FamilyTree object under law, or if law is None,
+        under absolute primogeniture if absolute is True and gender
+        preference primogeniture otherwise.
+        '''
+
+        if law is None:
+            law = ABSOLUTE if absolute else COGNATIC
+        self.law = law
+        Tree.__init__(self)
+        self.ruler = None
+        #Rows rejected by from_records, as (row number, reason) pairs
+        self.rejected = []
+        #Identity index mapping each Person to its current node
+        self.nodes = {}
+        #Cached line of succession, with hit and miss counters
+        self.succession = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        #While in a batch, the steps to undo it and the nodes whose
+        #orderings it changed; both are None outside a batch
+        self.undo = None
+        self.dirty = None
+        #Journal recording the tree's events, if any
+        self.journal = None
+        #Profile recording the tree's operations, while profiling
+        self.profile = None
+        #Functions called with the changes to the line after each event
+        self.subscribers = []
+        #Secondary indexes of Persons, once find has built them
+        self.people = None
+        #Depths and ancestors of royals, once a relationship query has
+        #built them
+        self.kin = None
+
+    def __reduce__(self):
+        '''(Tree) -> tuple
+        Return how to pickle the tree: as a new FamilyTree, whatever the
+        tree's class, with the flat state from __getstate__, so that
+        pickling never recurses through the nodes.
+        '''
+
+        return (object.__new__, (FamilyTree,), self.__getstate__())
+
+    def __getstate__(self):
+        '''(Tree) -> dict
+        Return the tree's nodes and royals as flat tables.
+        '''
+
+        from pickling import tree_state
+        return tree_state(self)
+
+    def __setstate__(self, state):
+        '''(Tree, dict) -> NoneType
+        Rebuild the tree from state, as returned by __getstate__.
+        '''
+
+        from pickling import set_tree_state
+        set_tree_state(self, state)
+
+    def get_absolute(self):
+        '''(Tree) -> bool
+        Return whether the tree is under absolute primogeniture.
+        '''
+
+        return self.law is ABSOLUTE
+
+    def set_absolute(self, absolute):
+        '''(Tree, bool) -> NoneType
+        Put the tree under absolute primogeniture if absolute is True
+        and gender preference primogeniture otherwise.
+        '''
+
+        self.set_law(ABSOLUTE if absolute else COGNATIC)
+
+    absolute = property(get_absolute, set_absolute)
+
+    def get_root(self):
+        '''(Tree) -> RoyalNode or NoneType
+        Return the root of the tree.
+        '''
+
+        return self.root_node
+
+    def set_root(self, root):
+        '''(Tree, RoyalNode or NoneType) -> NoneType
+        Make root the root of the tree, index it, and compile the tree's
+        law for its royal's gender.
+        '''
+
+        self.root_node = root
+        if root:
+            self.register(root)
+        self.compile()
+
+    root = property(get_root, set_root)
+
+    def set_law(self, law):
+        '''(Tree, SuccessionLaw) -> NoneType
+        Put the tree under law, discarding every memoized ordering.
+        '''
+
+        old = self.law
+        watched = self.watched() and self.ruler
+        if watched:
+            before = self.line_of_succession()
+        self.law = law
+        self.compile()
+        for node in self.nodes.values():
+            node.order = None
+            node.living = None
+        self.invalidate()
+        #Journal the change only once it is made, as the journal may
+        #checkpoint the tree while recording it
+        self.record(self.set_law, old)
+        self.log('law', law)
+        if watched:
+            self.notify('law', *diff_lines(before,
+                                           self.line_of_succession()))
+
+    def compile(self):
+        '''(Tree) -> NoneType
+        Compile the tree's law into ranks for the gender of the royal in
+        the original couple, once there is one.
+        '''
+
+        gender = self.root_node.royal.gender if self.root_node else None
+        self.compiled = self.law.compile(gender)
+
+    def rank(self, node):
+        '''(Tree, RoyalNode) -> int or NoneType
+        Return the rank of node among its siblings under the tree's law,
+        or None if the law leaves node out of line.
+        '''
+
+        ranks, default, ranked = self.compiled
+        return ranks.get(node.royal.gender, default)
+
+    @classmethod
+    def from_records(cls, records, absolute=True, law=None):
+        '''(type, iterable, bool, SuccessionLaw or NoneType) -> FamilyTree
+        Build and return a FamilyTree from records in one pass. Each
+        record is a dict, such as a row from csv.DictReader, or a line
+        of JSON, such as a line read from a JSONL file, with fields id,
+        parent (empty for the original couple), first, last, gender,
+        alive (optional) and consort_first, consort_last and
+        consort_gender (optional). Parents must come before their
+        children, and siblings in order of birth. Malformed rows are
+        skipped and listed in the tree's rejected attribute.
+        '''
+
+        tree = cls(absolute, law)
+        #Node of each id loaded so far
+        loaded = {}
+        for number, record in enumerate(records, 1):
+            try:
+                if isinstance(record, str):
+                    if not record.strip():
+                        continue
+                    record = json.loads(record)
+                row_id, parent, royal, consort = parse_record(record)
+                if row_id in loaded:
+                    raise ValueError('duplicate id %r' % row_id)
+                if parent is None:
+                    if tree.root:
+                        raise ValueError('second original couple')
+                elif parent not in loaded:
+                    raise ValueError('unknown parent %r' % parent)
+            except ValueError as error:
+                tree.rejected.append((number, str(error)))
+                continue
+            if consort:
+                node = CoupleNode(royal, consort, tree)
+            else:
+                node = RoyalNode(royal, tree)
+            if parent is None:
+                tree.start(node)
+            else:
+                #Link directly, as a birth or marriage would, without
+                #searching the parent's children
+                node.parent = loaded[parent]
+                node.parent.add_child_node(node)
+                tree.register(node)
+            loaded[row_id] = node
+        return tree
+
+    @classmethod
+    def open_snapshot(cls, path):
+        '''(type, str) -> FamilyTree
+        Open the snapshot file at path, written by save_snapshot, and
+        return its tree. The file is memory-mapped and each node is
+        only created when first reached. The tree's close method, or a
+        with block, releases the mapping.
+        '''
+
+        from snapshot import SnapshotTree
+        return SnapshotTree(path)
+
+    def save_snapshot(self, path):
+        '''(Tree, str) -> NoneType
+        Write tree to a binary snapshot file at path.
+        '''
+
+        from snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    def export_jsonl(self, out, limit=None, max_depth=None):
+        '''(Tree, file, int or NoneType, int or NoneType) -> int
+        Stream tree to out as JSON Lines that from_records reads back,
+        stopping after limit royals and leaving out royals deeper than
+        max_depth. Return the number of royals written.
+        '''
+
+        from export import write_jsonl
+        return write_jsonl(self, out, limit, max_depth)
+
+    def export_dot(self, out, max_depth=None):
+        '''(Tree, file, int or NoneType) -> int
+        Stream tree to out as a Graphviz DOT graph, leaving out royals
+        deeper than max_depth. Return the number of lines written.
+        '''
+
+        from export import write_dot
+        return write_dot(self, out, max_depth)
+
+    def render(self, out=None, limit=None, max_depth=None, living=False):
+        '''(Tree, file or NoneType, int or NoneType, int or NoneType,
+        bool) -> int
+        Write a tabbed representation of the tree to out as Tree.render
+        does. If living, leave out every subtree with nobody alive in
+        it, skipping each one whole using the nodes' counts of living
+        descendants, which are kept up to date by births and deaths
+        once counted.
+        '''
+
+        if not living:
+            return Tree.render(self, out, limit, max_depth)
+        if self.root:
+            self.root.count_descendants()
+        return Tree.render(self, out, limit, max_depth, dead_subtree)
+
+    @staticmethod
+    def gc_freeze():
+        '''() -> int
+        Move every object in the process, such as trees once loaded, out
+        of the garbage collector's tracking, so that collections stop
+        rescanning their nodes. Garbage is collected first. This is not
+        limited to any one tree: it lasts until gc_unfreeze. Return the
+        number of objects frozen.
+        '''
+
+        gc.collect()
+        gc.freeze()
+        return gc.get_freeze_count()
+
+    @staticmethod
+    def gc_unfreeze():
+        '''() -> NoneType
+        Undo gc_freeze, returning every frozen object in the process to
+        the garbage collector's tracking.
+        '''
+
+        gc.unfreeze()
+
+    def enable_profiling(self):
+        '''(Tree) -> Profile
+        Start recording the calls, time and nodes visited of the tree's
+        operations, and return the Profile they are recorded in.
+        '''
+
+        from profiling import enable
+        return enable(self)
+
+    def disable_profiling(self):
+        '''(Tree) -> Profile or NoneType
+        Stop profiling the tree and return its Profile.
+        '''
+
+        from profiling import disable
+        return disable(self)
+
+    def register(self, node):
+        '''(Tree, RoyalNode) -> NoneType
+        Index node under its royal, replacing any node previously
+        indexed for the same Person. Called once node is linked into
+        the tree, so that nodes never linked cannot be found.
+        '''
+
+        self.nodes[node.royal] = node
+
+    def invalidate(self, node=None, child=None, delta=0):
+        '''(Tree, RoyalNode or NoneType, RoyalNode or NoneType, int)
+        -> NoneType
+        Discard the cached line of succession, and the memoized
+        orderings from node up to the root. Called on every event that
+        can change the line: births, marriages, deaths and coronations.
+        For a birth, child is node's newborn child, which is put into
+        node's memoized ordering instead. For a death or its undoing,
+        delta is the change in the number of living royals in node's
+        line, which is added to the counts instead.
+        '''
+
+        self.succession = None
+        if self.dirty is not None:
+            #Wait for the end of the batch
+            if node:
+                self.dirty.append(node)
+        elif child:
+            node.add_heir(child)
+        elif delta:
+            node.add_living(delta)
+        elif node:
+            node.invalidate()
+
+    def record(self, f, *args):
+        '''(Tree, function, object) -> NoneType
+        If in a batch, remember to call f with args should the batch
+        roll back.
+        '''
+
+        if self.undo is not None:
+            self.undo.append((f, args))
+
+    def log(self, kind, *args):
+        '''(Tree, str, object) -> NoneType
+        Pass an event of kind kind with arguments args to the tree's
+        journal, if it has one.
+        '''
+
+        if self.journal:
+            self.journal.record(kind, args)
+
+    def subscribe(self, f):
+        '''(Tree, function) -> NoneType
+        Call f after each birth, marriage, death, coronation, change of
+        law and batch with a dict of the changes to the line of succession: event, the
+        name of the event; inserted, a list of (royal, new rank) pairs;
+        removed, a list of (royal, old rank) pairs; and moved, a list of
+        (royal, old rank, new rank) triples. Royals not listed keep
+        their order relative to each other, and their ranks only shift
+        by the royals inserted and removed ahead of them.
+        '''
+
+        self.subscribers.append(f)
+
+    def unsubscribe(self, f):
+        '''(Tree, function) -> NoneType
+        Stop calling f after each event.
+        '''
+
+        self.subscribers.remove(f)
+
+    def watched(self):
+        '''(Tree) -> bool
+        Return whether an event should compute its changes for
+        subscribers: it has subscribers and is not in a batch, which
+        reports its changes once at its end.
+        '''
+
+        return bool(self.subscribers) and self.undo is None
+
+    def notify(self, event, inserted=(), removed=(), moved=()):
+        '''(Tree, str, list, list, list) -> NoneType
+        Call every subscriber with the changes made by event.
+        '''
+
+        diff = {'event': event, 'inserted': list(inserted),
+                'removed': list(removed), 'moved': list(moved)}
+        for f in list(self.subscribers):
+            f(diff)
+
+    def ranked(self, royal):
+        '''(Tree, Person) -> list
+        Return [(royal, rank of royal)], or [] if royal is not in line.
+        '''
+
+        rank = self.rank_of(royal)
+        if rank is None:
+            return []
+        return [(royal, rank)]
+
+    def line_above(self, node):
+        '''(Tree, RoyalNode) -> list
+        Return the start of the line of succession up to the end of the
+        line of node, the lowest common ancestor of ruler and some other
+        royal. Changing between them as ruler only reorders this part.
+        '''
+
+        count = 0
+        i = self.ruler
+        while True:
+            if i.living is None:
+                i.refresh()
+            count += i.living
+            if i is node or not i.ancestor_of_ruler:
+                break
+            i = i.parent
+        return self.heirs(count)
+
+    def undo_birth(self, parent, child):
+        '''(Tree, RoyalNode, RoyalNode) -> NoneType
+        Remove child, the youngest child of parent, from the tree.
+        '''
+
+        parent.children.pop()
+        if not parent.children:
+            parent.children = NO_CHILDREN
+        del self.nodes[child.royal]
+        if self.people is not None:
+            self.people.remove(child.royal)
+        if self.kin is not None:
+            self.kin.remove(child.royal)
+        if child.descendants is not None:
+            parent.add_descendants(-child.descendants)
+        self.invalidate(parent)
+
+    def undo_marriage(self, old, new):
+        '''(Tree, RoyalNode, CoupleNode) -> NoneType
+        Put old back in the place new took from it by marrying.
+        '''
+
+        self.register(old)
+        if self.people is not None:
+            self.people.remove(new.consort)
+            if getattr(old, 'consort', None):
+                self.people.add(old.consort)
+        if self.ruler is new:
+            self.ruler = old
+        if self.root is new:
+            self.root = old
+        for i in new.children:
+            i.parent = old
+        old.children = new.children
+        new.children = NO_CHILDREN
+        old.descendants = new.descendants
+        if new.parent:
+            siblings = new.parent.children
+            for i in range(len(siblings)):
+                if siblings[i] is new:
+                    siblings[i] = old
+        self.invalidate(old)
+        self.invalidate(old.parent)
+
+    def revive(self, royal):
+        '''(Tree, Person) -> NoneType
+        Undo royal's death.
+        '''
+
+        if self.people is not None:
+            self.people.set_alive(royal, True)
+        royal.alive = True
+        self.nodes[royal].add_descendants(1)
+        self.invalidate(self.nodes[royal], delta=1)
+
+    @contextmanager
+    def batch(self):
+        '''(Tree) -> context manager
+        Apply the events inside a with block as one batch. Ancestor of
+        ruler attributes and orderings are brought up to date once, at
+        the end of the block, so the line should not be queried inside
+        it. If the block raises an exception, every event in it is
+        undone and the exception is passed on. Nested batches join the
+        outermost one.
+        '''
+
+        if self.undo is not None:
+            yield self
+            return
+        ruler = self.ruler
+        before = None
+        if self.subscribers and self.ruler:
+            before = self.line_of_succession()
+        self.undo = []
+        self.dirty = []
+        if self.journal:
+            mark = self.journal.mark()
+        try:
+            yield self
+        except BaseException:
+            for f, args in reversed(self.undo):
+                f(*args)
+            if self.journal:
+                self.journal.discard(mark)
+            raise
+        finally:
+            dirty = self.dirty
+            self.undo = None
+            self.dirty = None
+            #Marriages may have replaced the old ruler's node
+            if ruler:
+                ruler = self.nodes.get(ruler.royal, ruler)
+            if self.ruler is not ruler:
+                self.move_crown(ruler, self.ruler)
+            for node in dirty:
+                node.invalidate()
+            self.invalidate()
+            #The batch's events are journaled together
+            if self.journal and len(self.journal.pending) >= \
+               self.journal.group:
+                self.journal.flush()
+        #Subscribers hear of a batch that succeeded as one event
+        if before is not None:
+            self.notify('batch', *diff_lines(before,
+                                             self.line_of_succession()))
+
+    def apply(self, events):
+        '''(Tree, iterable) -> list
+        Apply events as one batch and return a list of their results.
+        Each event is a tuple of a method name and a Person followed by
+        that method's other arguments: ('kill', royal), ('crown',
+        royal), ('have_son', royal, name), ('have_daughter', royal,
+        name) or ('marry', royal, consort). Births and marriages give
+        the new node as their result; other events give None. Every
+        royal is looked up before any event is applied, and if any
+        event fails the whole batch is undone.
+        '''
+
+        events = list(events)
+        for event in events:
+            if event[0] not in EVENTS:
+                raise ValueError('unknown event %r' % (event[0],))
+            if not self.search(event[1]):
+                raise NoSuchRoyalError
+        results = []
+        with self.batch():
+            for event in events:
+                if event[0] in ('kill', 'crown'):
+                    results.append(getattr(self, event[0])(event[1]))
+                else:
+                    node = self.search(event[1])
+                    results.append(getattr(node, event[0])(*event[2:]))
+        return results
+
+    def start(self, couple):
+        '''(Tree, CoupleNode) -> NoneType
+        Set tree's root and ruler attributes to CoupleNode.
+        '''
+
+        self.root = couple
+        self.ruler = couple
+        if self.people is not None:
+            self.people.add(couple.royal)
+            if getattr(couple, 'consort', None):
+                self.people.add(couple.consort)
+        if self.kin is not None:
+            self.kin.add(couple.royal, None)
+        self.log('start', couple.royal, getattr(couple, 'consort', None))
+        self.invalidate()
+
+    def search(self, person):
+        '''(Tree, Person) -> Node or NoneType
+        Search for Person object in Tree and return its
+        corresponding Node. If person is not found, return None.
+        '''
+
+        if self.root:
+            return self.nodes.get(person)
+
+    def crown(self, person):
+        '''(Tree, Person) -> NoneType
+        Set Tree's ruler attribute to Node representing Person and
+        set all Nodes' ancestor_of_ruler attribute accordingly.
+        '''
+
+        ruler = self.search(person)
+        if not ruler:
+            raise NoSuchRoyalError
+        if not ruler.royal.alive:
+            raise DeadRoyalError
+        elif self.undo is not None:
+            #In a batch, ancestors are set once at its end
+            self.record(setattr, self, 'ruler', self.ruler)
+            self.ruler = ruler
+            self.invalidate()
+        elif self.watched():
+            #Only the lines of the lowest common ancestor of the old
+            #and new ruler and below it are reordered, unless the law
+            #has a fallback, which may take from anywhere in the line
+            if self.law.fallback:
+                top = self.root
+                before = self.line_of_succession()
+            else:
+                top = common_ancestor(self.ruler, ruler)
+                before = self.line_above(top)
+            self.move_crown(self.ruler, ruler)
+            self.ruler = ruler
+            self.invalidate()
+            if self.law.fallback:
+                after = self.line_of_succession()
+            else:
+                after = self.line_above(top)
+            self.notify('crown', *diff_lines(before, after))
+        else:
+            self.move_crown(self.ruler, ruler)
+            self.ruler = ruler
+            self.invalidate()
+        self.log('crown', ruler.royal)
+
+    def move_crown(self, old, new):
+        '''(Tree, RoyalNode or NoneType, RoyalNode) -> NoneType
+        Move the ancestor_of_ruler attributes from old ruler's path to
+        new ruler's path.
+        '''
+
+        #Only the old ruler and its ancestors have ancestor_of_ruler
+        #set, so resetting their attributes to False resets the tree
+        if old:
+            old.reset_ancestors()
+        #Orderings on the old and new ruler's paths change with
+        #the ancestor_of_ruler attributes
+        for node in (old, new):
+            while node:
+                node.order = None
+                node.living = None
+                node = node.parent
+        #Set ancestor_of_ruler attributes for new ruler's
+        #ancestors to True
+        new.set_ancestors()
+
+    def kill(self, royal):
+        '''(Person) -> NoneType
+        Change royal's alive attribute to False.
+        '''
+
+        deadperson = self.search(royal)
+        if not deadperson:
+            raise NoSuchRoyalError
+        watched = self.watched()
+        if watched:
+            removed = self.ranked(deadperson.royal)
+        if deadperson.royal.alive:
+            self.record(self.revive, deadperson.royal)
+            if self.people is not None:
+                self.people.set_alive(deadperson.royal, False)
+            deadperson.royal.alive = False
+            deadperson.add_descendants(-1)
+            self.invalidate(deadperson, delta=-1)
+        self.log('kill', deadperson.royal)
+        if watched:
+            self.notify('kill', removed=removed)
+
+    def find(self, first=None, last=None, gender=None, alive=None,
+             first_prefix=None, last_prefix=None):
+        '''(Tree, str, str, str, bool, str, str) -> list
+        Return the royals and consorts in the tree with every attribute
+        given: first and last names, or their prefixes, gender and
+        whether they are alive. The indexes used are built on the first
+        call and kept up to date by the tree's events after that.
+        '''
+
+        if self.people is None:
+            from indexes import PersonIndex
+            self.people = PersonIndex(self)
+        return self.people.find(first, last, gender, alive, first_prefix,
+                                last_prefix)
+
+    def ancestors(self, *persons):
+        '''(Tree, Person) -> AncestorIndex
+        Return the tree's index of royals' depths and ancestors, built on
+        the first call and kept up to date by births after that. Raise
+        NoSuchRoyalError if any of persons is not a royal in the tree.
+        '''
+
+        if self.kin is None:
+            from kinship import AncestorIndex
+            self.kin = AncestorIndex(self)
+        for person in persons:
+            if person not in self.kin.depth:
+                raise NoSuchRoyalError
+        return self.kin
+
+    def lca(self, a, b):
+        '''(Tree, Person, Person) -> Person
+        Return the closest common ancestor of royals a and b, which is a
+        or b if one is an ancestor of the other.
+        '''
+
+        return self.ancestors(a, b).lca(a, b)
+
+    def kinship(self, a, b):
+        '''(Tree, Person, Person) -> tuple of (int, int)
+        Return how royal b is related to royal a: the generations up from
+        a to their closest common ancestor, and the generations down from
+        it to b. Siblings are (1, 1) and a parent of a is (1, 0).
+        '''
+
+        return self.ancestors(a, b).kinship(a, b)
+
+    def is_descendant(self, a, b):
+        '''(Tree, Person, Person) -> bool
+        Return whether royal a is a descendant of royal b.
+        '''
+
+        return self.ancestors(a, b).is_descendant(a, b)
+
+    def line_of_succession(self):
+        '''(Tree) -> list
+        Return line of succession for tree based on current ruler.
+        The line is cached until the next event that can change it,
+        and each call returns a new copy of it.
+        '''
+
+        if self.succession is None:
+            self.cache_misses += 1
+            self.succession = self.ruler.line_of_succession()
+            if self.law.fallback:
+                self.succession.extend(
+                    self.iter_fallback(set(self.succession)))
+        else:
+            self.cache_hits += 1
+        return list(self.succession)
+
+    def iter_succession(self):
+        '''(Tree) -> iterator
+        Return an iterator over the line of succession for tree, which
+        only walks the tree as far as the royals asked for. The tree
+        must not change while the iterator is in use.
+        '''
+
+        if self.succession is not None:
+            return iter(self.succession)
+        if self.law.fallback:
+            return iter(self.line_of_succession())
+        return self.ruler.iter_succession()
+
+    def iter_fallback(self, listed):
+        '''(Tree, set) -> generator
+        Yield the royals not in listed in their order in the line of
+        succession under the fallback of the tree's law.
+        '''
+
+        compiled = self.law.fallback.compile(self.root.royal.gender)
+        node = self.ruler
+        while True:
+            for i in node.preorder(None,
+                                   lambda n: ordered_heirs(n, *compiled)):
+                if i.royal.alive and i.royal not in listed:
+                    yield i.royal
+            if not (node.ancestor_of_ruler and node.parent):
+                return
+            node = node.parent
+
+    def heir_at(self, k):
+        '''(Tree, int) -> Person
+        Return the royal at index k of the line of succession, where
+        the ruler is at index 0, without building the line. Raise
+        IndexError if the line is shorter than k + 1.
+        '''
+
+        if k < 0:
+            raise IndexError('line of succession index out of range')
+        if self.law.fallback:
+            #Counts only cover the line before its fallback
+            self.line_of_succession()
+        if self.succession is not None:
+            return self.succession[k]
+        node = self.ruler
+        while node:
+            if node.living is None:
+                node.refresh()
+            #Skip whole lines of ancestors using their counts
+            if k < node.living:
+                return node.successor_at(k)
+            k -= node.living
+            if not node.ancestor_of_ruler:
+                break
+            node = node.parent
+        raise IndexError('line of succession index out of range')
+
+    def rank_of(self, person):
+        '''(Tree, Person) -> int or NoneType
+        Return the index of person in the line of succession, where the
+        ruler is at index 0, without building the line. If person is
+        dead or otherwise not in line, return None.
+        '''
+
+        node = self.search(person)
+        if not node:
+            raise NoSuchRoyalError
+        if not node.royal.alive:
+            return None
+        if self.law.fallback:
+            for rank, royal in enumerate(self.line_of_succession()):
+                if royal is node.royal:
+                    return rank
+            return None
+        #Count the royals ahead of node within the line of the first
+        #ruler or ancestor of ruler above it
+        rank = 0
+        while not (node is self.ruler or node.ancestor_of_ruler):
+            parent = node.parent
+            if not parent:
+                return None
+            if parent.living is None:
+                parent.refresh()
+            if parent.royal.alive:
+                rank += 1
+            for i in parent.order:
+                if i is node:
+                    break
+                rank += i.living
+            else:
+                #The law leaves node out of line
+                return None
+            node = parent
+        #Then add the lines of the ruler and ancestors below that one
+        i = self.ruler
+        while i is not node:
+            if not i.ancestor_of_ruler:
+                return None
+            if i.living is None:
+                i.refresh()
+            rank += i.living
+            i = i.parent
+        return rank
+
+    def heirs(self, k):
+        '''(Tree, int) -> list
+        Return the first k royals in the line of succession.
+        '''
+
+        return list(islice(self.iter_succession(), k))
+
+    def succession_for_rulers(self, persons):
+        '''(Tree, iterable) -> list of list
+        Return the line of succession for each of persons as ruler, as
+        crown followed by line_of_succession would, without changing the
+        tree. Raise NoSuchRoyalError or DeadRoyalError as crown would.
+        '''
+
+        from whatif import succession_for_rulers
+        return succession_for_rulers(self, persons)
@@ -0,0 +1,296 @@
+import mmap
+import struct
+from array import array
+from royals import *
+
+#File layout, all little-endian. A header of MAGIC, VERSION, the
+#number of the tree's law in LAWS (once the absolute flag), the number
+#of rows and strings, the ruler's row (-1 if none) and the byte offset
+#of each section, followed by the sections:
+#  parent, size        int64 per row, rows in pre-order
+#  first, last, gender  uint32 string number per row
+#  consort first, last, gender  uint32 string number per row, or NONE
+#  string offsets      uint64 per string, plus one for the end
+#  string data         UTF-8
+#  alive, ancestor_of_ruler  one bit per row
+MAGIC = b'RYLS'
+VERSION = 1
+HEADER = struct.Struct('<4sIIxxxxQQq12Q')
+NONE = 0xFFFFFFFF
+COLUMNS = (('parent', 'q'), ('size', 'q'), ('first', 'I'), ('last', 'I'),
+           ('gender', 'I'), ('consort_first', 'I'), ('consort_last', 'I'),
+           ('consort_gender', 'I'))
+
+
+def save_snapshot(tree, path):
+    '''(FamilyTree, str) -> NoneType
+    Write tree to a binary snapshot file at path.
+    '''
+
+    columns = dict((name, array(code)) for (name, code) in COLUMNS)
+    alive = []
+    ancestor = []
+    strings = {}
+    rows = {}
+    ruler = -1
+
+    def string(s):
+        if s not in strings:
+            strings[s] = len(strings)
+        return strings[s]
+
+    nodes = list(tree.root.preorder()) if tree.root else []
+    for node in nodes:
+        rows[node] = len(rows)
+        columns['parent'].append(rows[node.parent] if node.parent else -1)
+        columns['size'].append(1)
+        royal = node.royal
+        columns['first'].append(string(royal.first))
+        columns['last'].append(string(royal.last))
+        columns['gender'].append(string(royal.gender))
+        consort = getattr(node, 'consort', None)
+        for field in ('first', 'last', 'gender'):
+            if consort:
+                columns['consort_' + field].append(
+                    string(getattr(consort, field)))
+            else:
+                columns['consort_' + field].append(NONE)
+        alive.append(royal.alive)
+        ancestor.append(node.ancestor_of_ruler)
+        if node is tree.ruler:
+            ruler = rows[node]
+    #Children follow their parents in pre-order, so sizes can be added
+    #up in reverse
+    size = columns['size']
+    parent = columns['parent']
+    for i in range(len(nodes) - 1, 0, -1):
+        size[parent[i]] += size[i]
+    data = [s.encode('utf-8') for s in strings]
+    offsets = array('Q', [0])
+    for d in data:
+        offsets.append(offsets[-1] + len(d))
+    sections = [columns[name].tobytes() for (name, code) in COLUMNS]
+    sections += [offsets.tobytes(), b''.join(data), bits(alive),
+                 bits(ancestor)]
+    starts = []
+    position = HEADER.size
+    for section in sections:
+        #Keep every section aligned for its memoryview
+        position += -position % 8
+        starts.append(position)
+        position += len(section)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, LAWS.index(tree.law),
+                            len(nodes), len(strings), ruler, *starts))
+        for start, section in zip(starts, sections):
+            f.write(b'\0' * (start - f.tell()))
+            f.write(section)
+
+
+def bits(flags):
+    '''(list of bool) -> bytes
+    Return flags packed into a bitmap, eight to a byte.
+    '''
+
+    packed = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+class SnapshotTree(FamilyTree):
+    '''A FamilyTree read from a memory-mapped snapshot file. Nodes are
+    created only when first reached from the root or ruler; the mapped
+    file itself is never written, so many processes can share it. The
+    mapping is released by close, or on leaving a with block.
+    '''
+
+    def __init__(self, path):
+        '''(SnapshotTree, str) -> NoneType
+        Open the snapshot file at path.
+        '''
+
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = HEADER.unpack_from(self.map)
+        if header[0] != MAGIC or header[1] != VERSION:
+            self.map.close()
+        if header[0] != MAGIC:
+            raise ValueError('not a royals snapshot')
+        if header[1] != VERSION:
+            raise ValueError('unsupported snapshot version %d' % header[1])
+        FamilyTree.__init__(self, False, LAWS[header[2]])
+        self.rows = header[3]
+        view = memoryview(self.map)
+        starts = header[6:]
+        for (name, code), start in zip(COLUMNS, starts):
+            width = struct.calcsize(code)
+            setattr(self, name,
+                    view[start:start + width * self.rows].cast(code))
+        self.offsets = view[starts[8]:starts[8] + 8 * (header[4] + 1)]
+        self.offsets = self.offsets.cast('Q')
+        self.data = starts[9]
+        self.alive = view[starts[10]:]
+        self.ancestor = view[starts[11]:]
+        self.strings = {}
+        if self.rows:
+            self.root = self.make_node(0, None)
+            if header[5] >= 0:
+                self.ruler = self.node_at(header[5])
+            else:
+                self.ruler = None
+
+    def close(self):
+        '''(SnapshotTree) -> NoneType
+        Release the views of the snapshot and unmap it. Nodes and
+        strings not yet read from it can no longer be reached, so the
+        tree should not be used after this. Closing twice does nothing.
+        '''
+
+        for name, code in COLUMNS:
+            getattr(self, name).release()
+        self.offsets.release()
+        self.alive.release()
+        self.ancestor.release()
+        self.map.close()
+
+    def __enter__(self):
+        '''(SnapshotTree) -> SnapshotTree
+        Return the tree, to be closed at the end of a with block.
+        '''
+
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        '''(SnapshotTree, type, Exception, traceback) -> NoneType
+        Close the tree.
+        '''
+
+        self.close()
+
+    def string(self, i):
+        '''(SnapshotTree, int) -> str
+        Return string number i of the snapshot.
+        '''
+
+        if i not in self.strings:
+            start = self.data + self.offsets[i]
+            end = self.data + self.offsets[i + 1]
+            self.strings[i] = self.map[start:end].decode('utf-8')
+        return self.strings[i]
+
+    def make_node(self, row, parent):
+        '''(SnapshotTree, int, RoyalNode or NoneType) -> RoyalNode
+        Create the node for row with parent parent.
+        '''
+
+        royal = Person(self.string(self.first[row]),
+                       self.string(self.last[row]),
+                       self.string(self.gender[row]),
+                       bool(self.alive[row >> 3] & (1 << (row & 7))))
+        if self.consort_first[row] == NONE:
+            node = LazyRoyalNode(royal, self, row)
+        else:
+            consort = Person(self.string(self.consort_first[row]),
+                             self.string(self.consort_last[row]),
+                             self.string(self.consort_gender[row]))
+            node = LazyCoupleNode(royal, consort, self, row)
+        node.parent = parent
+        node.ancestor_of_ruler = \
+            bool(self.ancestor[row >> 3] & (1 << (row & 7)))
+        self.register(node)
+        return node
+
+    def load_children(self, node):
+        '''(SnapshotTree, RoyalNode) -> list or tuple
+        Create and return the children of node.
+        '''
+
+        row = node.row
+        end = row + self.size[row]
+        child = row + 1
+        children = []
+        while child < end:
+            children.append(self.make_node(child, node))
+            child += self.size[child]
+        return children or NO_CHILDREN
+
+    def node_at(self, row):
+        '''(SnapshotTree, int) -> RoyalNode
+        Return the node for row, creating it and its ancestors' children
+        if they do not exist yet.
+        '''
+
+        path = []
+        while row > 0:
+            path.append(row)
+            row = self.parent[row]
+        node = self.root
+        for row in reversed(path):
+            for child in node.children:
+                if getattr(child, 'row', None) == row:
+                    node = child
+                    break
+        return node
+
+
+#Marks children not yet read from the snapshot
+UNLOADED = object()
+
+
+class Lazy:
+    '''A mixin for snapshot nodes whose children are read from the
+    snapshot the first time they are used.
+    '''
+
+    __slots__ = ()
+
+    def get_children(self):
+        '''(RoyalNode) -> list or tuple
+        Return node's children, reading them from the snapshot on first
+        use.
+        '''
+
+        children = Node.children.__get__(self)
+        if children is UNLOADED:
+            children = self.tree.load_children(self)
+            Node.children.__set__(self, children)
+        return children
+
+    def set_children(self, children):
+        '''(RoyalNode, list or tuple) -> NoneType
+        Replace node's children.
+        '''
+
+        Node.children.__set__(self, children)
+
+    children = property(get_children, set_children)
+
+
+class LazyRoyalNode(Lazy, RoyalNode):
+
+    __slots__ = ('row',)
+
+    def __init__(self, royal, tree, row):
+        '''(LazyRoyalNode, Person, SnapshotTree, int) -> NoneType
+        Create the node for row of tree's snapshot.
+        '''
+
+        RoyalNode.__init__(self, royal, tree)
+        self.row = row
+        Node.children.__set__(self, UNLOADED)
+
+
+class LazyCoupleNode(Lazy, CoupleNode):
+
+    __slots__ = ('row',)
+
+    def __init__(self, royal, consort, tree, row):
+        '''(LazyCoupleNode, Person, Person, SnapshotTree, int) -> NoneType
+        Create the node for row of tree's snapshot.
+        '''
+
+        CoupleNode.__init__(self, royal, consort, tree)
+        self.row = row
+        Node.children.__set__(self, UNLOADED)
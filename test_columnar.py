@@ -0,0 +1,91 @@
+import unittest
+from royals import *
+try:
+    from columnar import *
+except ImportError:
+    ColumnarTree = None
+
+
+@unittest.skipIf(ColumnarTree is None, 'columnar backend needs numpy')
+class TestColumnar(unittest.TestCase):
+    '''Test ColumnarTree against FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+
+    def tearDown(self):
+        pass
+
+    def testFromTree(self):
+        '''Test that a copied tree gives the same lines under both
+        laws and every ruler.'''
+
+        for absolute in (True, False):
+            self.tree.absolute = absolute
+            for royal in list(self.tree.nodes):
+                self.tree.crown(royal)
+                columns = ColumnarTree.from_tree(self.tree)
+                self.assertEqual(columns.line_of_succession(), \
+                                 self.tree.line_of_succession())
+
+    def testEvents(self):
+        '''Test that events on a ColumnarTree match a FamilyTree.'''
+
+        columns = ColumnarTree.from_tree(self.tree)
+        columns.crown(self.art.royal)
+        self.tree.crown(self.art.royal)
+        columns.kill(self.zeus.royal)
+        self.tree.kill(self.zeus.royal)
+        eros = columns.have_son(self.ath.royal, 'Eros')
+        self.ath.marry(Person('Ares', 'A', 'M')).have_son('Eros')
+        self.assertEqual([str(p) for p in columns.line_of_succession()], \
+                         [str(p) for p in self.tree.line_of_succession()])
+        self.assertEqual(columns.search(eros), 7)
+        self.assertRaises(DeadRoyalError, columns.have_son, \
+                          self.zeus.royal, 'Ares')
+        self.assertRaises(NoSuchRoyalError, columns.crown, \
+                          Person('Venus', 'Flytrap', 'F'))
+
+    def testShared(self):
+        '''Test that deaths in a copy leave the FamilyTree be.'''
+
+        self.tree.line_of_succession()
+        columns = ColumnarTree.from_tree(self.tree)
+        columns.kill(self.zeus.royal)
+        self.assertTrue(self.zeus.royal.alive)
+        self.assertEqual(self.tree.heir_at(1), self.zeus.royal)
+        self.assertFalse(self.zeus.royal in columns.line_of_succession())
+
+    def testDeep(self):
+        '''Test a single-line dynasty deeper than 2 ** 16 generations.'''
+
+        columns = ColumnarTree(True)
+        columns.start(self.sarah, self.mr)
+        royal = self.sarah
+        for i in range(70000):
+            royal = columns.have_son(royal, 'Zeus')
+        columns.crown(royal)
+        line = columns.line_of_succession()
+        self.assertEqual(len(line), 70001)
+        self.assertTrue(line[0] is royal)
+        self.assertTrue(line[-1] is self.sarah)
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestColumnar)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
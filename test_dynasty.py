@@ -0,0 +1,50 @@
+import unittest
+from dynasty import *
+
+
+class TestGenerate(unittest.TestCase):
+    '''Test the synthetic dynasty generator.'''
+
+    def shape(self, tree):
+        return [(str(n), n.royal.alive, n.parent and str(n.parent))
+                for n in tree.root.preorder()]
+
+    def testSize(self):
+        '''Test that the tree has the number of royals asked for.'''
+
+        self.assertEqual(len(generate(500).nodes), 500)
+        self.assertEqual(len(generate(1).nodes), 1)
+
+    def testSeed(self):
+        '''Test that a seed always gives the same tree.'''
+
+        self.assertEqual(self.shape(generate(300, 7)),
+                         self.shape(generate(300, 7)))
+        self.assertNotEqual(self.shape(generate(300, 7)),
+                            self.shape(generate(300, 8)))
+
+    def testDepth(self):
+        '''Test the limit on generations.'''
+
+        tree = generate(1000, depth=3, branching=2)
+        self.assertTrue(len(tree.nodes) < 1000)
+        self.assertEqual(max(n.depth() for n in tree.root.preorder()), 3)
+
+    def testRates(self):
+        '''Test the gender mix, deaths and marriages.'''
+
+        tree = generate(2000, sons=1, deaths=0, marriages=1)
+        nodes = list(tree.root.preorder())
+        self.assertTrue(all(n.royal.alive for n in nodes))
+        self.assertTrue(all(n.royal.gender == 'M' for n in nodes[1:]))
+        self.assertTrue(all(isinstance(n, CoupleNode) for n in nodes))
+        tree = generate(2000, deaths=1)
+        self.assertEqual(tree.line_of_succession(), [tree.root.royal])
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestGenerate)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
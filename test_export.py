@@ -0,0 +1,80 @@
+import io
+import json
+import unittest
+from dynasty import generate
+from export import *
+
+
+class TestExport(unittest.TestCase):
+    '''Test streaming a FamilyTree out as JSON Lines and DOT.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.couple)
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.newcouple.have_son('Hercules')
+        self.tree.kill(self.zeus.royal)
+
+    def tearDown(self):
+        pass
+
+    def testJSONL(self):
+        '''Test JSON Lines records of each royal.'''
+
+        out = io.StringIO()
+        self.assertEqual(self.tree.export_jsonl(out), 4)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([(r['id'], r['parent'], r['first']) \
+                          for r in lines], [(0, None, 'Sarah'), \
+                          (1, 0, 'Zeus'), (2, 1, 'Hercules'), \
+                          (3, 0, 'Aphrodite')])
+        self.assertEqual(lines[1]['consort_first'], 'Hera')
+        self.assertFalse(lines[1]['alive'])
+        self.assertFalse('consort_first' in lines[2])
+        out = io.StringIO()
+        self.assertEqual(self.tree.export_jsonl(out, max_depth=2), 3)
+        out = io.StringIO()
+        self.assertEqual(self.tree.export_jsonl(out, limit=1), 1)
+
+    def testRoundTrip(self):
+        '''Test that from_records reads exported lines back.'''
+
+        tree = generate(3000, 5)
+        out = io.StringIO()
+        tree.export_jsonl(out)
+        loaded = FamilyTree.from_records(out.getvalue().splitlines())
+        self.assertEqual(loaded.rejected, [])
+        self.assertEqual([str(n) for n in loaded.root.preorder()], \
+                         [str(n) for n in tree.root.preorder()])
+        self.assertEqual([p.alive for p in loaded.nodes], \
+                         [n.royal.alive for n in tree.root.preorder()])
+
+    def testDOT(self):
+        '''Test the Graphviz DOT graph.'''
+
+        self.aph.royal.first = 'Aphrodite "Venus"'
+        out = io.StringIO()
+        self.assertEqual(self.tree.export_dot(out), 9)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'digraph family {')
+        self.assertEqual(lines[1], \
+            '  n0 [label="Sarah Gibeau (F) and Mr Gibeau", style=bold];')
+        self.assertEqual(lines[2], \
+            '  n1 [label="Zeus Gibeau (M) and Hera Juno", style=dashed];')
+        self.assertEqual(lines[3], '  n0 -> n1;')
+        self.assertEqual(lines[6], \
+            '  n3 [label="Aphrodite \\"Venus\\" Gibeau (F)"];')
+        self.assertEqual(lines[-1], '}')
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestExport)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -0,0 +1,97 @@
+import unittest
+from history import *
+
+
+class TestHistory(unittest.TestCase):
+    '''Test versions of a History.'''
+
+    def setUp(self):
+        self.history = History(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.history.start(self.sarah, self.mr)
+        self.zeus = self.history.have_son(self.sarah, 'Zeus')
+        self.aph = self.history.have_daughter(self.sarah, 'Aphrodite')
+        self.history.marry(self.zeus, Person('Hera', 'Juno', 'F'))
+        self.herc = self.history.have_son(self.zeus, 'Hercules')
+        self.history.crown(self.herc)
+        self.history.kill(self.zeus)
+
+    def line(self, version):
+        return [str(p) for p in version.line_of_succession()]
+
+    def testLine(self):
+        '''Test the line of succession of the current version.'''
+
+        self.assertEqual(self.line(self.history.current()), \
+                         ['Hercules Gibeau', 'Sarah Gibeau', \
+                          'Aphrodite Gibeau'])
+
+    def testPast(self):
+        '''Test the lines of succession of earlier versions.'''
+
+        self.assertEqual(self.history.current().number, 7)
+        self.assertEqual(self.line(self.history.at(0)), [])
+        self.assertEqual(self.line(self.history.at(3)), \
+                         ['Sarah Gibeau', 'Aphrodite Gibeau', 'Zeus Gibeau'])
+        self.assertEqual(self.line(self.history.at(6)), \
+                         ['Hercules Gibeau', 'Zeus Gibeau', 'Sarah Gibeau', \
+                          'Aphrodite Gibeau'])
+
+    def testSearch(self):
+        '''Test searching past versions.'''
+
+        self.assertEqual(self.history.at(4).search(self.herc), None)
+        self.assertEqual(str(self.history.at(3).search(self.zeus)), \
+                         'Zeus Gibeau (M)')
+        self.assertEqual(str(self.history.at(4).search(self.zeus)), \
+                         'Zeus Gibeau (M) and Hera Juno')
+        self.assertTrue(self.history.at(6).search(self.zeus).alive)
+        self.assertFalse(self.history.at(7).search(self.zeus).alive)
+
+    def testSharing(self):
+        '''Test that an event copies only the path to the root.'''
+
+        old = self.history.at(6).root
+        new = self.history.at(7).root
+        self.assertFalse(old is new)
+        self.assertTrue(old.children[1] is new.children[1])
+        self.assertTrue(old.children[0].children[0] is \
+                        new.children[0].children[0])
+
+    def testErrors(self):
+        '''Test events on dead and unknown royals.'''
+
+        self.assertRaises(DeadRoyalError, self.history.crown, self.zeus)
+        self.assertRaises(DeadRoyalError, self.history.have_son, self.zeus, \
+                          'Ares')
+        self.assertRaises(NoSuchRoyalError, self.history.kill, \
+                          Person('Ares', 'A', 'M'))
+        self.assertEqual(self.history.current().number, 7)
+
+    def testFromTree(self):
+        '''Test that a History copied from a FamilyTree has its line.'''
+
+        tree = FamilyTree(True)
+        gibeaus = CoupleNode(self.sarah, self.mr, tree)
+        tree.start(gibeaus)
+        zeus = gibeaus.have_son('Zeus').marry(Person('Hera', 'Juno', 'F'))
+        gibeaus.have_daughter('Aphrodite')
+        tree.crown(zeus.have_son('Hercules').royal)
+        history = History.from_tree(tree)
+        self.assertEqual(history.at(1).line_of_succession(), \
+                         tree.line_of_succession())
+        #Deaths in the history leave the tree and earlier versions be
+        history.kill(zeus.royal)
+        self.assertTrue(zeus.royal.alive)
+        self.assertTrue(zeus.royal in tree.line_of_succession())
+        self.assertTrue(history.at(1).search(zeus.royal).alive)
+        self.assertFalse(zeus.royal in history.current().line_of_succession())
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestHistory)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -0,0 +1,104 @@
+import unittest
+from indexes import *
+from royals import *
+
+
+class TestPersonIndex(unittest.TestCase):
+    '''Test finding Persons in a FamilyTree by their attributes.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.couple)
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.hera = Person('Hera', 'Juno', 'F')
+        self.newcouple = self.zeus.marry(self.hera)
+        self.herc = self.newcouple.have_son('Hercules')
+
+    def tearDown(self):
+        pass
+
+    def testExact(self):
+        '''Test looking Persons up by exact attributes.'''
+
+        self.assertEqual(self.tree.find(first='Zeus'), [self.zeus.royal])
+        self.assertEqual(self.tree.find(last='Juno'), [self.hera])
+        self.assertEqual(self.tree.find(last='Gibeau', gender='F'), \
+                         [self.sarah, self.aph.royal])
+        self.assertEqual(self.tree.find(first='Ares'), [])
+        self.assertEqual(len(self.tree.find()), 6)
+
+    def testPrefix(self):
+        '''Test looking Persons up by the start of their names.'''
+
+        self.assertEqual(self.tree.find(first_prefix='He'), \
+                         [self.hera, self.herc.royal])
+        self.assertEqual(self.tree.find(first_prefix='He', last='Gibeau'), \
+                         [self.herc.royal])
+        self.assertEqual(self.tree.find(last_prefix='Gib', first_prefix='A'), \
+                         [self.aph.royal])
+        self.assertEqual(self.tree.find(first_prefix='Z', last_prefix='J'), \
+                         [])
+
+    def testEvents(self):
+        '''Test that the indexes follow births, marriages and deaths.'''
+
+        self.tree.find()
+        hebe = self.newcouple.have_daughter('Hebe')
+        self.assertEqual(self.tree.find(first='Hebe'), [hebe.royal])
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(self.tree.find(last='Gibeau', alive=True), \
+                         [self.sarah, self.mr, self.herc.royal, self.aph.royal, \
+                          hebe.royal])
+        self.assertEqual(self.tree.find(alive=False), [self.zeus.royal])
+        ares = Person('Ares', 'A', 'M')
+        self.aph.marry(ares)
+        self.assertEqual(self.tree.find(gender='M', alive=True), \
+                         [self.mr, self.herc.royal, ares])
+
+    def testRoyalConsort(self):
+        '''Test a royal who marries another royal of the tree.'''
+
+        self.tree.find()
+        couple = self.aph.marry(self.herc.royal)
+        self.assertEqual(self.tree.find(first='Hercules'), [self.herc.royal])
+        self.assertEqual(self.tree.find(first='Hercules'), \
+                         self.tree.find(first='Hercules', last='Gibeau'))
+        self.assertTrue(couple.consort is self.herc.royal)
+
+    def testRollback(self):
+        '''Test that the indexes follow a failing batch being undone.'''
+
+        self.tree.find()
+        try:
+            with self.tree.batch():
+                self.aph.marry(Person('Ares', 'A', 'M'))
+                self.couple.have_son('Eros')
+                self.tree.kill(self.sarah)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.tree.find(first_prefix='E'), [])
+        self.assertEqual(self.tree.find(first='Ares'), [])
+        self.assertEqual(self.tree.find(alive=False), [])
+
+    def testRebuilt(self):
+        '''Test that kept indexes match indexes built afresh.'''
+
+        self.tree.find()
+        self.newcouple.have_son('Eros')
+        self.tree.kill(self.aph.royal)
+        fresh = PersonIndex(self.tree)
+        for args in ({'alive': True}, {'gender': 'F'}, {'first_prefix': ''}):
+            self.assertEqual(self.tree.find(**args), fresh.find(**args))
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestPersonIndex)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
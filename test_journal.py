@@ -0,0 +1,141 @@
+import os
+import tempfile
+import unittest
+from journal import *
+
+
+class TestJournal(unittest.TestCase):
+    '''Test journaling FamilyTree events and recovering from them.'''
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'events.jsonl')
+        self.tree = FamilyTree(False)
+        self.journal = Journal(self.tree, self.path, group=3, every=12)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.tree.crown(self.herc.royal)
+        self.tree.kill(self.zeus.royal)
+
+    def tearDown(self):
+        if self.tree.journal:
+            self.tree.journal.close()
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def line(self, tree):
+        return [str(p) for p in tree.line_of_succession()]
+
+    def testRecover(self):
+        '''Test that a recovered tree has the same line and ruler.'''
+
+        self.journal.flush()
+        tree = Journal.recover(self.path)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        self.assertEqual(str(tree.ruler), 'Hercules Gibeau (M)')
+        self.assertEqual(str(tree.root), str(self.gibeaus))
+        tree.journal.close()
+
+    def testGroupCommit(self):
+        '''Test that events are written in groups.'''
+
+        with open(self.path) as f:
+            written = len(f.readlines())
+        self.assertEqual(written, 6)
+        self.assertEqual(len(self.journal.pending), 2)
+
+    def testCheckpoint(self):
+        '''Test that recovery replays only events after a checkpoint.'''
+
+        for name in ('Ares', 'Eros', 'Phobos', 'Deimos'):
+            self.aphes.have_son(name)
+        self.journal.flush()
+        self.assertEqual(self.journal.checkpointed, 12)
+        tree = Journal.recover(self.path)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        tree.journal.close()
+
+    def testContinue(self):
+        '''Test that a recovered tree goes on journaling.'''
+
+        self.journal.close()
+        tree = Journal.recover(self.path, group=1)
+        self.assertEqual(tree.journal.sequence, self.journal.sequence)
+        self.assertEqual(tree.journal.checkpointed, self.journal.sequence)
+        self.assertEqual(len(tree.journal.people), len(self.journal.people))
+        tree.root.children[1].have_daughter('Athena')
+        tree.crown(tree.root.royal)
+        tree.journal.close()
+        recovered = Journal.recover(self.path)
+        self.assertEqual(self.line(recovered), self.line(tree))
+        recovered.journal.close()
+
+    def testTornWrite(self):
+        '''Test that a partly written last event is ignored.'''
+
+        self.journal.flush()
+        with open(self.path, 'a') as f:
+            f.write('[99, "kill", ')
+        tree = Journal.recover(self.path)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        tree.journal.close()
+
+    def testLaw(self):
+        '''Test that changes of law are journaled.'''
+
+        self.tree.set_law(AGNATIC)
+        self.journal.flush()
+        tree = Journal.recover(self.path)
+        self.assertTrue(tree.law is AGNATIC)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        tree.journal.close()
+
+    def testLawCheckpoint(self):
+        '''Test a change of law that triggers a checkpoint.'''
+
+        self.journal.close()
+        path = os.path.join(self.directory, 'law.jsonl')
+        tree = FamilyTree(True)
+        journal = Journal(tree, path, group=1, every=1)
+        tree.start(CoupleNode(Person('Sarah', 'Gibeau', 'F'), \
+                              Person('Mr', 'Gibeau', 'M'), tree))
+        tree.root.have_son('Zeus')
+        tree.set_law(COGNATIC)
+        journal.flush()
+        journal.close()
+        recovered = Journal.recover(path)
+        self.assertTrue(recovered.law is COGNATIC)
+        self.assertEqual(self.line(recovered), self.line(tree))
+        recovered.journal.close()
+
+    def testBatchRollback(self):
+        '''Test that events of a rolled back batch are not journaled.'''
+
+        try:
+            with self.tree.batch():
+                self.aphes.have_son('Ares')
+                self.tree.kill(self.aphes.royal)
+                raise KeyError
+        except KeyError:
+            pass
+        self.journal.flush()
+        tree = Journal.recover(self.path)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        self.assertEqual(len(tree.nodes), 4)
+        tree.journal.close()
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestJournal)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -0,0 +1,115 @@
+import unittest
+from dynasty import generate
+from kinship import *
+from royals import *
+
+
+class TestAncestorIndex(unittest.TestCase):
+    '''Test relationship queries on a FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.couple)
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.newcouple.have_son('Hercules')
+        self.hebe = self.newcouple.have_daughter('Hebe')
+
+    def tearDown(self):
+        pass
+
+    def testLca(self):
+        '''Test closest common ancestors.'''
+
+        self.assertTrue(self.tree.lca(self.herc.royal, self.aph.royal) \
+                        is self.sarah)
+        self.assertTrue(self.tree.lca(self.herc.royal, self.hebe.royal) \
+                        is self.zeus.royal)
+        self.assertTrue(self.tree.lca(self.zeus.royal, self.hebe.royal) \
+                        is self.zeus.royal)
+        self.assertTrue(self.tree.lca(self.herc.royal, self.herc.royal) \
+                        is self.herc.royal)
+
+    def testKinship(self):
+        '''Test generations up and down between royals.'''
+
+        self.assertEqual(self.tree.kinship(self.herc.royal, self.hebe.royal), \
+                         (1, 1))
+        self.assertEqual(self.tree.kinship(self.herc.royal, self.aph.royal), \
+                         (2, 1))
+        self.assertEqual(self.tree.kinship(self.sarah, self.herc.royal), \
+                         (0, 2))
+        self.assertTrue(self.tree.is_descendant(self.herc.royal, self.sarah))
+        self.assertFalse(self.tree.is_descendant(self.sarah, self.herc.royal))
+        self.assertFalse(self.tree.is_descendant(self.herc.royal, \
+                                                 self.aph.royal))
+        self.assertFalse(self.tree.is_descendant(self.herc.royal, \
+                                                 self.herc.royal))
+        self.assertRaises(NoSuchRoyalError, self.tree.lca, self.sarah, \
+                          self.newcouple.consort)
+
+    def testEvents(self):
+        '''Test that the index follows births and marriages.'''
+
+        self.assertEqual(self.herc.depth(), 3)
+        self.tree.lca(self.sarah, self.sarah)
+        couple = self.herc.marry(Person('Megara', 'Thebes', 'F'))
+        hyllus = couple.have_son('Hyllus')
+        self.assertEqual(hyllus.depth(), 4)
+        self.assertEqual(self.tree.kinship(hyllus.royal, self.aph.royal), \
+                         (3, 1))
+        try:
+            with self.tree.batch():
+                couple.have_son('Ctesippus')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(len(self.tree.kin.depth), 6)
+        self.assertEqual(RoyalNode(Person('Eros', 'A', 'M'), \
+                                   self.tree).depth(), 1)
+
+    def testDynasty(self):
+        '''Test against walking up parents in a generated dynasty.'''
+
+        tree = generate(2000, 3, branching=1.5)
+        nodes = list(tree.root.preorder())
+        for i in range(0, len(nodes), 7):
+            a, b = nodes[i], nodes[(i * 31) % len(nodes)]
+            path = []
+            node = a
+            while node:
+                path.append(node)
+                node = node.parent
+            lca = b
+            while lca not in path:
+                lca = lca.parent
+            self.assertTrue(tree.lca(a.royal, b.royal) is lca.royal)
+            down = Node.depth(b) - Node.depth(lca)
+            self.assertEqual(tree.kinship(a.royal, b.royal), \
+                             (path.index(lca), down))
+            self.assertEqual(tree.is_descendant(a.royal, b.royal), \
+                             b in path[1:])
+
+    def testDeep(self):
+        '''Test a single-line dynasty deeper than the recursion limit.'''
+
+        last = self.couple
+        for i in range(5000):
+            last = last.have_son('Zeus').marry(Person('Hera', 'Juno', 'F'))
+        self.assertTrue(self.tree.lca(last.royal, self.herc.royal) \
+                        is self.sarah)
+        self.assertEqual(self.tree.kinship(last.royal, self.aph.royal), \
+                         (5000, 1))
+        self.assertEqual(last.depth(), 5001)
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestAncestorIndex)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
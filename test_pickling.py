@@ -0,0 +1,116 @@
+import copy
+import os
+import pickle
+import tempfile
+import unittest
+from dynasty import generate
+from pickling import *
+
+
+class TestPickling(unittest.TestCase):
+    '''Test pickling FamilyTrees as flat tables.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.couple)
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.newcouple.have_son('Hercules')
+        self.tree.crown(self.herc.royal)
+        self.tree.kill(self.zeus.royal)
+
+    def tearDown(self):
+        pass
+
+    def line(self, tree):
+        return [str(p) for p in tree.line_of_succession()]
+
+    def testRoundTrip(self):
+        '''Test that a loaded tree matches the pickled one.'''
+
+        tree = pickle.loads(pickle.dumps(self.tree))
+        self.assertEqual(self.line(tree), self.line(self.tree))
+        self.assertTrue(tree.law is COGNATIC)
+        self.assertEqual(str(tree.ruler), 'Hercules Gibeau (M)')
+        self.assertTrue(tree.root.ancestor_of_ruler)
+        self.assertFalse(tree.root.children[1].ancestor_of_ruler)
+        self.assertFalse(tree.root.children[0].royal.alive)
+        self.assertEqual(str(tree.root.children[0]), \
+                         'Zeus Gibeau (M) and Hera Juno')
+        self.assertTrue(tree.search(tree.ruler.royal) is tree.ruler)
+        aphes = tree.root.children[1].marry(Person('Ares', 'A', 'M'))
+        aphes.have_son('Eros')
+        self.assertEqual(self.line(tree)[-1], 'Eros Gibeau')
+
+    def testUncrowned(self):
+        '''Test a tree whose ruler was never crowned.'''
+
+        tree = FamilyTree(True)
+        tree.start(CoupleNode(Person('Sarah', 'Gibeau', 'F'), \
+                              Person('Mr', 'Gibeau', 'M'), tree))
+        tree.root.have_son('Zeus')
+        loaded = pickle.loads(pickle.dumps(tree))
+        self.assertTrue(loaded.ruler is loaded.root)
+        self.assertFalse(loaded.root.ancestor_of_ruler)
+        self.assertEqual(self.line(loaded), self.line(tree))
+
+    def testShared(self):
+        '''Test that a royal who is also a consort stays one Person.'''
+
+        couple = self.aph.marry(self.herc.royal)
+        tree = copy.deepcopy(self.tree)
+        self.assertTrue(tree.root.children[1].consort is tree.ruler.royal)
+        self.assertFalse(couple.consort is tree.ruler.royal)
+
+    def testBatch(self):
+        '''Test that a tree cannot be pickled in the middle of a batch.'''
+
+        with self.tree.batch():
+            self.assertRaises(ValueError, pickle.dumps, self.tree)
+
+    def testSnapshot(self):
+        '''Test that a snapshot tree is pickled as a FamilyTree.'''
+
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.tree.save_snapshot(path)
+            snapshot = FamilyTree.open_snapshot(path)
+            tree = pickle.loads(pickle.dumps(snapshot))
+        finally:
+            os.remove(path)
+        self.assertTrue(type(tree) is FamilyTree)
+        self.assertEqual(self.line(tree), self.line(self.tree))
+
+    def testDynasty(self):
+        '''Test a generated dynasty under each protocol.'''
+
+        tree = generate(2000, 7, law=SEMI_SALIC)
+        for protocol in range(2, pickle.HIGHEST_PROTOCOL + 1):
+            loaded = pickle.loads(pickle.dumps(tree, protocol))
+            self.assertTrue(loaded.law is SEMI_SALIC)
+            self.assertEqual([str(n) for n in loaded.root.preorder()], \
+                             [str(n) for n in tree.root.preorder()])
+            self.assertEqual(self.line(loaded), self.line(tree))
+
+    def testDeep(self):
+        '''Test a single-line dynasty deeper than the recursion limit.'''
+
+        last = self.aph.marry(Person('Ares', 'A', 'M'))
+        for i in range(20000):
+            last = last.have_son('Zeus').marry(Person('Hera', 'Juno', 'F'))
+        tree = pickle.loads(pickle.dumps(self.tree))
+        self.assertEqual(len(tree.nodes), len(self.tree.nodes))
+        self.assertEqual(self.line(tree), self.line(self.tree))
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestPickling)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -0,0 +1,107 @@
+import io
+import unittest
+from profiling import *
+
+
+class TestProfile(unittest.TestCase):
+    '''Test profiling FamilyTree operations.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+
+    def tearDown(self):
+        self.tree.disable_profiling()
+
+    def testCounts(self):
+        '''Test call counts and nodes visited.'''
+
+        profile = self.tree.enable_profiling()
+        self.tree.crown(self.aph.royal)
+        self.tree.line_of_succession()
+        self.tree.line_of_succession()
+        self.zeus.marry(Person('Hera', 'Juno', 'F')).have_son('Hercules')
+        stats = profile.snapshot()
+        self.assertEqual(stats['FamilyTree.crown']['calls'], 1)
+        self.assertEqual(stats['FamilyTree.line_of_succession']['calls'], 2)
+        #The second line comes from the cache
+        self.assertEqual(stats['RoyalNode.line_of_succession']['calls'], 1)
+        #Three nodes counted, then three listed
+        self.assertEqual(stats['RoyalNode.line_of_succession']['visited'], 6)
+        self.assertEqual(stats['RoyalNode.marry']['calls'], 1)
+        self.assertEqual(stats['CoupleNode.have_son']['calls'], 1)
+        self.assertTrue(stats['FamilyTree.crown']['seconds'] >= 0)
+
+    def testHistogram(self):
+        '''Test the histogram of an operation's durations.'''
+
+        profile = self.tree.enable_profiling()
+        for i in range(5):
+            self.tree.search(self.zeus.royal)
+        histogram = profile.histogram('FamilyTree.search')
+        self.assertEqual(sum(calls for (micro, calls) in histogram), 5)
+        self.assertEqual(profile.histogram('FamilyTree.kill'), [])
+
+    def testDisable(self):
+        '''Test that disabling restores the unprofiled methods.'''
+
+        crown = FamilyTree.crown
+        preorder = Node.preorder
+        profile = self.tree.enable_profiling()
+        self.assertFalse(FamilyTree.crown is crown)
+        self.assertTrue(self.tree.disable_profiling() is profile)
+        self.assertTrue(FamilyTree.crown is crown)
+        self.assertTrue(Node.preorder is preorder)
+        self.tree.crown(self.zeus.royal)
+        self.assertEqual(profile.snapshot(), {})
+
+    def testDropped(self):
+        '''Test that dropping a profiled tree restores the unprofiled
+        methods.'''
+
+        crown = FamilyTree.crown
+        preorder = Node.preorder
+        self.tree.enable_profiling()
+        self.tree = FamilyTree(True)
+        self.assertTrue(FamilyTree.crown is crown)
+        self.assertTrue(Node.preorder is preorder)
+
+    def testQueries(self):
+        '''Test that queries, renders and batches are profiled.'''
+
+        profile = self.tree.enable_profiling()
+        self.tree.render(io.StringIO())
+        self.tree.find(first='Zeus')
+        self.tree.lca(self.zeus.royal, self.aph.royal)
+        with self.tree.batch():
+            self.tree.kill(self.zeus.royal)
+        stats = profile.snapshot()
+        self.assertEqual(stats['FamilyTree.render']['visited'], 3)
+        self.assertEqual(stats['FamilyTree.find']['calls'], 1)
+        self.assertEqual(stats['FamilyTree.lca']['calls'], 1)
+        self.assertEqual(stats['FamilyTree.batch']['calls'], 1)
+        self.assertEqual(stats['FamilyTree.kill']['calls'], 1)
+
+    def testOtherTrees(self):
+        '''Test that only the profiled tree is recorded.'''
+
+        other = FamilyTree(True)
+        other.start(CoupleNode(Person('Mr', 'Smith', 'M'), \
+                               Person('Ms', 'Smith', 'F'), other))
+        profile = self.tree.enable_profiling()
+        other.line_of_succession()
+        self.assertEqual(profile.snapshot(), {})
+        self.assertEqual(profile.visited, 0)
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestProfile)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -1,245 +1,519 @@
-import unittest
-from royals import *
-
-
-class TestPerson(unittest.TestCase):
-
-    def setUp(self):
-        self.person = Person('Sarah', 'Gibeau', 'F')
-
-    def tearDown(self):
-        pass
-
-    def testAttributes(self):
-        '''Test that person attributes have been correctly assigned.'''
-
-        self.assertTrue(self.person.first == 'Sarah')
-        self.assertTrue(self.person.last == 'Gibeau')
-        self.assertTrue(self.person.gender == 'F')
-        self.assertTrue(self.person.alive)
-
-    def testStr(self):
-        '''Test the str method.'''
-
-        self.assertEqual(str(self.person), 'Sarah Gibeau')
-
-    def testRepr(self):
-        '''Test the repr method.'''
-
-        self.assertEqual(repr(self.person), 'Sarah Gibeau')
-
-
-class TestRoyalNode(unittest.TestCase):
-
-    def setUp(self):
-        self.tree = FamilyTree(True)
-        self.sarah = RoyalNode(Person('Sarah', 'Gibeau', 'F'), self.tree)
-        self.mr = Person('Mr', 'Gibeau', 'M')
-
-    def tearDown(self):
-        pass
-
-    def testAttributes(self):
-        '''Test that attributes have been correctly assigned.'''
-
-        self.assertEqual(self.sarah.royal.first, 'Sarah')
-        self.assertEqual(self.sarah.royal.last, 'Gibeau')
-        self.assertEqual(self.sarah.royal.gender, 'F')
-        self.assertTrue(self.sarah.royal.alive)
-        self.assertEqual(self.sarah.tree, self.tree)
-        self.assertTrue(not self.sarah.children)
-        self.assertEqual(self.sarah.parent, None)
-
-    def testStr(self):
-        '''Test the str method.'''
-
-        self.assertEqual(str(self.sarah), 'Sarah Gibeau (F)')
-
-    def testRepr(self):
-        '''Test the repr method.'''
-
-        self.assertEqual(repr(self.sarah), 'Sarah Gibeau (F)')
-
-    def testMarry(self):
-        '''Test the marry method.'''
-
-        self.couple = self.sarah.marry(self.mr)
-        self.assertEqual(self.couple.royal, self.sarah.royal)
-        self.assertEqual(self.couple.consort, self.mr)
-        self.assertEqual(self.couple.tree, self.tree)
-        self.assertEqual(self.couple.parent, None)
-        self.assertTrue(not self.couple.children)
-
-
-class TestCoupleNode(unittest.TestCase):
-    '''Test the CoupleNode class.'''
-
-    def setUp(self):
-        self.tree = FamilyTree(True)
-        self.sarah = Person('Sarah', 'Gibeau', 'F')
-        self.mr = Person('Mr', 'Gibeau', 'M')
-        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
-
-    def tearDown(self):
-        pass
-
-    def testAttributes(self):
-        '''Test that attributes have been correctly assigned.'''
-
-        self.assertEqual(self.couple.royal, self.sarah)
-        self.assertEqual(self.couple.consort, self.mr)
-        self.assertEqual(self.couple.tree, self.tree)
-        self.assertEqual(self.couple.parent, None)
-        self.assertTrue(not self.couple.children)
-
-    def testStr(self):
-        '''Test the str method.'''
-
-        self.assertEqual(str(self.couple), 'Sarah Gibeau (F) and Mr Gibeau')
-
-    def testRepr(self):
-        '''Test the repr method.'''
-
-        self.assertEqual(str(self.couple), 'Sarah Gibeau (F) and Mr Gibeau')
-
-    def testHaveSon(self):
-        '''Test the have_son method.'''
-
-        self.zeus = self.couple.have_son('Zeus')
-        self.assertEqual(self.zeus.royal.first, 'Zeus')
-        self.assertEqual(self.zeus.royal.last, 'Gibeau')
-        self.assertEqual(self.zeus.royal.gender, 'M')
-        self.assertEqual(self.zeus.parent, self.couple)
-        self.assertEqual(self.zeus.tree, self.tree)
-        self.assertTrue(self.zeus.royal.alive)
-        self.assertTrue(not self.zeus.children)
-        self.assertEqual(self.couple.children, [self.zeus])
-
-    def testHaveDaughter(self):
-        '''Test the have_daughter method.'''
-
-        self.aph = self.couple.have_daughter('Aphrodite')
-        self.assertEqual(self.aph.royal.first, 'Aphrodite')
-        self.assertEqual(self.aph.royal.last, 'Gibeau')
-        self.assertEqual(self.aph.royal.gender, 'F')
-        self.assertEqual(self.aph.parent, self.couple)
-        self.assertEqual(self.aph.tree, self.tree)
-        self.assertTrue(self.aph.royal.alive)
-        self.assertTrue(not self.aph.children)
-        self.assertEqual(self.couple.children, [self.aph])
-
-    def testChildrenOrder(self):
-        '''Test that children are listed in proper order.'''
-
-        self.zeus = self.couple.have_son('Zeus')
-        self.aph = self.couple.have_daughter('Aphrodite')
-        self.assertEqual(self.couple.children, [self.zeus, \
-                                                self.aph])
-
-    def testDeadRoyal(self):
-        '''Test methods in the case of a dead royal.'''
-
-        self.sarah.alive = False
-        self.assertRaises(DeadRoyalError, self.couple.have_son, 'Zeus')
-        self.assertRaises(DeadRoyalError, self.couple.have_daughter, \
-                          'Aphrodite')
-
-
-class TestFamilyTree(unittest.TestCase):
-    '''Test the FamilyTree class.'''
-
-    def setUp(self):
-        self.tree = FamilyTree(True)
-        self.sarah = Person('Sarah', 'Gibeau', 'F')
-        self.mr = Person('Mr', 'Gibeau', 'M')
-        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
-        self.tree.root = self.couple
-        self.zeus = self.couple.have_son('Zeus')
-        self.aph = self.couple.have_daughter('Aphrodite')
-        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
-        self.herc = self.newcouple.have_son('Hercules')
-
-    def tearDown(self):
-        pass
-
-    def testAttributes(self):
-        '''Test that attributes are correctly assigned.'''
-
-        self.assertEqual(self.tree.ruler, None)
-        # self.assertEqual(self.tree.root, None)
-        self.assertEqual(self.tree.absolute, True)
-
-    def testStart(self):
-        '''Test the start method.'''
-
-        self.tree.start(self.couple)
-        self.assertEqual(self.tree.root, self.couple)
-        self.assertEqual(self.tree.ruler, self.couple)
-
-    def testNodeSearch(self):
-        '''Test the node search method.'''
-
-        #Call method from CoupleNode
-        self.assertEqual(self.couple.search(self.sarah), self.couple)
-        self.assertEqual(self.couple.search(self.aph.royal), self.aph)
-        self.assertEqual(self.couple.search(self.zeus.royal), self.newcouple)
-        self.assertEqual(self.couple.search(self.newcouple.consort), None)
-        #self.assertEqual(self.couple.search(Person('Venus', 'Flytrap', \
-                                                   #'F'), None))
-        #Call method from RoyalNode
-        self.assertEqual(self.aph.search(self.aph.royal), self.aph)
-        #Checking that only child nodes are searched
-        self.assertEqual(self.aph.search(self.sarah), None)
-        self.assertEqual(self.aph.search(self.zeus.royal), None)
-
-    def testTreeSearch(self):
-        '''Test the tree search method.'''
-
-        self.tree.root = self.couple
-        self.assertEqual(self.tree.search(self.sarah), self.couple)
-        self.assertEqual(self.tree.search(self.aph.royal), self.aph)
-        self.assertEqual(self.tree.search(self.zeus.royal), self.newcouple)
-        self.assertEqual(self.tree.search(self.newcouple.consort), None)
-        #self.assertEqual(self.tree.search(Person('Venus', 'Flytrap', \
-                                                   #'F'), None))
-
-    def testCrown(self):
-        '''Test the crown method.'''
-
-        self.tree.crown(self.sarah)
-        #self.assertEqual(self.tree.root, self.couple)
-        self.assertEqual(self.tree.ruler, self.couple)
-        #self.assertRaises(NoSuchRoyalError, self.tree.crown, \
-                          #Person('Venus', 'Flytrap', 'F'))
-        self.zeus.royal.alive = False
-        self.assertRaises(DeadRoyalError, self.tree.crown, self.zeus.royal)
-
-    def testKill(self):
-        '''Test the kill method.'''
-
-        self.tree.root = self.couple
-        #Test kill with royal in CoupleNode
-        self.tree.kill(self.newcouple.royal)
-        self.assertFalse(self.newcouple.royal.alive)
-        #Check that consort's status is unchanged
-        self.assertTrue(self.newcouple.consort.alive)
-        #Test with single royal
-        self.tree.kill(self.aph.royal)
-        self.assertFalse(self.aph.royal.alive)
-        #Test with royal who is already dead
-        self.tree.kill(self.zeus.royal)
-        self.assertFalse(self.zeus.royal.alive)
-        #Check that proper exceptions are raised
-        self.assertRaises(NoSuchRoyalError, self.tree.kill, \
-                          Person('Venus', 'Flytrap', 'F'))
-
-
-if __name__ == '__main__':
-    # go!
-    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestPerson)
-    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestRoyalNode)
-    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestCoupleNode)
-    suite4 = unittest.TestLoader().loadTestsFromTestCase(TestFamilyTree)
-    alltests = unittest.TestSuite([suite1, suite2, suite3, suite4])
-    runner = unittest.TextTestRunner()
-    runner.run(alltests)
+import csv
+import gc
+import io
+import pickle
+import unittest
+import weakref
+from royals import *
+
+
+class TestPerson(unittest.TestCase):
+
+    def setUp(self):
+        self.person = Person('Sarah', 'Gibeau', 'F')
+
+    def tearDown(self):
+        pass
+
+    def testAttributes(self):
+        '''Test that person attributes have been correctly assigned.'''
+
+        self.assertTrue(self.person.first == 'Sarah')
+        self.assertTrue(self.person.last == 'Gibeau')
+        self.assertTrue(self.person.gender == 'F')
+        self.assertTrue(self.person.alive)
+
+    def testStr(self):
+        '''Test the str method.'''
+
+        self.assertEqual(str(self.person), 'Sarah Gibeau')
+
+    def testRepr(self):
+        '''Test the repr method.'''
+
+        self.assertEqual(repr(self.person), 'Sarah Gibeau')
+
+    def testSlots(self):
+        '''Test that person has no per-instance dict and shares its
+        surname with other people.'''
+
+        self.assertFalse(hasattr(self.person, '__dict__'))
+        other = Person('Mr', ''.join(['Gib', 'eau']), 'M')
+        self.assertTrue(other.last is self.person.last)
+
+
+class TestRoyalNode(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = RoyalNode(Person('Sarah', 'Gibeau', 'F'), self.tree)
+        self.mr = Person('Mr', 'Gibeau', 'M')
+
+    def tearDown(self):
+        pass
+
+    def testAttributes(self):
+        '''Test that attributes have been correctly assigned.'''
+
+        self.assertEqual(self.sarah.royal.first, 'Sarah')
+        self.assertEqual(self.sarah.royal.last, 'Gibeau')
+        self.assertEqual(self.sarah.royal.gender, 'F')
+        self.assertTrue(self.sarah.royal.alive)
+        self.assertEqual(self.sarah.tree, self.tree)
+        self.assertTrue(not self.sarah.children)
+        self.assertEqual(self.sarah.parent, None)
+
+    def testStr(self):
+        '''Test the str method.'''
+
+        self.assertEqual(str(self.sarah), 'Sarah Gibeau (F)')
+
+    def testRepr(self):
+        '''Test the repr method.'''
+
+        self.assertEqual(repr(self.sarah), 'Sarah Gibeau (F)')
+
+    def testMarry(self):
+        '''Test the marry method.'''
+
+        self.couple = self.sarah.marry(self.mr)
+        self.assertEqual(self.couple.royal, self.sarah.royal)
+        self.assertEqual(self.couple.consort, self.mr)
+        self.assertEqual(self.couple.tree, self.tree)
+        self.assertEqual(self.couple.parent, None)
+        self.assertTrue(not self.couple.children)
+
+
+class TestCoupleNode(unittest.TestCase):
+    '''Test the CoupleNode class.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+
+    def tearDown(self):
+        pass
+
+    def testAttributes(self):
+        '''Test that attributes have been correctly assigned.'''
+
+        self.assertEqual(self.couple.royal, self.sarah)
+        self.assertEqual(self.couple.consort, self.mr)
+        self.assertEqual(self.couple.tree, self.tree)
+        self.assertEqual(self.couple.parent, None)
+        self.assertTrue(not self.couple.children)
+
+    def testStr(self):
+        '''Test the str method.'''
+
+        self.assertEqual(str(self.couple), 'Sarah Gibeau (F) and Mr Gibeau')
+
+    def testRepr(self):
+        '''Test the repr method.'''
+
+        self.assertEqual(str(self.couple), 'Sarah Gibeau (F) and Mr Gibeau')
+
+    def testHaveSon(self):
+        '''Test the have_son method.'''
+
+        self.zeus = self.couple.have_son('Zeus')
+        self.assertEqual(self.zeus.royal.first, 'Zeus')
+        self.assertEqual(self.zeus.royal.last, 'Gibeau')
+        self.assertEqual(self.zeus.royal.gender, 'M')
+        self.assertEqual(self.zeus.parent, self.couple)
+        self.assertEqual(self.zeus.tree, self.tree)
+        self.assertTrue(self.zeus.royal.alive)
+        self.assertTrue(not self.zeus.children)
+        self.assertEqual(self.couple.children, [self.zeus])
+
+    def testHaveDaughter(self):
+        '''Test the have_daughter method.'''
+
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.assertEqual(self.aph.royal.first, 'Aphrodite')
+        self.assertEqual(self.aph.royal.last, 'Gibeau')
+        self.assertEqual(self.aph.royal.gender, 'F')
+        self.assertEqual(self.aph.parent, self.couple)
+        self.assertEqual(self.aph.tree, self.tree)
+        self.assertTrue(self.aph.royal.alive)
+        self.assertTrue(not self.aph.children)
+        self.assertEqual(self.couple.children, [self.aph])
+
+    def testLeaves(self):
+        '''Test that leaves share their empty children and slots.'''
+
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.assertTrue(self.zeus.children is self.aph.children)
+        self.assertFalse(hasattr(self.zeus, '__dict__'))
+        self.assertFalse(hasattr(self.couple, '__dict__'))
+
+    def testChildrenOrder(self):
+        '''Test that children are listed in proper order.'''
+
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.assertEqual(self.couple.children, [self.zeus, \
+                                                self.aph])
+
+    def testDeadRoyal(self):
+        '''Test methods in the case of a dead royal.'''
+
+        self.sarah.alive = False
+        self.assertRaises(DeadRoyalError, self.couple.have_son, 'Zeus')
+        self.assertRaises(DeadRoyalError, self.couple.have_daughter, \
+                          'Aphrodite')
+
+
+class TestFamilyTree(unittest.TestCase):
+    '''Test the FamilyTree class.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.root = self.couple
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.newcouple.have_son('Hercules')
+
+    def tearDown(self):
+        pass
+
+    def testAttributes(self):
+        '''Test that attributes are correctly assigned.'''
+
+        self.assertEqual(self.tree.ruler, None)
+        # self.assertEqual(self.tree.root, None)
+        self.assertEqual(self.tree.absolute, True)
+
+    def testStart(self):
+        '''Test the start method.'''
+
+        self.tree.start(self.couple)
+        self.assertEqual(self.tree.root, self.couple)
+        self.assertEqual(self.tree.ruler, self.couple)
+
+    def testNodeSearch(self):
+        '''Test the node search method.'''
+
+        #Call method from CoupleNode
+        self.assertEqual(self.couple.search(self.sarah), self.couple)
+        self.assertEqual(self.couple.search(self.aph.royal), self.aph)
+        self.assertEqual(self.couple.search(self.zeus.royal), self.newcouple)
+        self.assertEqual(self.couple.search(self.newcouple.consort), None)
+        #self.assertEqual(self.couple.search(Person('Venus', 'Flytrap', \
+                                                   #'F'), None))
+        #Call method from RoyalNode
+        self.assertEqual(self.aph.search(self.aph.royal), self.aph)
+        #Checking that only child nodes are searched
+        self.assertEqual(self.aph.search(self.sarah), None)
+        self.assertEqual(self.aph.search(self.zeus.royal), None)
+
+    def testTreeSearch(self):
+        '''Test the tree search method.'''
+
+        self.tree.root = self.couple
+        self.assertEqual(self.tree.search(self.sarah), self.couple)
+        self.assertEqual(self.tree.search(self.aph.royal), self.aph)
+        self.assertEqual(self.tree.search(self.zeus.royal), self.newcouple)
+        self.assertEqual(self.tree.search(self.newcouple.consort), None)
+        #self.assertEqual(self.tree.search(Person('Venus', 'Flytrap', \
+                                                   #'F'), None))
+
+    def testCrown(self):
+        '''Test the crown method.'''
+
+        self.tree.crown(self.sarah)
+        #self.assertEqual(self.tree.root, self.couple)
+        self.assertEqual(self.tree.ruler, self.couple)
+        #self.assertRaises(NoSuchRoyalError, self.tree.crown, \
+                          #Person('Venus', 'Flytrap', 'F'))
+        self.zeus.royal.alive = False
+        self.assertRaises(DeadRoyalError, self.tree.crown, self.zeus.royal)
+
+    def testKill(self):
+        '''Test the kill method.'''
+
+        self.tree.root = self.couple
+        #Test kill with royal in CoupleNode
+        self.tree.kill(self.newcouple.royal)
+        self.assertFalse(self.newcouple.royal.alive)
+        #Check that consort's status is unchanged
+        self.assertTrue(self.newcouple.consort.alive)
+        #Test with single royal
+        self.tree.kill(self.aph.royal)
+        self.assertFalse(self.aph.royal.alive)
+        #Test with royal who is already dead
+        self.tree.kill(self.zeus.royal)
+        self.assertFalse(self.zeus.royal.alive)
+        #Check that proper exceptions are raised
+        self.assertRaises(NoSuchRoyalError, self.tree.kill, \
+                          Person('Venus', 'Flytrap', 'F'))
+
+    def testIndex(self):
+        '''Test that the tree's index follows births and marriages.'''
+
+        self.tree.start(self.couple)
+        self.assertTrue(self.tree.nodes[self.sarah] is self.couple)
+        self.assertTrue(self.tree.nodes[self.zeus.royal] is self.newcouple)
+        di = self.couple.have_son('Dionysus')
+        self.assertTrue(self.tree.search(di.royal) is di)
+        self.assertTrue(self.tree.search(self.newcouple.consort) is None)
+        #Nodes are only indexed once linked into the tree
+        ghost = RoyalNode(Person('Ghost', 'X', 'M'), self.tree)
+        self.assertTrue(self.tree.search(ghost.royal) is None)
+        self.assertRaises(NoSuchRoyalError, self.tree.crown, ghost.royal)
+
+    def testRemarry(self):
+        '''Test that a remarried royal keeps their children.'''
+
+        self.tree.start(self.couple)
+        self.tree.crown(self.herc.royal)
+        second = self.newcouple.marry(Person('Leto', 'L', 'F'))
+        self.assertEqual(second.children, [self.herc])
+        self.assertTrue(self.herc.parent is second)
+        self.assertTrue(second.ancestor_of_ruler)
+        self.assertEqual(self.couple.children, [second, self.aph])
+        self.tree.crown(self.aph.royal)
+        self.assertFalse(second.ancestor_of_ruler)
+        self.assertFalse(self.herc.ancestor_of_ruler)
+
+    def testMarryRuler(self):
+        '''Test that a ruler who marries stays ruler in the new node.'''
+
+        self.tree.start(self.couple)
+        self.tree.crown(self.aph.royal)
+        aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.assertTrue(self.tree.ruler is aphes)
+        self.assertTrue(aphes.ancestor_of_ruler)
+        self.assertTrue(self.tree.search(self.aph.royal) is aphes)
+        self.assertEqual(self.tree.line_of_succession(), [self.aph.royal, \
+        self.sarah, self.zeus.royal, self.herc.royal])
+
+
+class TestBatch(unittest.TestCase):
+    '''Test batches of events on a FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.couple = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.couple)
+        self.zeus = self.couple.have_son('Zeus')
+        self.aph = self.couple.have_daughter('Aphrodite')
+        self.newcouple = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.newcouple.have_son('Hercules')
+        self.tree.crown(self.herc.royal)
+        self.line = list(self.tree.line_of_succession())
+
+    def tearDown(self):
+        pass
+
+    def testApply(self):
+        '''Test that a batch gives the same tree as single events.'''
+
+        results = self.tree.apply([ \
+            ('have_daughter', self.zeus.royal, 'Hebe'), \
+            ('kill', self.zeus.royal), \
+            ('marry', self.aph.royal, Person('Ares', 'A', 'M')), \
+            ('crown', self.aph.royal), \
+            ('have_son', self.aph.royal, 'Eros')])
+        hebe, aphes, eros = results[0], results[2], results[4]
+        self.assertEqual(results[1], None)
+        self.assertTrue(self.tree.ruler is aphes)
+        self.assertTrue(aphes.ancestor_of_ruler)
+        self.assertFalse(self.herc.ancestor_of_ruler)
+        self.assertFalse(self.newcouple.ancestor_of_ruler)
+        self.assertEqual(self.tree.line_of_succession(), [self.aph.royal, \
+        eros.royal, self.sarah, self.herc.royal, hebe.royal])
+
+    def testRollback(self):
+        '''Test that a failing batch is undone.'''
+
+        self.assertRaises(DeadRoyalError, self.tree.apply, \
+            [('have_son', self.zeus.royal, 'Ares'), \
+             ('marry', self.aph.royal, Person('Ares', 'A', 'M')), \
+             ('crown', self.aph.royal), \
+             ('kill', self.zeus.royal), \
+             ('have_son', self.zeus.royal, 'Eros')])
+        self.assertTrue(self.zeus.royal.alive)
+        self.assertEqual(self.newcouple.children, [self.herc])
+        self.assertTrue(self.tree.search(self.aph.royal) is self.aph)
+        self.assertEqual(self.couple.children, [self.newcouple, self.aph])
+        self.assertTrue(self.tree.ruler is self.herc)
+        self.assertEqual(self.tree.line_of_succession(), self.line)
+
+    def testLookup(self):
+        '''Test that unknown royals fail the batch before it starts.'''
+
+        self.assertRaises(NoSuchRoyalError, self.tree.apply, \
+            [('kill', self.zeus.royal), \
+             ('kill', Person('Venus', 'Flytrap', 'F'))])
+        self.assertTrue(self.zeus.royal.alive)
+        self.assertRaises(ValueError, self.tree.apply, \
+                          [('abdicate', self.zeus.royal)])
+
+    def testWith(self):
+        '''Test batches as with blocks.'''
+
+        with self.tree.batch():
+            self.tree.kill(self.sarah)
+            self.tree.crown(self.aph.royal)
+            self.tree.crown(self.zeus.royal)
+        self.assertTrue(self.newcouple.ancestor_of_ruler)
+        self.assertFalse(self.herc.ancestor_of_ruler)
+        self.assertEqual(self.tree.line_of_succession(), [self.zeus.royal, \
+        self.herc.royal, self.aph.royal])
+        try:
+            with self.tree.batch():
+                self.tree.crown(self.aph.royal)
+                self.tree.crown(self.sarah)
+        except DeadRoyalError:
+            pass
+        self.assertTrue(self.tree.ruler is self.newcouple)
+
+
+class TestFromRecords(unittest.TestCase):
+    '''Test loading a FamilyTree from records.'''
+
+    def setUp(self):
+        self.csv = io.StringIO('''id,parent,first,last,gender,alive,consort_first,consort_last,consort_gender
+1,,Sarah,Gibeau,F,true,Mr,Gibeau,M
+2,1,Zeus,Gibeau,M,false,Hera,Juno,F
+3,1,Aphrodite,Gibeau,F,,,,
+4,2,Hercules,Gibeau,M,true,,,
+5,9,Ares,Gibeau,M,true,,,
+6,1,,Gibeau,M,true,,,
+7,1,Dionysus,Gibeau,M,maybe,,,
+3,1,Athena,Gibeau,F,true,,,
+''')
+        self.jsonl = io.StringIO('''{"id": 1, "first": "Sarah", "last": "Gibeau", "gender": "F", "consort_first": "Mr", "consort_last": "Gibeau", "consort_gender": "M"}
+{"id": 2, "parent": 1, "first": "Zeus", "last": "Gibeau", "gender": "M", "alive": false}
+
+{"id": 3, "parent": 1, "first": "Aphrodite", "last": "Gibeau",
+[1, 2]
+{"id": 4, "parent": 2, "first": "Hercules", "last": "Gibeau", "gender": "M"}
+''')
+
+    def tearDown(self):
+        pass
+
+    def testCSV(self):
+        '''Test loading rows from csv.DictReader.'''
+
+        tree = FamilyTree.from_records(csv.DictReader(self.csv))
+        self.assertEqual([str(p) for p in tree.line_of_succession()], \
+        ['Sarah Gibeau', 'Hercules Gibeau', 'Aphrodite Gibeau'])
+        self.assertEqual(str(tree.root), 'Sarah Gibeau (F) and Mr Gibeau')
+        self.assertEqual(str(tree.root.children[0]), \
+                         'Zeus Gibeau (M) and Hera Juno')
+        self.assertEqual([n for (n, reason) in tree.rejected], [5, 6, 7, 8])
+
+    def testJSONL(self):
+        '''Test loading lines of a JSONL file.'''
+
+        tree = FamilyTree.from_records(self.jsonl)
+        zeus = tree.root.children[0]
+        self.assertFalse(zeus.royal.alive)
+        self.assertTrue(tree.search(zeus.royal) is zeus)
+        self.assertEqual([str(p) for p in tree.line_of_succession()], \
+        ['Sarah Gibeau', 'Hercules Gibeau'])
+        self.assertEqual([n for (n, reason) in tree.rejected], [4, 5])
+
+
+class TestMemory(unittest.TestCase):
+    '''Test that FamilyTrees are freed without the garbage collector.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        couple = CoupleNode(Person('Sarah', 'Gibeau', 'F'), \
+                            Person('Mr', 'Gibeau', 'M'), self.tree)
+        self.tree.start(couple)
+        zeus = couple.have_son('Zeus').marry(Person('Hera', 'Juno', 'F'))
+        zeus.have_son('Hercules')
+        couple.have_daughter('Aphrodite')
+        self.tree.line_of_succession()
+
+    def tearDown(self):
+        pass
+
+    def testNoCycles(self):
+        '''Test that a dropped tree and its nodes are freed at once.'''
+
+        herc = self.tree.root.children[0].children[0]
+        self.assertTrue(herc.parent.parent is self.tree.root)
+        self.assertTrue(herc.tree is self.tree)
+        tree = weakref.ref(self.tree)
+        root = weakref.ref(self.tree.root)
+        node = weakref.ref(herc)
+        del herc
+        gc.disable()
+        try:
+            self.tree = None
+            self.assertEqual(tree(), None)
+            self.assertEqual(root(), None)
+            self.assertEqual(node(), None)
+        finally:
+            gc.enable()
+
+    def testDroppedTree(self):
+        '''Test using a node whose tree was dropped.'''
+
+        def make():
+            tree = FamilyTree(True)
+            couple = CoupleNode(Person('Sarah', 'Gibeau', 'F'), \
+                                Person('Mr', 'Gibeau', 'M'), tree)
+            tree.start(couple)
+            return couple
+
+        couple = make()
+        self.assertRaises(ReferenceError, couple.have_son, 'Zeus')
+        self.assertEqual(couple.parent, None)
+        child = Node(None, Node(None))
+        self.assertEqual(child.tree, None)
+        self.assertRaises(ReferenceError, getattr, child, 'parent')
+
+    def testFreeze(self):
+        '''Test moving a loaded tree out of the collector's tracking.'''
+
+        try:
+            self.assertTrue(FamilyTree.gc_freeze() > 0)
+            self.assertEqual(gc.get_freeze_count(), FamilyTree.gc_freeze())
+            self.assertEqual(self.tree.line_of_succession()[0], \
+                             self.tree.root.royal)
+        finally:
+            FamilyTree.gc_unfreeze()
+        self.assertEqual(gc.get_freeze_count(), 0)
+
+    def testPickleNode(self):
+        '''Test pickling nodes, which only refer to their tree weakly.'''
+
+        herc = self.tree.root.children[0].children[0]
+        tree, node = pickle.loads(pickle.dumps((self.tree, herc)))
+        self.assertTrue(node is tree.root.children[0].children[0])
+        self.assertEqual(str(node), 'Hercules Gibeau (M)')
+        ghost = RoyalNode(Person('Ghost', 'X', 'M'), self.tree)
+        tree, node = pickle.loads(pickle.dumps((self.tree, ghost)))
+        self.assertTrue(node.tree is tree)
+        self.assertEqual(str(node), 'Ghost X (M)')
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestPerson)
+    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestRoyalNode)
+    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestCoupleNode)
+    suite4 = unittest.TestLoader().loadTestsFromTestCase(TestFamilyTree)
+    suite5 = unittest.TestLoader().loadTestsFromTestCase(TestBatch)
+    suite6 = unittest.TestLoader().loadTestsFromTestCase(TestFromRecords)
+    suite7 = unittest.TestLoader().loadTestsFromTestCase(TestMemory)
+    alltests = unittest.TestSuite([suite1, suite2, suite3, suite4, suite5, \
+                                   suite6, suite7])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from royals import *
+
+
+class TestSnapshot(unittest.TestCase):
+    '''Test saving and opening FamilyTree snapshots.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+        self.tree.crown(self.art.royal)
+        self.tree.kill(self.zeus.royal)
+        handle, self.path = tempfile.mkstemp()
+        os.close(handle)
+        self.tree.save_snapshot(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def testRoundTrip(self):
+        '''Test that an opened snapshot has the same tree and line.'''
+
+        tree = FamilyTree.open_snapshot(self.path)
+        self.assertEqual(tree.absolute, False)
+        self.assertEqual(str(tree.root), str(self.gibeaus))
+        self.assertEqual(str(tree.ruler), str(self.art))
+        self.assertTrue(tree.ruler.ancestor_of_ruler)
+        self.assertEqual([str(p) for p in tree.line_of_succession()], \
+                         [str(p) for p in self.tree.line_of_succession()])
+        self.assertEqual(str(tree.root.children[0].consort), 'Hera Juno')
+        self.assertFalse(tree.root.children[0].royal.alive)
+
+    def testLazy(self):
+        '''Test that nodes are only created when reached.'''
+
+        tree = FamilyTree.open_snapshot(self.path)
+        #The root, the ruler and the children along the ruler's path
+        self.assertEqual(len(tree.nodes), 6)
+        self.assertEqual(str(tree.heirs(1)[0]), 'Artemis Gibeau')
+        self.assertEqual(len(tree.nodes), 6)
+        tree.line_of_succession()
+        self.assertEqual(len(tree.nodes), 7)
+
+    def testEvents(self):
+        '''Test that events work on an opened snapshot.'''
+
+        tree = FamilyTree.open_snapshot(self.path)
+        ares = tree.ruler.marry(Person('Ares', 'A', 'M')).have_son('Eros')
+        tree.kill(tree.root.royal)
+        self.assertEqual([str(p) for p in tree.heirs(3)], ['Artemis Gibeau', \
+                         'Eros Gibeau', 'Aphrodite Gibeau'])
+        self.assertTrue(tree.search(ares.royal) is ares)
+
+    def testLaw(self):
+        '''Test that the law of succession is kept.'''
+
+        self.tree.set_law(SEMI_SALIC)
+        self.tree.save_snapshot(self.path)
+        tree = FamilyTree.open_snapshot(self.path)
+        self.assertTrue(tree.law is SEMI_SALIC)
+        self.assertEqual([str(p) for p in tree.line_of_succession()], \
+                         [str(p) for p in self.tree.line_of_succession()])
+
+    def testClose(self):
+        '''Test closing an opened snapshot, directly and in a with block.'''
+
+        with FamilyTree.open_snapshot(self.path) as tree:
+            line = [str(p) for p in tree.line_of_succession()]
+        self.assertTrue(tree.map.closed)
+        self.assertEqual(line, [str(p) for p in \
+                                self.tree.line_of_succession()])
+        tree = FamilyTree.open_snapshot(self.path)
+        tree.close()
+        tree.close()
+        self.assertTrue(tree.map.closed)
+        self.assertRaises(ValueError, tree.load_children, tree.root)
+
+    def testBadFile(self):
+        '''Test that other files are refused.'''
+
+        with open(self.path, 'wb') as f:
+            f.write(b'\0' * 256)
+        self.assertRaises(ValueError, FamilyTree.open_snapshot, self.path)
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestSnapshot)
+    alltests = unittest.TestSuite([suite1])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -1,179 +1,709 @@
-import unittest
-from royals import *
-
-
-class TestAbsolute(unittest.TestCase):
-    '''Test lines of succession in absolute primogeniture FamilyTree.'''
-
-    def setUp(self):
-        self.tree = FamilyTree(True)
-        self.sarah = Person('Sarah', 'Gibeau', 'F')
-        self.mr = Person('Mr', 'Gibeau', 'M')
-        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
-        self.zeus = self.gibeaus.have_son('Zeus')
-        self.aph = self.gibeaus.have_daughter('Aphrodite')
-        self.di = self.gibeaus.have_son('Dionysus')
-        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
-        self.herc = self.zeuses.have_son('Hercules')
-        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
-        self.art = self.aphes.have_daughter('Artemis')
-        self.ath = self.aphes.have_daughter('Athena')
-        self.tree.root = self.gibeaus
-
-    def tearDown(self):
-        pass
-
-    def testCrown(self):
-        '''Test the crown method.'''
-
-        self.tree.crown(self.zeus.royal)
-        self.assertEqual(self.zeuses.ancestor_of_ruler, True)
-        self.assertEqual(self.gibeaus.ancestor_of_ruler, True)
-        self.assertEqual(self.herc.ancestor_of_ruler, False)
-        self.assertEqual(self.aphes.ancestor_of_ruler, False)
-        self.assertEqual(self.art.ancestor_of_ruler, False)
-        self.assertEqual(self.ath.ancestor_of_ruler, False)
-        self.assertEqual(self.di.ancestor_of_ruler, False)
-
-    def testNodeSuccession(self):
-        '''Test line_of_succession as called from RoyalNode'''
-
-        self.assertEqual(self.gibeaus.line_of_succession(), \
-        [self.sarah, self.zeuses.royal, self.herc.royal, self.aphes.royal, \
-        self.art.royal, self.ath.royal, self.di.royal])
-
-    def testRootRuler(self):
-        '''Test with the original couple as ruler.'''
-
-        self.tree.crown(self.gibeaus.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.gibeaus.royal, \
-        self.zeuses.royal, self.herc.royal, self.aphes.royal, \
-        self.art.royal, self.ath.royal, self.di.royal])
-
-    def testLeafRuler(self):
-        '''Test with leaf as ruler.'''
-
-        self.tree.crown(self.art.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.art.royal, \
-        self.aph.royal, self.ath.royal, self.gibeaus.royal, \
-        self.zeus.royal, self.herc.royal, self.di.royal])
-
-    def testInternalRuler(self):
-        '''Test with internal node as ruler.'''
-
-        self.tree.crown(self.zeuses.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.zeuses.royal, \
-        self.herc.royal, self.gibeaus.royal, self.aphes.royal, \
-        self.art.royal, self.ath.royal, self.di.royal])
-
-    def testDeadRoyal(self):
-        '''Test with one royal dead and removed from line.'''
-
-        self.tree.crown(self.gibeaus.royal)
-        self.tree.kill(self.zeuses.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
-        self.herc.royal, self.aphes.royal, self.art.royal, \
-        self.ath.royal, self.di.royal])
-
-
-class TestGenderMale(unittest.TestCase):
-    '''Test FamiltyTree with male gender preference.'''
-
-    def setUp(self):
-        self.tree = FamilyTree(False)
-        self.sarah = Person('Sarah', 'Gibeau', 'F')
-        self.mr = Person('Mr', 'Gibeau', 'M')
-        self.gibeaus = CoupleNode(self.mr, self.sarah, self.tree)
-        self.zeus = self.gibeaus.have_son('Zeus')
-        self.aph = self.gibeaus.have_daughter('Aphrodite')
-        self.di = self.gibeaus.have_son('Dionysus')
-        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
-        self.herc = self.zeuses.have_son('Hercules')
-        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
-        self.art = self.aphes.have_daughter('Artemis')
-        self.ath = self.aphes.have_daughter('Athena')
-        self.tree.root = self.gibeaus
-
-    def tearDown(self):
-        pass
-
-    def testRootRuler(self):
-        '''Test with root as ruler and male preference.'''
-
-        self.tree.crown(self.gibeaus.royal)
-        self.assertEqual(self.tree.line_of_succession(),
-        [self.gibeaus.royal, self.zeuses.royal, self.herc.royal, \
-        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
-
-    def testInternalRuler(self):
-        '''Test with internal node as ruler and male preference.'''
-
-        self.tree.crown(self.zeuses.royal)
-        self.assertEqual(self.tree.line_of_succession(), \
-        [self.zeuses.royal, self.herc.royal, self.gibeaus.royal, \
-        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
-
-    def testLeafRuler(self):
-        '''Test with leaf as ruler and male preference.'''
-
-        self.tree.crown(self.zeuses.royal)
-        self.assertEqual(self.tree.line_of_succession(), \
-        [self.zeuses.royal, self.herc.royal, self.gibeaus.royal, \
-        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
-
-
-class TestGenderFemale(unittest.TestCase):
-    '''Test FamilyTree with female gender preference.'''
-
-    def setUp(self):
-        self.tree = FamilyTree(False)
-        self.sarah = Person('Sarah', 'Gibeau', 'F')
-        self.mr = Person('Mr', 'gibeau', 'M')
-        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
-        self.zeus = self.gibeaus.have_son('Zeus')
-        self.aph = self.gibeaus.have_daughter('Aphrodite')
-        self.di = self.gibeaus.have_son('Dionysus')
-        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
-        self.herc = self.zeuses.have_son('Hercules')
-        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
-        self.art = self.aphes.have_daughter('Artemis')
-        self.ath = self.aphes.have_daughter('Athena')
-        self.tree.root = self.gibeaus
-
-    def tearDown(self):
-        pass
-
-    def testRootRuler(self):
-        '''Test with root as ruler and female preference.'''
-
-        self.tree.crown(self.gibeaus.royal)
-        self.assertEqual(self.tree.line_of_succession(), \
-        [self.gibeaus.royal, self.aphes.royal, self.art.royal, \
-        self.ath.royal, self.zeuses.royal, self.herc.royal, \
-        self.di.royal])
-
-    def testInternalRuler(self):
-        '''Test with internal node as ruler and female preference.'''
-
-        self.tree.crown(self.zeuses.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.zeuses.royal, \
-        self.herc.royal, self.gibeaus.royal, self.aphes.royal, \
-        self.art.royal, self.ath.royal, self.di.royal])
-
-    def testLeafRuler(self):
-        '''Test with leaf as ruler and female preference.'''
-
-        self.tree.crown(self.di.royal)
-        self.assertEqual(self.tree.line_of_succession(), [self.di.royal, \
-        self.gibeaus.royal, self.aphes.royal, self.art.royal, \
-        self.ath.royal, self.zeus.royal, self.herc.royal])
-
-
-if __name__ == '__main__':
-    # go!
-    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestAbsolute)
-    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestGenderMale)
-    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestGenderFemale)
-    alltests = unittest.TestSuite([suite1, suite2, suite3])
-    runner = unittest.TextTestRunner()
-    runner.run(alltests)
+import io
+import unittest
+from royals import *
+
+
+class TestAbsolute(unittest.TestCase):
+    '''Test lines of succession in absolute primogeniture FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+        self.tree.root = self.gibeaus
+
+    def tearDown(self):
+        pass
+
+    def testCrown(self):
+        '''Test the crown method.'''
+
+        self.tree.crown(self.zeus.royal)
+        self.assertEqual(self.zeuses.ancestor_of_ruler, True)
+        self.assertEqual(self.gibeaus.ancestor_of_ruler, True)
+        self.assertEqual(self.herc.ancestor_of_ruler, False)
+        self.assertEqual(self.aphes.ancestor_of_ruler, False)
+        self.assertEqual(self.art.ancestor_of_ruler, False)
+        self.assertEqual(self.ath.ancestor_of_ruler, False)
+        self.assertEqual(self.di.ancestor_of_ruler, False)
+
+    def testRecrown(self):
+        '''Test that crowning again clears the old ruler's ancestors.'''
+
+        self.tree.crown(self.art.royal)
+        self.tree.crown(self.herc.royal)
+        self.assertEqual(self.art.ancestor_of_ruler, False)
+        self.assertEqual(self.aphes.ancestor_of_ruler, False)
+        self.assertEqual(self.herc.ancestor_of_ruler, True)
+        self.assertEqual(self.zeuses.ancestor_of_ruler, True)
+        self.assertEqual(self.gibeaus.ancestor_of_ruler, True)
+        self.assertEqual(self.tree.line_of_succession(), [self.herc.royal, \
+        self.zeus.royal, self.sarah, self.aph.royal, self.art.royal, \
+        self.ath.royal, self.di.royal])
+
+    def testNodeSuccession(self):
+        '''Test line_of_succession as called from RoyalNode'''
+
+        self.assertEqual(self.gibeaus.line_of_succession(), \
+        [self.sarah, self.zeuses.royal, self.herc.royal, self.aphes.royal, \
+        self.art.royal, self.ath.royal, self.di.royal])
+
+    def testRootRuler(self):
+        '''Test with the original couple as ruler.'''
+
+        self.tree.crown(self.gibeaus.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.gibeaus.royal, \
+        self.zeuses.royal, self.herc.royal, self.aphes.royal, \
+        self.art.royal, self.ath.royal, self.di.royal])
+
+    def testLeafRuler(self):
+        '''Test with leaf as ruler.'''
+
+        self.tree.crown(self.art.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.art.royal, \
+        self.aph.royal, self.ath.royal, self.gibeaus.royal, \
+        self.zeus.royal, self.herc.royal, self.di.royal])
+
+    def testInternalRuler(self):
+        '''Test with internal node as ruler.'''
+
+        self.tree.crown(self.zeuses.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.zeuses.royal, \
+        self.herc.royal, self.gibeaus.royal, self.aphes.royal, \
+        self.art.royal, self.ath.royal, self.di.royal])
+
+    def testDeadRoyal(self):
+        '''Test with one royal dead and removed from line.'''
+
+        self.tree.crown(self.gibeaus.royal)
+        self.tree.kill(self.zeuses.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.herc.royal, self.aphes.royal, self.art.royal, \
+        self.ath.royal, self.di.royal])
+
+
+class TestGenderMale(unittest.TestCase):
+    '''Test FamiltyTree with male gender preference.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.mr, self.sarah, self.tree)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+        self.tree.root = self.gibeaus
+
+    def tearDown(self):
+        pass
+
+    def testRootRuler(self):
+        '''Test with root as ruler and male preference.'''
+
+        self.tree.crown(self.gibeaus.royal)
+        self.assertEqual(self.tree.line_of_succession(),
+        [self.gibeaus.royal, self.zeuses.royal, self.herc.royal, \
+        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
+
+    def testInternalRuler(self):
+        '''Test with internal node as ruler and male preference.'''
+
+        self.tree.crown(self.zeuses.royal)
+        self.assertEqual(self.tree.line_of_succession(), \
+        [self.zeuses.royal, self.herc.royal, self.gibeaus.royal, \
+        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
+
+    def testLeafRuler(self):
+        '''Test with leaf as ruler and male preference.'''
+
+        self.tree.crown(self.zeuses.royal)
+        self.assertEqual(self.tree.line_of_succession(), \
+        [self.zeuses.royal, self.herc.royal, self.gibeaus.royal, \
+        self.di.royal, self.aphes.royal, self.art.royal, self.ath.royal])
+
+
+class TestGenderFemale(unittest.TestCase):
+    '''Test FamilyTree with female gender preference.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+        self.tree.root = self.gibeaus
+
+    def tearDown(self):
+        pass
+
+    def testRootRuler(self):
+        '''Test with root as ruler and female preference.'''
+
+        self.tree.crown(self.gibeaus.royal)
+        self.assertEqual(self.tree.line_of_succession(), \
+        [self.gibeaus.royal, self.aphes.royal, self.art.royal, \
+        self.ath.royal, self.zeuses.royal, self.herc.royal, \
+        self.di.royal])
+
+    def testInternalRuler(self):
+        '''Test with internal node as ruler and female preference.'''
+
+        self.tree.crown(self.zeuses.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.zeuses.royal, \
+        self.herc.royal, self.gibeaus.royal, self.aphes.royal, \
+        self.art.royal, self.ath.royal, self.di.royal])
+
+    def testLeafRuler(self):
+        '''Test with leaf as ruler and female preference.'''
+
+        self.tree.crown(self.di.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.di.royal, \
+        self.gibeaus.royal, self.aphes.royal, self.art.royal, \
+        self.ath.royal, self.zeus.royal, self.herc.royal])
+
+
+class TestCache(unittest.TestCase):
+    '''Test caching of the line of succession in FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+
+    def tearDown(self):
+        pass
+
+    def testHits(self):
+        '''Test that repeated queries are copied from the cache.'''
+
+        line = self.tree.line_of_succession()
+        self.assertEqual(self.tree.line_of_succession(), line)
+        self.assertEqual(self.tree.cache_misses, 1)
+        self.assertEqual(self.tree.cache_hits, 1)
+        line.clear()
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.zeus.royal, self.aph.royal])
+        self.assertEqual(self.tree.cache_hits, 2)
+
+    def testInvalidate(self):
+        '''Test that each event invalidates the cached line.'''
+
+        self.tree.line_of_succession()
+        zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.zeus.royal, self.aph.royal])
+        herc = zeuses.have_son('Hercules')
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.zeus.royal, herc.royal, self.aph.royal])
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        herc.royal, self.aph.royal])
+        self.tree.crown(self.aph.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.aph.royal, \
+        self.sarah, herc.royal])
+        self.assertEqual(self.tree.cache_misses, 5)
+        self.assertEqual(self.tree.cache_hits, 0)
+
+
+class TestMemo(unittest.TestCase):
+    '''Test memoized orderings of RoyalNode subtrees.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+
+    def tearDown(self):
+        pass
+
+    def testOrder(self):
+        '''Test the memoized order under gender preference.'''
+
+        self.tree.line_of_succession()
+        self.assertEqual(self.gibeaus.order, [self.aphes, self.zeuses])
+        self.assertEqual(self.gibeaus.living, 4)
+        self.assertEqual(self.zeuses.living, 1)
+
+    def testPathInvalidation(self):
+        '''Test that a birth only updates its ancestors.'''
+
+        self.tree.line_of_succession()
+        herc = self.zeuses.have_son('Hercules')
+        #The newborn is put into the parent's memoized order and counted
+        #by its ancestors
+        self.assertEqual(self.zeuses.order, [herc])
+        self.assertEqual(self.zeuses.living, 2)
+        self.assertEqual(self.gibeaus.living, 5)
+        self.assertEqual(self.gibeaus.order, [self.aphes, self.zeuses])
+        self.assertEqual(self.aphes.living, 2)
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.aph.royal, self.art.royal, self.zeus.royal, herc.royal])
+
+    def testDeadBranch(self):
+        '''Test that dead branches are counted and skipped.'''
+
+        self.tree.kill(self.aph.royal)
+        self.tree.kill(self.art.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.zeus.royal])
+        self.assertEqual(self.aphes.living, 0)
+
+    def testCountedEvents(self):
+        '''Test that deaths and marriages keep the living counts.'''
+
+        self.tree.line_of_succession()
+        self.tree.kill(self.art.royal)
+        self.assertEqual(self.aphes.living, 1)
+        self.assertEqual(self.gibeaus.living, 3)
+        self.assertEqual(self.aphes.order, [self.art])
+        zeuses = self.zeuses.marry(Person('Leto', 'Titan', 'F'))
+        self.assertEqual(zeuses.living, 1)
+        self.assertEqual(self.gibeaus.order, [self.aphes, zeuses])
+        self.assertEqual(self.gibeaus.living, 3)
+        self.assertEqual(self.tree.line_of_succession(), [self.sarah, \
+        self.aph.royal, self.zeus.royal])
+
+
+class TestLazy(unittest.TestCase):
+    '''Test lazy iteration over the line of succession.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.mr, self.sarah, self.tree)
+        self.tree.start(self.gibeaus)
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+
+    def tearDown(self):
+        pass
+
+    def testIter(self):
+        '''Test that iteration gives the full line in order.'''
+
+        self.tree.crown(self.herc.royal)
+        line = self.tree.line_of_succession()
+        self.assertEqual(list(self.herc.iter_succession()), line)
+        self.assertEqual(list(self.tree.iter_succession()), line)
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(list(self.tree.iter_succession()), \
+        [self.herc.royal, self.mr, self.aph.royal, self.art.royal])
+
+    def testHeirs(self):
+        '''Test that heirs only walks as far as needed.'''
+
+        self.assertEqual(self.tree.heirs(3), [self.mr, self.zeus.royal, \
+        self.herc.royal])
+        self.assertEqual(self.aphes.order, None)
+        self.assertEqual(self.tree.heirs(10), [self.mr, self.zeus.royal, \
+        self.herc.royal, self.aph.royal, self.art.royal])
+        self.assertEqual(self.tree.heirs(0), [])
+
+
+class TestRank(unittest.TestCase):
+    '''Test rank_of and heir_at queries.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+
+    def tearDown(self):
+        pass
+
+    def testRootRuler(self):
+        '''Test queries against the line from the original couple.'''
+
+        line = [self.sarah, self.aph.royal, self.art.royal, \
+        self.ath.royal, self.zeus.royal, self.herc.royal, self.di.royal]
+        for k in range(len(line)):
+            self.assertTrue(self.tree.heir_at(k) is line[k])
+            self.assertEqual(self.tree.rank_of(line[k]), k)
+        self.assertRaises(IndexError, self.tree.heir_at, 7)
+        self.assertRaises(IndexError, self.tree.heir_at, -1)
+
+    def testLeafRuler(self):
+        '''Test queries with a leaf as ruler and dead royals.'''
+
+        self.tree.crown(self.art.royal)
+        self.tree.kill(self.aph.royal)
+        self.assertEqual(self.tree.rank_of(self.art.royal), 0)
+        self.assertEqual(self.tree.rank_of(self.ath.royal), 1)
+        self.assertEqual(self.tree.rank_of(self.sarah), 2)
+        self.assertEqual(self.tree.rank_of(self.herc.royal), 4)
+        self.assertEqual(self.tree.rank_of(self.aph.royal), None)
+        self.assertTrue(self.tree.heir_at(5) is self.di.royal)
+        self.assertRaises(NoSuchRoyalError, self.tree.rank_of, \
+                          Person('Venus', 'Flytrap', 'F'))
+
+
+class TestWhatIf(unittest.TestCase):
+    '''Test succession_for_rulers.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.art = self.aphes.have_daughter('Artemis')
+        self.ath = self.aphes.have_daughter('Athena')
+        self.tree.crown(self.ath.royal)
+
+    def tearDown(self):
+        pass
+
+    def testRulers(self):
+        '''Test that each line matches crowning that ruler.'''
+
+        self.tree.kill(self.zeus.royal)
+        people = [self.herc.royal, self.sarah, self.art.royal, \
+                  self.di.royal]
+        lines = self.tree.succession_for_rulers(people)
+        self.assertTrue(self.tree.ruler is self.ath)
+        for person, line in zip(people, lines):
+            self.tree.crown(person)
+            self.assertEqual(line, self.tree.line_of_succession())
+
+    def testErrors(self):
+        '''Test unknown and dead rulers.'''
+
+        self.tree.kill(self.di.royal)
+        self.assertRaises(DeadRoyalError, self.tree.succession_for_rulers, \
+                          [self.sarah, self.di.royal])
+        self.assertRaises(NoSuchRoyalError, \
+                          self.tree.succession_for_rulers, \
+                          [Person('Venus', 'Flytrap', 'F')])
+
+
+class TestLaws(unittest.TestCase):
+    '''Test agnatic and semi-Salic succession and changing laws.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(False, AGNATIC)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.mr, self.sarah, self.tree)
+        self.tree.start(self.gibeaus)
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.di = self.gibeaus.have_son('Dionysus')
+        self.aphes = self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.eros = self.aphes.have_son('Eros')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.heb = self.zeuses.have_daughter('Hebe')
+
+    def tearDown(self):
+        pass
+
+    def testAgnatic(self):
+        '''Test that only the male line is in line.'''
+
+        self.assertEqual(self.tree.line_of_succession(), [self.mr, \
+        self.zeus.royal, self.herc.royal, self.di.royal])
+        self.assertEqual(self.tree.rank_of(self.di.royal), 3)
+        self.assertEqual(self.tree.rank_of(self.eros.royal), None)
+        self.assertTrue(self.tree.heir_at(2) is self.herc.royal)
+
+    def testSemiSalic(self):
+        '''Test that the male line comes before everyone else.'''
+
+        self.tree.set_law(SEMI_SALIC)
+        self.tree.kill(self.di.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.mr, \
+        self.zeus.royal, self.herc.royal, self.heb.royal, \
+        self.aph.royal, self.eros.royal])
+        self.assertEqual(self.tree.rank_of(self.aph.royal), 4)
+        self.assertTrue(self.tree.heir_at(3) is self.heb.royal)
+        self.assertEqual(self.tree.heirs(4)[-1], self.heb.royal)
+
+    def testCrownedOutOfLine(self):
+        '''Test a ruler the law would leave out of line.'''
+
+        self.tree.crown(self.aphes.royal)
+        self.assertEqual(self.tree.line_of_succession(), [self.aph.royal, \
+        self.eros.royal, self.mr, self.zeus.royal, self.herc.royal, \
+        self.di.royal])
+        self.assertEqual(self.tree.succession_for_rulers( \
+                         [self.aph.royal])[0], \
+                         self.tree.line_of_succession())
+
+    def testSetLaw(self):
+        '''Test that changing the law reorders the line.'''
+
+        self.tree.line_of_succession()
+        self.tree.absolute = True
+        self.assertTrue(self.tree.law is ABSOLUTE)
+        self.assertEqual(self.tree.line_of_succession(), [self.mr, \
+        self.aph.royal, self.eros.royal, self.zeus.royal, \
+        self.herc.royal, self.heb.royal, self.di.royal])
+        self.tree.set_law(COGNATIC)
+        self.assertFalse(self.tree.absolute)
+        self.assertEqual(self.tree.heirs(4), [self.mr, self.zeus.royal, \
+        self.herc.royal, self.heb.royal])
+
+    def testBirth(self):
+        '''Test that a birth is ranked into its parent's order.'''
+
+        self.tree.set_law(COGNATIC)
+        self.tree.line_of_succession()
+        ares = self.zeuses.have_son('Ares')
+        self.assertEqual(self.zeuses.order, [self.herc, ares, self.heb])
+        self.tree.set_law(AGNATIC)
+        self.tree.line_of_succession()
+        self.zeuses.have_daughter('Harmonia')
+        self.assertEqual(self.zeuses.order, [self.herc, ares])
+
+
+class TestSubscribe(unittest.TestCase):
+    '''Test notifying subscribers of changes to the line.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.diffs = []
+        self.tree.subscribe(self.diffs.append)
+
+    def tearDown(self):
+        pass
+
+    def testBirthAndDeath(self):
+        '''Test the diffs of a birth and a death.'''
+
+        heb = self.zeuses.have_daughter('Hebe')
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(self.diffs, [
+            {'event': 'have_daughter', 'inserted': [(heb.royal, 3)],
+             'removed': [], 'moved': []},
+            {'event': 'kill', 'inserted': [],
+             'removed': [(self.zeus.royal, 1)], 'moved': []}])
+
+    def testCrown(self):
+        '''Test that a coronation lists only the heirs that moved.'''
+
+        self.tree.crown(self.herc.royal)
+        self.assertEqual(self.diffs[0]['moved'], [
+            (self.herc.royal, 2, 0), (self.sarah, 0, 2)])
+        self.tree.crown(self.aph.royal)
+        self.assertEqual(self.diffs[1]['moved'], [(self.aph.royal, 3, 0), \
+                         (self.sarah, 2, 1), (self.zeus.royal, 1, 2)])
+
+    def testMarry(self):
+        '''Test that a marriage changes nothing in line.'''
+
+        self.aph.marry(Person('Apollo', 'A', 'M'))
+        self.assertEqual(self.diffs, [{'event': 'marry', 'inserted': [],
+                                       'removed': [], 'moved': []}])
+
+    def testLaw(self):
+        '''Test the diffs of changes of law.'''
+
+        self.tree.set_law(AGNATIC)
+        self.tree.absolute = False
+        self.assertEqual(self.diffs, [
+            {'event': 'law', 'inserted': [],
+             'removed': [(self.zeus.royal, 1), (self.herc.royal, 2)],
+             'moved': []},
+            {'event': 'law', 'inserted': [(self.zeus.royal, 2), \
+                                          (self.herc.royal, 3)],
+             'removed': [], 'moved': []}])
+
+    def testBatch(self):
+        '''Test that a batch is one diff, and a failed one none.'''
+
+        with self.tree.batch():
+            self.tree.kill(self.sarah)
+            self.tree.kill(self.zeus.royal)
+        self.assertEqual(len(self.diffs), 1)
+        self.assertEqual(self.diffs[0]['event'], 'batch')
+        self.assertEqual(self.diffs[0]['removed'], [(self.sarah, 0), \
+                         (self.zeus.royal, 1)])
+        try:
+            with self.tree.batch():
+                self.tree.kill(self.herc.royal)
+                raise KeyError
+        except KeyError:
+            pass
+        self.assertEqual(len(self.diffs), 1)
+
+    def testUnsubscribe(self):
+        '''Test that unsubscribed functions are not called.'''
+
+        self.tree.unsubscribe(self.diffs.append)
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(self.diffs, [])
+
+
+class TestLiving(unittest.TestCase):
+    '''Test rendering only the living branches of a FamilyTree.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True, AGNATIC)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.zeus = self.gibeaus.have_son('Zeus')
+        self.aph = self.gibeaus.have_daughter('Aphrodite')
+        self.zeuses = self.zeus.marry(Person('Hera', 'Juno', 'F'))
+        self.herc = self.zeuses.have_son('Hercules')
+        self.hebe = self.zeuses.have_daughter('Hebe')
+
+    def tearDown(self):
+        pass
+
+    def render(self):
+        out = io.StringIO()
+        self.tree.render(out, living=True)
+        return out.getvalue().split()
+
+    def testRender(self):
+        '''Test that dead subtrees are left out whatever the law.'''
+
+        self.tree.kill(self.herc.royal)
+        self.tree.kill(self.zeus.royal)
+        #Zeus's branch is out of the line under the law, but not the tree
+        self.assertEqual(self.render().count('Gibeau'), 5)
+        self.assertFalse('Hercules' in self.render())
+        self.tree.kill(self.hebe.royal)
+        self.assertFalse('Zeus' in self.render())
+        self.assertTrue('Aphrodite' in self.render())
+        self.assertEqual(self.gibeaus.descendants, 2)
+
+    def testCounts(self):
+        '''Test that counts follow events once made.'''
+
+        self.render()
+        self.assertEqual(self.gibeaus.descendants, 5)
+        aphes = self.aph.marry(Person('Ares', 'A', 'M'))
+        eros = aphes.have_son('Eros')
+        self.assertEqual(self.gibeaus.descendants, 6)
+        self.tree.crown(eros.royal)
+        self.tree.kill(self.zeus.royal)
+        self.assertEqual(self.zeuses.descendants, 2)
+        try:
+            with self.tree.batch():
+                aphes.have_son('Harmonia')
+                self.tree.kill(self.hebe.royal)
+                self.tree.kill(self.sarah)
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(self.zeuses.descendants, 2)
+        self.assertEqual(self.gibeaus.descendants, 5)
+        self.assertTrue('Eros' in self.render())
+
+
+class TestDeep(unittest.TestCase):
+    '''Test a single-line dynasty deeper than the recursion limit.'''
+
+    def setUp(self):
+        self.tree = FamilyTree(True)
+        self.sarah = Person('Sarah', 'Gibeau', 'F')
+        self.mr = Person('Mr', 'Gibeau', 'M')
+        self.gibeaus = CoupleNode(self.sarah, self.mr, self.tree)
+        self.tree.start(self.gibeaus)
+        self.last = self.gibeaus
+        for i in range(20000):
+            self.last = self.last.have_son('Zeus').marry( \
+                Person('Hera', 'Juno', 'F'))
+
+    def tearDown(self):
+        pass
+
+    def testSuccession(self):
+        '''Test line of succession, crown, kill and search.'''
+
+        self.assertEqual(len(self.tree.line_of_succession()), 20001)
+        self.tree.crown(self.last.royal)
+        line = self.tree.line_of_succession()
+        self.assertTrue(line[0] is self.last.royal)
+        self.assertTrue(line[-1] is self.sarah)
+        self.tree.kill(self.sarah)
+        self.assertEqual(len(self.tree.line_of_succession()), 20000)
+        self.assertTrue(self.gibeaus.search(self.last.royal) is self.last)
+        self.assertEqual(len(self.gibeaus.search_helper()), 20001)
+        self.assertEqual(self.last.depth(), 20001)
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestAbsolute)
+    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestGenderMale)
+    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestGenderFemale)
+    suite4 = unittest.TestLoader().loadTestsFromTestCase(TestCache)
+    suite5 = unittest.TestLoader().loadTestsFromTestCase(TestMemo)
+    suite6 = unittest.TestLoader().loadTestsFromTestCase(TestLazy)
+    suite7 = unittest.TestLoader().loadTestsFromTestCase(TestRank)
+    suite8 = unittest.TestLoader().loadTestsFromTestCase(TestWhatIf)
+    suite9 = unittest.TestLoader().loadTestsFromTestCase(TestLaws)
+    suite10 = unittest.TestLoader().loadTestsFromTestCase(TestSubscribe)
+    suite11 = unittest.TestLoader().loadTestsFromTestCase(TestLiving)
+    suite12 = unittest.TestLoader().loadTestsFromTestCase(TestDeep)
+    alltests = unittest.TestSuite([suite1, suite2, suite3, suite4, suite5, \
+                                   suite6, suite7, suite8, suite9, suite10, \
+                                   suite11, suite12])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
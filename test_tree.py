@@ -1,121 +1,231 @@
-import unittest
-from tree import *
-
-
-class TestEmptyTree(unittest.TestCase):
-
-    def setUp(self):
-        self.tree = Tree()
-
-    def tearDown(self):
-        pass
-
-    def testIsEmpty(self):
-        '''Test that tree has no root.'''
-
-        self.assertTrue(not self.tree.root)
-
-    def testTraverse(self):
-        '''Test that traverse method does nothing and raises
-        no errors.'''
-
-        self.tree.traverse(adder)
-        self.assertEqual(self.tree.root, None)
-
-
-class TestSingleNode(unittest.TestCase):
-
-    def setUp(self):
-        self.tree = Tree()
-        self.four = IntNode(4, self.tree)
-        self.tree.root = self.four
-
-    def tearDown(self):
-        pass
-
-    def testRoot(self):
-        '''Test that root and children are correctly assigned.'''
-
-        self.assertTrue(self.tree.root is self.four)
-        self.assertTrue(not self.tree.root.children)
-
-    def testDepth(self):
-        '''Test depth method on single root node.'''
-
-        self.assertEqual(self.tree.root.depth(), 1)
-
-    def testNodeTraverse(self):
-        '''Test that node traverse method is correctly applied.'''
-
-        self.tree.root.traverse(adder)
-        self.assertEqual(self.tree.root.intvalue, 5)
-
-    def testTreeTraverse(self):
-        '''Test that tree traverse method is correctly applied.'''
-
-        self.tree.traverse(adder)
-        self.assertEqual(self.tree.root.intvalue, 5)
-
-
-class TestLargeTree(unittest.TestCase):
-
-    def setUp(self):
-        self.tree = Tree()
-        self.four = IntNode(4, self.tree)
-        self.tree.root = self.four
-        self.one = self.four.add_child(1)
-        self.two = self.four.add_child(2)
-        self.nine = self.one.add_child(9)
-        self.three = self.one.add_child(3)
-        self.six = self.three.add_child(6)
-
-    def tearDown(self):
-        pass
-
-    def testDepth(self):
-        '''Test depth method.'''
-
-        self.assertEqual(self.four.depth(), 1)
-        self.assertEqual(self.one.depth(), 2)
-        self.assertEqual(self.two.depth(), 2)
-        self.assertEqual(self.nine.depth(), 3)
-        self.assertEqual(self.three.depth(), 3)
-        self.assertEqual(self.six.depth(), 4)
-
-    def testNodeTraverse(self):
-        '''Test node traverse method.'''
-
-        self.three.traverse(adder)
-        self.assertEqual(self.three.intvalue, 4)
-        self.assertEqual(self.six.intvalue, 7)
-        self.assertEqual(self.one.intvalue, 1)
-
-    def testTreeTraverse(self):
-        '''Test tree traverse method.'''
-
-        self.tree.traverse(adder)
-        self.assertEqual(self.four.intvalue, 5)
-        self.assertEqual(self.one.intvalue, 2)
-        self.assertEqual(self.two.intvalue, 3)
-        self.assertEqual(self.nine.intvalue, 10)
-        self.assertEqual(self.three.intvalue, 4)
-        self.assertEqual(self.six.intvalue, 7)
-
-
-def adder(intnode):
-    '''(IntNode) -> None
-
-    Increase node's value by one.
-    '''
-
-    intnode.intvalue += 1
-
-
-if __name__ == '__main__':
-    # go!
-    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestEmptyTree)
-    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestSingleNode)
-    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestLargeTree)
-    alltests = unittest.TestSuite([suite1, suite2, suite3])
-    runner = unittest.TextTestRunner()
-    runner.run(alltests)
+import io
+import pickle
+import unittest
+from contextlib import redirect_stdout
+from tree import *
+
+
+class TestEmptyTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Tree()
+
+    def tearDown(self):
+        pass
+
+    def testIsEmpty(self):
+        '''Test that tree has no root.'''
+
+        self.assertTrue(not self.tree.root)
+
+    def testTraverse(self):
+        '''Test that traverse method does nothing and raises
+        no errors.'''
+
+        self.tree.traverse(adder)
+        self.assertEqual(self.tree.root, None)
+
+
+class TestSingleNode(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Tree()
+        self.four = IntNode(4, self.tree)
+        self.tree.root = self.four
+
+    def tearDown(self):
+        pass
+
+    def testRoot(self):
+        '''Test that root and children are correctly assigned.'''
+
+        self.assertTrue(self.tree.root is self.four)
+        self.assertTrue(not self.tree.root.children)
+
+    def testDepth(self):
+        '''Test depth method on single root node.'''
+
+        self.assertEqual(self.tree.root.depth(), 1)
+
+    def testNodeTraverse(self):
+        '''Test that node traverse method is correctly applied.'''
+
+        self.tree.root.traverse(adder)
+        self.assertEqual(self.tree.root.intvalue, 5)
+
+    def testTreeTraverse(self):
+        '''Test that tree traverse method is correctly applied.'''
+
+        self.tree.traverse(adder)
+        self.assertEqual(self.tree.root.intvalue, 5)
+
+
+class TestLargeTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Tree()
+        self.four = IntNode(4, self.tree)
+        self.tree.root = self.four
+        self.one = self.four.add_child(1)
+        self.two = self.four.add_child(2)
+        self.nine = self.one.add_child(9)
+        self.three = self.one.add_child(3)
+        self.six = self.three.add_child(6)
+
+    def tearDown(self):
+        pass
+
+    def testDepth(self):
+        '''Test depth method.'''
+
+        self.assertEqual(self.four.depth(), 1)
+        self.assertEqual(self.one.depth(), 2)
+        self.assertEqual(self.two.depth(), 2)
+        self.assertEqual(self.nine.depth(), 3)
+        self.assertEqual(self.three.depth(), 3)
+        self.assertEqual(self.six.depth(), 4)
+
+    def testNodeTraverse(self):
+        '''Test node traverse method.'''
+
+        self.three.traverse(adder)
+        self.assertEqual(self.three.intvalue, 4)
+        self.assertEqual(self.six.intvalue, 7)
+        self.assertEqual(self.one.intvalue, 1)
+
+    def testTreeTraverse(self):
+        '''Test tree traverse method.'''
+
+        self.tree.traverse(adder)
+        self.assertEqual(self.four.intvalue, 5)
+        self.assertEqual(self.one.intvalue, 2)
+        self.assertEqual(self.two.intvalue, 3)
+        self.assertEqual(self.nine.intvalue, 10)
+        self.assertEqual(self.three.intvalue, 4)
+        self.assertEqual(self.six.intvalue, 7)
+
+    def testPreorder(self):
+        '''Test the preorder iterator, with and without pruning.'''
+
+        self.assertEqual([n.intvalue for n in self.four.preorder()], \
+                         [4, 1, 9, 3, 6, 2])
+        self.assertEqual([n.intvalue for n in \
+                          self.four.preorder(lambda n: n is self.three)], \
+                         [4, 1, 9, 2])
+
+    def testPostorder(self):
+        '''Test the postorder iterator, with and without pruning.'''
+
+        self.assertEqual([n.intvalue for n in self.four.postorder()], \
+                         [9, 6, 3, 1, 2, 4])
+        self.assertEqual([n.intvalue for n in \
+                          self.four.postorder(lambda n: n is self.one)], \
+                         [2, 4])
+
+    def testWalk(self):
+        '''Test the pre-order walk carrying depths.'''
+
+        self.assertEqual([(n.intvalue, d) for (n, d) in self.four.walk()], \
+                         [(4, 1), (1, 2), (9, 3), (3, 3), (6, 4), (2, 2)])
+        self.assertEqual([n.intvalue for (n, d) in self.four.walk(2)], \
+                         [4, 1, 2])
+
+    def testRender(self):
+        '''Test rendering the tree, whole and cut short.'''
+
+        out = io.StringIO()
+        self.assertEqual(self.tree.render(out), 6)
+        self.assertEqual(out.getvalue(), '    4\n        1\n' + \
+                         '            9\n            3\n' + \
+                         '                6\n        2\n')
+        printed = io.StringIO()
+        with redirect_stdout(printed):
+            self.tree.print_tree()
+        self.assertEqual(printed.getvalue(), out.getvalue())
+        out = io.StringIO()
+        self.assertEqual(self.tree.render(out, limit=3, max_depth=2), 3)
+        self.assertEqual(out.getvalue(), '    4\n        1\n        2\n')
+
+    def testPickle(self):
+        '''Test pickling a node, whose parent and tree are weakly held.'''
+
+        tree, three = pickle.loads(pickle.dumps((self.tree, self.three)))
+        self.assertTrue(three.parent.parent is tree.root)
+        self.assertTrue(three.tree is tree)
+        self.assertEqual([n.intvalue for n in tree.root.preorder()], \
+                         [4, 1, 9, 3, 6, 2])
+
+    def testLevelorder(self):
+        '''Test the levelorder iterator, with and without pruning.'''
+
+        self.assertEqual([n.intvalue for n in self.four.levelorder()], \
+                         [4, 1, 2, 9, 3, 6])
+        self.assertEqual([n.intvalue for n in \
+                          self.four.levelorder(lambda n: n is self.nine)], \
+                         [4, 1, 2, 3, 6])
+
+
+class TestDeepTree(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = Tree()
+        self.root = IntNode(0, self.tree)
+        self.tree.root = self.root
+        self.leaf = self.root
+        for i in range(1, 100000):
+            self.leaf = self.leaf.add_child(i)
+
+    def tearDown(self):
+        pass
+
+    def testDepth(self):
+        '''Test depth method on a tree deeper than the recursion
+        limit.'''
+
+        self.assertEqual(self.leaf.depth(), 100000)
+
+    def testTraverse(self):
+        '''Test traversals on a tree deeper than the recursion
+        limit.'''
+
+        self.tree.traverse(adder)
+        self.assertEqual(self.leaf.intvalue, 100000)
+        self.assertTrue(next(self.root.postorder()) is self.leaf)
+        self.assertEqual(len(list(self.root.levelorder())), 100000)
+
+    def testRender(self):
+        '''Test rendering a tree deeper than the recursion limit.'''
+
+        out = io.StringIO()
+        self.assertEqual(self.tree.render(out, max_depth=5000), 5000)
+        self.assertTrue(out.getvalue().endswith(' ' * 20000 + '4999\n'))
+
+    def testRenderBuffer(self):
+        '''Test that rendering long lines writes bounded chunks.'''
+
+        sizes = []
+        out = io.StringIO()
+        out.write = lambda s: sizes.append(len(s))
+        self.assertEqual(self.tree.render(out, max_depth=5000), 5000)
+        self.assertTrue(max(sizes) < BUFFER_SIZE + 20010)
+        self.assertTrue(sum(sizes) > 40000000)
+
+
+def adder(intnode):
+    '''(IntNode) -> None
+
+    Increase node's value by one.
+    '''
+
+    intnode.intvalue += 1
+
+
+if __name__ == '__main__':
+    # go!
+    suite1 = unittest.TestLoader().loadTestsFromTestCase(TestEmptyTree)
+    suite2 = unittest.TestLoader().loadTestsFromTestCase(TestSingleNode)
+    suite3 = unittest.TestLoader().loadTestsFromTestCase(TestLargeTree)
+    suite4 = unittest.TestLoader().loadTestsFromTestCase(TestDeepTree)
+    alltests = unittest.TestSuite([suite1, suite2, suite3, suite4])
+    runner = unittest.TextTestRunner()
+    runner.run(alltests)
@@ -1,36 +1,197 @@
+import sys
+from collections import deque
+from itertools import islice
+from weakref import ref
+
+
+#Shared children of every leaf node, replaced by a list on the first
+#add_child_node so that leaves do not each carry an empty list
+NO_CHILDREN = ()
+#Characters gathered into each write by write_lines
+BUFFER_SIZE = 65536
+#Stands in for the weak reference to a missing parent or tree: calling
+#it gives None, as calling a dead weak reference does
+NO_REF = type(None)
+
+
 class Node:
-    '''An arbitrary-tree node class with no data.'''
+    '''An arbitrary-tree node class with no data. Nodes only refer to
+    their parent and tree weakly, so that a tree is not one big
+    reference cycle: it owns its root, and each node its children.
+    Callers must therefore hold on to a tree for as long as they use its
+    nodes, including nodes just unpickled.'''
+
+    __slots__ = ('parent_ref', 'tree_ref', 'children', '__weakref__')
 
     def __init__(self, tree, parent=None):
         '''(Node, Tree, Node or NoneType) -> NoneType
         Initialize a new Node of tree tree with parent parent.'''
 
-        self.parent = parent
-        self.tree = tree
-        self.children = []
+        self.parent_ref = NO_REF if parent is None else ref(parent)
+        self.tree_ref = NO_REF if tree is None else ref(tree)
+        self.children = NO_CHILDREN
+
+    def get_parent(self):
+        '''(Node) -> Node or NoneType
+        Return self's parent, or None if self is a root. Raise
+        ReferenceError if the parent no longer exists.'''
+
+        parent = self.parent_ref()
+        if parent is None and self.parent_ref is not NO_REF:
+            raise ReferenceError("node's parent no longer exists")
+        return parent
+
+    def set_parent(self, parent):
+        '''(Node, Node or NoneType) -> NoneType
+        Make parent self's parent.'''
+
+        #Children of a parent share its one weak reference
+        self.parent_ref = NO_REF if parent is None else ref(parent)
+
+    parent = property(get_parent, set_parent)
+
+    def get_tree(self):
+        '''(Node) -> Tree or NoneType
+        Return self's tree, or None if self has none. Raise
+        ReferenceError if the tree no longer exists.'''
+
+        tree = self.tree_ref()
+        if tree is None and self.tree_ref is not NO_REF:
+            raise ReferenceError("node's tree no longer exists")
+        return tree
+
+    def set_tree(self, tree):
+        '''(Node, Tree or NoneType) -> NoneType
+        Make tree self's tree.'''
+
+        self.tree_ref = NO_REF if tree is None else ref(tree)
+
+    tree = property(get_tree, set_tree)
+
+    def __getstate__(self):
+        '''(Node) -> dict
+        Return self's attributes for pickling, with its parent and tree
+        themselves in place of the weak references to them, which cannot
+        be pickled.'''
+
+        state = {}
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name not in ('parent_ref', 'tree_ref', '__weakref__'):
+                    state[name] = getattr(self, name)
+        state['parent'] = self.parent
+        state['tree'] = self.tree
+        return state
+
+    def __setstate__(self, state):
+        '''(Node, dict) -> NoneType
+        Restore self's attributes from state, as returned by
+        __getstate__.'''
+
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def add_child_node(self, child):
+        '''(Node, Node) -> NoneType
+        Add child to the end of self's children.'''
+
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
 
     def traverse(self, f):
         '''(Node, function) -> NoneType
         Call f with self as parameter, then on each of
         self's children.'''
 
-        f(self)
-        for i in self.children:
-            i.traverse(f)
+        for i in self.preorder():
+            f(i)
 
     def depth(self):
         '''(Node) -> int
         Return the depth of self in the tree. The root of a
         tree has a depth of 1.'''
 
-        if not self.parent:
-            return 1
-        return self.parent.depth() + 1
+        d = 1
+        n = self.parent
+        while n:
+            d += 1
+            n = n.parent
+        return d
+
+    def preorder(self, prune=None, children=None):
+        '''(Node, function or NoneType, function or NoneType) -> generator
+        Yield self and its descendants in pre-order, using an explicit
+        stack instead of recursion. Nodes n for which prune(n) is true
+        are skipped along with their descendants. children(n) gives
+        the nodes to descend into (n.children by default); it is called
+        after n has been yielded.'''
+
+        stack = [self]
+        while stack:
+            n = stack.pop()
+            if prune and prune(n):
+                continue
+            yield n
+            if children:
+                stack.extend(reversed(children(n)))
+            else:
+                stack.extend(reversed(n.children))
+
+    def walk(self, max_depth=None, depth=1, prune=None):
+        '''(Node, int or NoneType, int, function or NoneType) -> generator
+        Yield (node, depth) for self and its descendants in pre-order,
+        where self has depth depth, carrying each node's depth down from
+        its parent instead of walking up to the root for it. Nodes
+        deeper than max_depth, and nodes n for which prune(n) is true,
+        are skipped along with their descendants.'''
+
+        stack = [(self, depth)]
+        while stack:
+            n, d = stack.pop()
+            if prune and prune(n):
+                continue
+            yield n, d
+            if n.children and (max_depth is None or d < max_depth):
+                d += 1
+                stack.extend([(i, d) for i in reversed(n.children)])
+
+    def postorder(self, prune=None, children=None):
+        '''(Node, function or NoneType, function or NoneType) -> generator
+        Yield self's descendants and then self in post-order, using an
+        explicit stack instead of recursion. prune and children are as
+        for preorder.'''
+
+        stack = [(self, False)]
+        while stack:
+            n, expanded = stack.pop()
+            if expanded:
+                yield n
+            elif not (prune and prune(n)):
+                stack.append((n, True))
+                for i in reversed(children(n) if children else n.children):
+                    stack.append((i, False))
+
+    def levelorder(self, prune=None, children=None):
+        '''(Node, function or NoneType, function or NoneType) -> generator
+        Yield self and its descendants level by level, left to right.
+        prune and children are as for preorder.'''
+
+        queue = deque([self])
+        while queue:
+            n = queue.popleft()
+            if prune and prune(n):
+                continue
+            yield n
+            queue.extend(children(n) if children else n.children)
 
 
 class IntNode(Node):
     '''A class inheriting from Node that can contain integers.'''
 
+    __slots__ = ('intvalue',)
+
     def __init__(self, value, tree, parent=None):
         '''(IntNode, int, Tree, IntNode or NoneType) -> NoneType
         Initialize a new IntNode of tree tree with intvalue value
@@ -52,7 +213,7 @@ class IntNode(Node):
         Return the newly created IntNode.'''
 
         retnode = IntNode(v, self.tree, self)
-        self.children.append(retnode)
+        self.add_child_node(retnode)
         return retnode
 
 
@@ -76,7 +237,47 @@ class Tree:
         '''(Tree) -> NoneType
         Print a tabbed representation of the tree to the screen.'''
 
-        self.traverse(print_offset)
+        self.render()
+
+    def render(self, out=None, limit=None, max_depth=None, prune=None):
+        '''(Tree, file or NoneType, int or NoneType, int or NoneType,
+        function or NoneType) -> int
+        Write a tabbed representation of the tree to out (the screen by
+        default) in one pass, as print_tree would, stopping after limit
+        lines and leaving out nodes deeper than max_depth, and nodes n
+        for which prune(n) is true with their descendants. Return the
+        number of lines written.'''
+
+        if not self.root:
+            return 0
+        return write_lines(out or sys.stdout,
+                           ('    ' * d + str(n) + '\n'
+                            for n, d in self.root.walk(max_depth, 1, prune)),
+                           limit)
+
+
+def write_lines(out, lines, limit=None):
+    '''(file, iterable, int or NoneType) -> int
+    Write lines, each ending in a newline, to out in writes of about
+    BUFFER_SIZE characters, stopping after limit lines. Return the
+    number written.'''
+
+    if limit is not None:
+        lines = islice(lines, limit)
+    count = 0
+    size = 0
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        count += 1
+        size += len(line)
+        #Lines may be long, so the buffer is bounded by its size
+        if size >= BUFFER_SIZE:
+            out.write(''.join(buffer))
+            size = 0
+            buffer = []
+    out.write(''.join(buffer))
+    return count
 
 
 def print_offset(n):
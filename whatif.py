@@ -0,0 +1,101 @@
+from royals import *
+
+
+def law_order(node, ranks, default, ranked):
+    '''(RoyalNode, dict, int or NoneType, bool) -> list
+    Return node's children in order of succession as if nobody were
+    ruler, under a law compiled by SuccessionLaw.compile.
+    '''
+
+    if default is None:
+        order = [i for i in node.children if i.royal.gender in ranks]
+    elif ranked:
+        order = list(node.children)
+    else:
+        return node.children
+    if ranked:
+        order.sort(key=lambda i: ranks.get(i.royal.gender, default))
+    return order
+
+
+def succession_for_rulers(tree, persons):
+    '''(FamilyTree, iterable) -> list of list
+    Return the line of succession tree would have with each of persons
+    as ruler, without crowning anybody.
+    '''
+
+    rulers = []
+    for person in persons:
+        node = tree.search(person)
+        if not node:
+            raise NoSuchRoyalError
+        if not node.royal.alive:
+            raise DeadRoyalError
+        rulers.append(node)
+    if not rulers:
+        return []
+    lines = lines_for_rulers(tree, rulers, tree.law)
+    if tree.law.fallback:
+        #Royals the law leaves out follow, as under its fallback
+        fallback = lines_for_rulers(tree, rulers, tree.law.fallback)
+        for line, rest in zip(lines, fallback):
+            listed = set(line)
+            line.extend([i for i in rest if i not in listed])
+    return lines
+
+
+def lines_for_rulers(tree, rulers, law):
+    '''(FamilyTree, list, SuccessionLaw) -> list of list
+    Return the line of succession under law with each of the nodes
+    rulers as ruler.
+    '''
+
+    compiled = law.compile(tree.root.royal.gender)
+    #One pre-order of the whole tree, with nobody set aside as ancestor
+    #of ruler, is shared by every candidate: each node's line is a run
+    #of it, and the living royals of the run are a run of living. The
+    #children a law leaves out start runs of their own after the rest
+    rows = {}
+    parent = []
+    included = []
+    first = []
+    living = []
+    tops = [tree.root]
+    while tops:
+        top = tops.pop()
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            rows[node] = len(parent)
+            parent.append(rows[node.parent] if node.parent else -1)
+            included.append(node is not top)
+            first.append(len(living))
+            if node.royal.alive:
+                living.append(node.royal)
+            heirs = law_order(node, *compiled)
+            if len(heirs) < len(node.children):
+                tops.extend([i for i in node.children if i not in heirs])
+            stack.extend(reversed(heirs))
+    #first[i] is where row i's run of living starts, and ends[i] where
+    #it ends; heirs follow parents, so ends are found in reverse
+    ends = first[1:] + [len(living)]
+    for i in range(len(parent) - 1, 0, -1):
+        if included[i] and ends[i] > ends[parent[i]]:
+            ends[parent[i]] = ends[i]
+    lines = []
+    for ruler in rulers:
+        #The ruler's run, then each ancestor's run without the run of
+        #its child leading to the ruler
+        child = rows[ruler]
+        line = living[first[child]:ends[child]]
+        row = parent[child]
+        while row >= 0:
+            if included[child]:
+                line.extend(living[first[row]:first[child]])
+                line.extend(living[ends[child]:ends[row]])
+            else:
+                line.extend(living[first[row]:ends[row]])
+            child = row
+            row = parent[row]
+        lines.append(line)
+    return lines